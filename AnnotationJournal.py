@@ -0,0 +1,222 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QLockFile
+
+from BoxStore import BoxStore
+from EditHistory import apply_command
+from LabelWriter import atomic_write_text
+
+# 每个进程在这里写自己的日志 session-<进程号>-<时间>.jsonl，并持有同名的 .lock 锁文件
+JOURNAL_DIR = os.path.join("resource", "journal")
+# 无法完全恢复的日志移到日志目录下的这个子目录保留，不再重放
+UNRECOVERED_SUBDIR = "unrecovered"
+
+
+def journal_lock(path):
+    """日志的锁文件；只有持有进程已退出（崩溃）时锁才算过期，可以被其他进程取得"""
+    lock = QLockFile(path + ".lock")
+    lock.setStaleLockTime(0)
+    return lock
+
+
+def text_hash(text):
+    """标注文本的哈希（用于确认日志中的编辑是基于哪个版本的文件）"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def read_label_text(label_path):
+    """读取标注文件的文本，文件不存在时返回空字符串"""
+    try:
+        with open(label_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+class AnnotationJournal:
+    """
+    标注编辑的预写日志（JSON Lines，只追加）
+
+    记录:
+        {"t": "o", "p": 标注路径, "s": [宽, 高], "h": 哈希}   该文件第一次编辑前的内容
+        {"t": "e", "q": 序号, "p": 标注路径, "c": 编辑命令}     一次编辑（命令格式见EditHistory）
+        {"t": "s", "p": 标注路径, "h": 哈希, "q": 序号}        提交保存的文本，包含序号不大于q的编辑
+    写入先进缓冲区，由后台线程每sync_interval秒统一flush+fsync一次。
+    每个进程写自己的日志文件并持有它的锁，同时运行的多个标注工具互不影响。
+    正常退出且标注全部落盘后删除日志；启动时用replay把已退出进程留下的日志重放到磁盘上的标注文件，
+    耗时只与日志长度有关。
+    """
+
+    def __init__(self, path=None, sync_interval=0.2):
+        if path is None:
+            path = os.path.join(JOURNAL_DIR, f"session-{os.getpid()}-{int(time.time() * 1000)}.jsonl")
+        self.path = path
+        self.sync_interval = sync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file_lock = journal_lock(path)
+        if not self._file_lock.tryLock(0):
+            raise OSError(f"标注日志正在被其他进程使用: {path}")
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._chains = set()  # 本日志中已有 "o" 记录的标注路径
+        self._dirty = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._sync_loop, name="annotation-journal", daemon=True)
+        self._thread.start()
+
+    def has_chain(self, label_path):
+        return label_path in self._chains
+
+    def begin(self, label_path, image_size, base_text):
+        """记录标注文件第一次编辑前的内容（同一日志中每个文件只记录一次）"""
+        if label_path in self._chains:
+            return
+        self._chains.add(label_path)
+        self._append({"t": "o", "p": label_path, "s": list(image_size), "h": text_hash(base_text)})
+
+    def record_edit(self, label_path, command):
+        """记录一次编辑，返回它的序号"""
+        self._seq += 1
+        self._append({"t": "e", "q": self._seq, "p": label_path, "c": list(command)})
+        return self._seq
+
+    def record_save(self, label_path, text):
+        """记录提交给写队列的标注文本"""
+        if label_path in self._chains:
+            self._append({"t": "s", "p": label_path, "h": text_hash(text), "q": self._seq})
+
+    def size(self):
+        with self._lock:
+            return self._file.tell()
+
+    def sync(self):
+        """把缓冲区中的记录写入磁盘"""
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def truncate(self):
+        """清空日志（所有编辑都已写入标注文件后调用）"""
+        with self._lock:
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._chains.clear()
+
+    def close(self, truncate=False):
+        """关闭日志；truncate为True（标注已全部落盘）时删除日志，否则保留给下次启动时重放"""
+        self._closed.set()
+        self._thread.join()
+        self.sync()
+        with self._lock:
+            self._file.close()
+        if truncate:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self._file_lock.unlock()
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._dirty = True
+
+    def _sync_loop(self):
+        while not self._closed.wait(self.sync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                print(f"写入标注日志失败: {e}")
+
+    @staticmethod
+    def replay(directory=JOURNAL_DIR):
+        """
+        重放已退出进程留下的日志，返回 (已恢复的文件列表, 无法恢复的文件列表)
+
+        只处理能取得锁的日志（锁不存在或持有进程已退出），正在运行的其他标注工具的日志不动
+        """
+        recovered, failed = [], []
+        for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+            lock = journal_lock(path)
+            if not lock.tryLock(0):
+                continue
+            try:
+                file_recovered, file_failed = AnnotationJournal.replay_file(path)
+                recovered.extend(file_recovered)
+                failed.extend(file_failed)
+            except OSError as e:
+                print(f"重放标注日志失败: {path}, 错误: {str(e)}")
+            finally:
+                lock.unlock()
+        return recovered, failed
+
+    @staticmethod
+    def replay_file(path):
+        """
+        把一个日志中尚未落盘的编辑重放到标注文件，返回 (已恢复的文件列表, 无法恢复的文件列表)
+
+        磁盘上的文件与 "o" 或某条 "s" 记录的哈希一致时，重放该版本之后的编辑；
+        都不一致（文件被其他程序改过）时不动该文件。
+        全部恢复后删除日志，有无法恢复的文件时把日志移到UNRECOVERED_SUBDIR子目录保留。
+        """
+        if not os.path.exists(path):
+            return [], []
+
+        chains = {}  # 标注路径 -> {"size", "bases": {哈希: 已包含的最大序号}, "edits": [(序号, 命令)]}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # 崩溃时写了一半的最后一行
+                kind = record.get("t")
+                label_path = record.get("p")
+                if kind == "o":
+                    chains[label_path] = {"size": tuple(record["s"]), "bases": {record["h"]: 0}, "edits": []}
+                elif label_path not in chains:
+                    continue
+                elif kind == "e":
+                    chains[label_path]["edits"].append((record["q"], tuple(record["c"])))
+                elif kind == "s":
+                    chains[label_path]["bases"][record["h"]] = record["q"]
+
+        recovered, failed = [], []
+        for label_path, chain in chains.items():
+            try:
+                disk_text = read_label_text(label_path)
+                upto = chain["bases"].get(text_hash(disk_text))
+                if upto is None:
+                    failed.append(label_path)
+                    continue
+                edits = [command for seq, command in chain["edits"] if seq > upto]
+                if not edits:
+                    continue
+                store = BoxStore.from_yolo_text(disk_text, chain["size"])
+                for command in edits:
+                    apply_command(store, command)
+                atomic_write_text(label_path, store.to_yolo_text(chain["size"]))
+                recovered.append(label_path)
+            except (OSError, ValueError, IndexError) as e:
+                print(f"恢复标注失败: {label_path}, 错误: {str(e)}")
+                failed.append(label_path)
+
+        if failed:
+            unrecovered_dir = os.path.join(os.path.dirname(path), UNRECOVERED_SUBDIR)
+            os.makedirs(unrecovered_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0]
+            os.replace(path, os.path.join(unrecovered_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"))
+        else:
+            os.remove(path)
+        return recovered, failed
@@ -1,11 +1,11 @@
 import sys
 import json
-import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QTextEdit,
                              QFileDialog, QMessageBox)
 from PyQt5.QtCore import Qt
 from SvgRenderer import get_category_svg_icon, set_svg_icon_from_string
+from ConfigStore import CONFIG_PATH, config_store
 
 
 class ClassMappingGenerator(QMainWindow):
@@ -40,7 +40,7 @@ class ClassMappingGenerator(QMainWindow):
         self.file_layout.addLayout(self.source_file_layout)
 
         # 配置文件路径显示
-        self.config_path = os.path.join("resource", "config.json")
+        self.config_path = CONFIG_PATH
         self.config_label = QLabel(f'目标配置文件: {self.config_path}')
         self.file_layout.addWidget(self.config_label)
 
@@ -115,22 +115,11 @@ class ClassMappingGenerator(QMainWindow):
             return
 
         try:
-            # 确保resource目录存在
-            os.makedirs("resource", exist_ok=True)
-
-            # 读取或创建config.json
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-            else:
-                config = {}
-
-            # 更新classes部分
-            config["classes"] = self.generated_mapping
-
-            # 写入文件
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            # 更新共享配置的classes部分（打开的窗口会收到变更通知），并立即写入文件
+            store = config_store()
+            store.set("classes", self.generated_mapping)
+            if not store.flush():
+                raise OSError(f"无法写入 {self.config_path}")
 
             QMessageBox.information(self, '成功', '配置文件已更新!')
             self.statusBar().showMessage('配置文件更新成功')
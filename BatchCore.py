@@ -0,0 +1,518 @@
+# 数据集批处理的核心功能（分割、缩放填充、尺寸检查、重命名），不依赖PyQt，界面和命令行（labeltool.py）共用；
+# 进度通过可选的回调报告。cv2等只在用到的函数中导入，分割和重命名不需要加载它们
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+RENAME_MODES = ("prefix", "suffix")
+
+# 分割数据集时生成文件的方式：复制、硬链接、符号链接、写时复制（reflink）
+LINK_MODES = ("copy", "hardlink", "symlink", "reflink")
+# 清单模式：只写 train.txt/val.txt/test.txt（图片的绝对路径列表），不生成任何图片文件
+MANIFEST_MODE = "manifest"
+SPLIT_MODES = LINK_MODES + (MANIFEST_MODE,)
+# Linux的FICLONE ioctl（btrfs、XFS等支持写时复制的文件系统）
+_FICLONE = 0x40049409
+
+
+def label_path_for(image_dir, rel_path, labels_dir=None):
+    """
+    图片对应的标注文件路径：labels目录下与图片相对image_dir的路径相同的.txt
+
+    labels_dir默认为image_dir同级的labels目录（images/a/x.jpg -> labels/a/x.txt），
+    递归扫描时不同子文件夹中的同名图片也不会共用一个标注文件
+    """
+    if labels_dir is None:
+        labels_dir = os.path.join(os.path.dirname(os.path.normpath(os.path.abspath(image_dir))), "labels")
+    return os.path.join(labels_dir, os.path.splitext(os.path.normpath(rel_path))[0] + ".txt")
+
+
+def list_images(folder, extensions=IMAGE_EXTENSIONS):
+    """文件夹中（不含子文件夹）的图片文件，返回Path列表"""
+    return [f for f in Path(folder).iterdir() if f.is_file() and f.suffix.lower() in extensions]
+
+
+def resize_with_padding(image, target_size, padding_color):
+    """等比例缩放到target_size x target_size以内，空白处用padding_color（BGR）填充"""
+    import cv2
+    import numpy as np
+
+    h, w = image.shape[:2]
+    scale = min(target_size / w, target_size / h)
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((target_size, target_size, 3), padding_color, dtype=np.uint8)
+
+    x_offset = (target_size - new_w) // 2
+    y_offset = (target_size - new_h) // 2
+    canvas[y_offset:y_offset + new_h, x_offset:x_offset + new_w] = resized
+    return canvas
+
+
+def encode_image(image, output_format):
+    """按格式编码图片，失败返回None"""
+    import cv2
+
+    output_format = output_format.lower()
+    if output_format == 'jpg':
+        success, buf = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+    elif output_format == 'png':
+        success, buf = cv2.imencode('.png', image, [int(cv2.IMWRITE_PNG_COMPRESSION), 3])
+    else:
+        success, buf = cv2.imencode(f'.{output_format}', image)
+    return buf.tobytes() if success else None
+
+
+def resize_images(input_folder, output_folder, target_size=640, padding_color=(255, 255, 255),
+                  output_format="jpg", progress=None, should_stop=None):
+    """
+    批量缩放填充图片
+
+    progress(百分比, 状态文本)在每张图片处理后调用；should_stop()返回True时停止。
+    返回 (成功数, 失败数)，输入文件夹不存在时抛出FileNotFoundError
+    """
+    from ImageCache import imread_unicode
+
+    input_folder = Path(input_folder)
+    output_folder = Path(output_folder)
+    if not input_folder.exists():
+        raise FileNotFoundError(f"输入文件夹不存在: {input_folder}")
+    output_folder.mkdir(parents=True, exist_ok=True)
+
+    image_files = list_images(input_folder)
+    total_files = len(image_files)
+    processed_count = 0
+    failed_count = 0
+
+    for idx, file_path in enumerate(image_files, 1):
+        if should_stop is not None and should_stop():
+            break
+
+        output_path = (output_folder / file_path.stem).with_suffix(f'.{output_format.lower()}')
+        try:
+            image = imread_unicode(str(file_path))
+            processed = None if image is None else resize_with_padding(image, target_size, padding_color)
+        except Exception:
+            processed = None
+
+        if processed is None:
+            failed_count += 1
+            status = f"❌ 处理失败: {file_path.name}"
+        else:
+            try:
+                data = encode_image(processed, output_format)
+                if data is not None:
+                    # 使用二进制写入模式保存文件（避免中文路径问题）
+                    with open(str(output_path), 'wb') as f:
+                        f.write(data)
+                    processed_count += 1
+                    status = f"✅ 已处理: {file_path.name}"
+                else:
+                    failed_count += 1
+                    status = f"❌ 编码失败: {file_path.name}"
+            except Exception as e:
+                failed_count += 1
+                status = f"❌ 保存失败: {file_path.name} ({str(e)})"
+
+        if progress is not None:
+            progress(int(idx / total_files * 100), status)
+
+    return processed_count, failed_count
+
+
+def check_images(folder, target_size=(640, 640), progress=None):
+    """
+    检查文件夹中的图片尺寸是否都是target_size (宽, 高)
+
+    先只读文件头获取尺寸，读不出来的格式才完整解码。
+    progress(百分比, 状态文本)在每张图片检查后调用；返回不符合的 [(文件名, 原因)]
+    """
+    from ImageHeader import read_image_size
+
+    invalid_files = []
+    image_files = list_images(folder)
+    total_files = len(image_files)
+
+    for idx, file in enumerate(image_files, 1):
+        try:
+            size = read_image_size(str(file))
+            if size is None:
+                from ImageCache import imread_unicode  # 只有完整解码时才需要OpenCV
+                img = imread_unicode(str(file))
+                size = None if img is None else (img.shape[1], img.shape[0])
+            if size is None:
+                invalid_files.append((file.name, "无法读取"))
+                status = f"检查: {file.name} (无法读取)"
+            elif tuple(size) != tuple(target_size):
+                invalid_files.append((file.name, f"{size[0]}x{size[1]}"))
+                status = f"检查: {file.name} ({size[0]}x{size[1]})"
+            else:
+                status = f"检查: {file.name} (符合)"
+        except Exception as e:
+            invalid_files.append((file.name, f"错误: {str(e)}"))
+            status = f"检查: {file.name} (错误)"
+
+        if progress is not None:
+            progress(int(idx / total_files * 100), status)
+
+    return invalid_files
+
+
+def default_rename_target(source_dir):
+    """重命名的默认目标文件夹：源文件夹同级的 <文件夹名>_ok"""
+    source_dir = os.path.normpath(source_dir)
+    return os.path.join(os.path.dirname(source_dir), f"{os.path.basename(source_dir)}_ok")
+
+
+def rename_files(source_dir, target_dir=None, mode="prefix", progress=None):
+    """
+    把源文件夹（含子文件夹）中的文件按所在文件夹名重命名并复制到目标文件夹
+
+    mode为"prefix"时命名为 文件夹_序号，为"suffix"时命名为 序号_文件夹；
+    类别映射（文件夹名 -> 序号，新文件名 -> 类别序号）写入目标文件夹同级的 class_mapping.txt。
+    progress(已复制数, 总数)在每个文件复制后调用。
+    返回 (复制的文件数, 映射文件路径)，没有文件时返回 (0, None)
+    """
+    if mode not in RENAME_MODES:
+        raise ValueError(f"未知的重命名模式: {mode}")
+    if not os.path.exists(source_dir):
+        raise FileNotFoundError(f"源文件夹不存在: {source_dir}")
+    if not target_dir:
+        target_dir = default_rename_target(source_dir)
+
+    # 收集所有文件并按所在文件夹名分组
+    folder_files = {}
+    for root, dirs, files in os.walk(source_dir):
+        folder_name = os.path.basename(root)
+        folder_files.setdefault(folder_name, [])
+        for file in files:
+            folder_files[folder_name].append(os.path.join(root, file))
+
+    total_files = sum(len(files) for files in folder_files.values())
+    if not total_files:
+        return 0, None
+
+    os.makedirs(target_dir, exist_ok=True)
+    sorted_folders = sorted(folder_files.keys())
+    class_ids = {folder: idx for idx, folder in enumerate(sorted_folders)}
+    num_digits = len(str(total_files))
+    result_mapping = {}
+
+    file_counter = 1  # 从1开始计数
+    for folder_name in sorted_folders:
+        for file_path in folder_files[folder_name]:
+            ext = os.path.splitext(file_path)[1]
+            number = str(file_counter).zfill(num_digits)
+            new_name = f"{folder_name}_{number}{ext}" if mode == "prefix" else f"{number}_{folder_name}{ext}"
+            shutil.copy2(file_path, os.path.join(target_dir, new_name))
+            result_mapping[new_name] = class_ids[folder_name]
+            if progress is not None:
+                progress(file_counter, total_files)
+            file_counter += 1
+
+    mapping_file = os.path.join(os.path.dirname(target_dir), "class_mapping.txt")
+    with open(mapping_file, 'w') as f:
+        json.dump({
+            'class_to_id': class_ids,
+            'file_to_class': result_mapping
+        }, f, indent=4)
+    return total_files, mapping_file
+
+
+def default_io_workers():
+    """文件I/O线程数：瓶颈在磁盘而不是CPU，线程数可以比CPU核数多，但要有上限"""
+    return min(32, (os.cpu_count() or 4) * 4)
+
+
+def _reflink(src, dst):
+    """写时复制克隆文件，文件系统或平台不支持时抛出OSError"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("当前平台不支持reflink")
+    import fcntl
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def materialize_file(src, dst, mode="copy"):
+    """
+    按mode在dst生成src的文件（已存在的dst先删除），链接失败时退回复制
+
+    返回实际使用的方式和文件大小
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    size = os.path.getsize(src)
+    try:
+        if mode == "hardlink":
+            os.link(src, dst)
+        elif mode == "symlink":
+            os.symlink(os.path.abspath(src), dst)
+        elif mode == "reflink":
+            _reflink(src, dst)
+        else:
+            shutil.copy(src, dst)
+            return "copy", size
+    except OSError:
+        # 跨磁盘不能硬链接、Windows没有创建符号链接的权限、文件系统不支持reflink等
+        shutil.copy(src, dst)
+        return "copy", size
+    return mode, size
+
+
+def materialize_files(pairs, mode="copy", workers=None, progress=None):
+    """
+    在线程池中为 [(源文件, 目标文件)] 生成文件
+
+    同时提交的任务数有上限，文件很多时也不会一次创建所有任务。
+    progress(已完成数, 总数)在每个文件完成后调用（在调用线程中）。
+    返回统计 {"files", "bytes", "saved_bytes", "fallbacks", "seconds"}
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"未知的文件生成方式: {mode}")
+    workers = workers or default_io_workers()
+    stats = {"files": 0, "bytes": 0, "saved_bytes": 0, "fallbacks": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    def record(done):
+        for future in done:
+            used, size = future.result()
+            stats["files"] += 1
+            stats["bytes"] += size
+            if used != "copy":
+                stats["saved_bytes"] += size
+            elif mode != "copy":
+                stats["fallbacks"] += 1
+            if progress is not None:
+                progress(stats["files"], len(pairs))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for src, dst in pairs:
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record(done)
+            pending.add(pool.submit(materialize_file, src, dst, mode))
+        record(wait(pending).done)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def labels_dir_for_manifest(images_dir):
+    """训练框架按清单中图片路径里最后一个 images 换成 labels 来找标签，返回它会去找的标签目录"""
+    parts = Path(images_dir).resolve().parts
+    if "images" not in parts:
+        return None
+    index = len(parts) - 1 - parts[::-1].index("images")
+    return str(Path(*parts[:index], "labels", *parts[index + 1:]))
+
+
+def write_manifests(output_dir, phase_files, images_dir):
+    """写 <阶段>.txt 清单（每行一张图片的绝对路径），返回 {阶段: 清单文件名}"""
+    images_dir = os.path.abspath(images_dir)
+    manifests = {}
+    for phase, files in phase_files.items():
+        if not files:
+            continue
+        name = f"{phase}.txt"
+        with open(os.path.join(output_dir, name), 'w', encoding='utf-8') as f:
+            f.writelines(os.path.join(images_dir, img_file) + "\n" for img_file in files)
+        manifests[phase] = name
+    return manifests
+
+
+def create_dataset_split(
+        images_dir="images",
+        labels_dir="labels",
+        output_dir="datasets",
+        val_ratio=0.2,
+        seed=42,
+        class_mapping_file="class_mapping.json",
+        link_mode="copy",
+        workers=None,
+        test_ratio=0.0
+):
+    """
+    自动创建训练集/验证集（/测试集）分割
+
+    参数:
+        images_dir: 原始图片目录
+        labels_dir: 原始标签目录
+        output_dir: 输出目录
+        val_ratio: 验证集比例(0-1)
+        seed: 随机种子
+        class_mapping_file: 包含类别映射的JSON文件路径
+        link_mode: 生成文件的方式，见SPLIT_MODES（硬链接、符号链接、reflink不占用新的磁盘空间；
+                   manifest只写图片路径清单，不生成任何图片和标签文件）
+        workers: 文件I/O线程数，默认为default_io_workers()
+        test_ratio: 测试集比例(0-1)，为0时不划分测试集
+
+    返回文件生成的统计（manifest模式为None）
+    """
+    import yaml
+    from tqdm import tqdm
+
+    if link_mode not in SPLIT_MODES:
+        raise ValueError(f"未知的文件生成方式: {link_mode}")
+    if val_ratio + test_ratio >= 1:
+        raise ValueError("验证集和测试集的比例之和应小于1")
+    manifest = link_mode == MANIFEST_MODE
+    phases = ('train', 'val', 'test') if test_ratio > 0 else ('train', 'val')
+
+    # 读取类别映射文件
+    with open(class_mapping_file) as f:
+        class_mapping = json.load(f)
+
+    class_to_id = class_mapping["class_to_id"]
+    id_to_class = {v: k for k, v in class_to_id.items()}
+
+    # 按ID排序获取标准类别顺序
+    CLASS_ORDER = [id_to_class[i] for i in sorted(id_to_class.keys())]
+
+    # 创建输出目录结构（清单模式只需要输出目录本身）
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if not manifest:
+        for phase in phases:
+            (Path(output_dir) / "images" / phase).mkdir(parents=True, exist_ok=True)
+            (Path(output_dir) / "labels" / phase).mkdir(parents=True, exist_ok=True)
+
+    # 获取所有图片并按类别分组
+    print("🔍 扫描图片文件中...")
+    class_files = {}
+    for img_file in tqdm(os.listdir(images_dir), desc="处理图片"):
+        if not img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+
+        # 从文件名提取类别 (支持 Anger_001.png 和 001_Anger.png 格式)
+        parts = os.path.splitext(img_file)[0].split('_')
+        if parts[0].isdigit():
+            class_name = parts[1]
+        else:
+            class_name = parts[0]
+
+        if class_name not in class_to_id:
+            raise ValueError(f"发现未定义的类别: {class_name} (来自文件: {img_file})")
+
+        if class_name not in class_files:
+            class_files[class_name] = []
+        class_files[class_name].append(img_file)
+
+    # 验证所有找到的类别都在映射文件中
+    for class_name in class_files.keys():
+        if class_name not in class_to_id:
+            raise ValueError(f"发现未定义的类别: {class_name}")
+
+    # 按标准顺序重新组织类别
+    ordered_classes = [c for c in CLASS_ORDER if c in class_files]
+    class_stats = {c: 0 for c in ordered_classes}
+
+    print("\n📊 开始分割数据集...")
+    random.seed(seed)
+    phase_files = {phase: [] for phase in phases}
+    for class_name in ordered_classes:
+        files = class_files[class_name]
+        files.sort()  # 与目录的列出顺序无关，同一个种子总是得到同样的分割
+        random.shuffle(files)
+
+        # 计算验证集（和测试集）数量 (至少保留1张)
+        val_count = max(1, int(len(files) * val_ratio))
+        test_count = max(1, int(len(files) * test_ratio)) if test_ratio > 0 else 0
+        split_files = {
+            'val': files[:val_count],
+            'test': files[val_count:val_count + test_count],
+            'train': files[val_count + test_count:],
+        }
+
+        class_stats[class_name] = {phase: len(split_files[phase]) for phase in phases}
+        class_stats[class_name]['total'] = len(files)
+        for phase in phases:
+            phase_files[phase].extend(split_files[phase])
+
+    io_stats = None
+    if manifest:
+        # 只写清单，训练时按图片路径找对应的标签
+        manifests = write_manifests(output_dir, phase_files, images_dir)
+        expected_labels = labels_dir_for_manifest(images_dir)
+        if expected_labels is None or os.path.normcase(expected_labels) != \
+                os.path.normcase(os.path.abspath(labels_dir)):
+            print(f"\n⚠️ 训练时会在 {expected_labels or '（图片路径中没有images目录）'} 中查找标签，"
+                  f"与标签目录 {labels_dir} 不一致，请把标签放到与images同级的labels目录")
+    else:
+        pairs = []  # (源文件, 目标文件)
+        for phase in phases:
+            for img_file in phase_files[phase]:
+                # 图片文件和对应的标签文件
+                pairs.append((os.path.join(images_dir, img_file), f"{output_dir}/images/{phase}/{img_file}"))
+                label_file = os.path.splitext(img_file)[0] + '.txt'
+                label_path = label_path_for(images_dir, img_file, labels_dir)
+                if os.path.exists(label_path):
+                    pairs.append((label_path, f"{output_dir}/labels/{phase}/{label_file}"))
+
+        # 在线程池中生成文件，使用进度条
+        with tqdm(total=len(pairs), desc=f"生成文件（{link_mode}）") as bar:
+            io_stats = materialize_files(pairs, link_mode, workers, progress=lambda done, total: bar.update(1))
+        manifests = {phase: f"images/{phase}" for phase in phases}
+
+    # 创建标准格式的YAML配置文件
+    yaml_content = {'path': str(Path(output_dir).resolve())}
+    yaml_content.update(manifests)
+    yaml_content.update({
+        'nc': len(ordered_classes),
+        'names': CLASS_ORDER
+    })
+
+    yaml_path = Path(output_dir) / "dataset.yaml"
+    with open(yaml_path, 'w') as f:
+        yaml.dump(yaml_content, f, sort_keys=False, default_flow_style=None)
+
+    # 打印统计信息
+    print("\n✅ 数据集分割完成")
+    print(f"📁 输出目录: {output_dir}")
+    print(f"🎯 类别数量: {len(ordered_classes)}")
+    print("\n📊 各类别数量统计:")
+    phase_names = {'train': "训练集", 'val': "验证集", 'test': "测试集"}
+    max_name_len = max(len(c) for c in ordered_classes)
+    for class_name in ordered_classes:
+        stats = class_stats[class_name]
+        print(f"  {class_name.ljust(max_name_len)} : "
+              + "".join(f"{phase_names[phase]}={str(stats[phase]).rjust(4)} " for phase in phases)
+              + f"总计={str(stats['total']).rjust(4)}")
+
+    if io_stats is not None:
+        seconds = max(io_stats["seconds"], 1e-6)
+        print(f"\n💾 生成 {io_stats['files']} 个文件（{format_size(io_stats['bytes'])}），"
+              f"用时 {io_stats['seconds']:.2f} 秒，"
+              f"{io_stats['files'] / seconds:.0f} 个/秒，{format_size(io_stats['bytes'] / seconds)}/秒")
+        print(f"   方式: {link_mode}，节省磁盘空间 {format_size(io_stats['saved_bytes'])}"
+              + (f"，{io_stats['fallbacks']} 个文件无法链接，已改为复制" if io_stats['fallbacks'] else ""))
+    else:
+        print(f"\n📝 已生成清单: {', '.join(manifests.values())}（没有复制任何图片）")
+
+    print(f"\n📄 YAML配置文件已生成: {yaml_path}")
+    print("🎯 标准格式预览:")
+    print("=" * 40)
+    with open(yaml_path) as f:
+        print(f.read())
+    print("=" * 40)
+    return io_stats
@@ -0,0 +1,90 @@
+import math
+from collections import defaultdict
+
+
+class BoxIndex:
+    """
+    标注框的均匀网格空间索引
+
+    每个框登记在它覆盖的所有网格中，点选时只检查光标所在网格里的框，
+    与框的总数无关。框的编号即它在标注列表中的下标，删除中间的框后需要rebuild。
+    """
+
+    GRID_DIVISIONS = 64  # 按图片长边划分的网格数
+
+    def __init__(self, cell_size=64.0):
+        self.cell_size = cell_size
+        self._cells = defaultdict(set)  # (cx, cy) -> 框编号集合
+        self._rects = {}  # 框编号 -> (x1, y1, x2, y2)
+
+    def rebuild(self, boxes, image_size=None):
+        """按标注列表 [class_id, x1, y1, x2, y2] 重建索引，给出图片尺寸时按尺寸确定网格大小"""
+        if image_size is not None:
+            self.cell_size = max(16.0, max(image_size) / self.GRID_DIVISIONS)
+        self._cells.clear()
+        self._rects.clear()
+        for box_id, box in enumerate(boxes):
+            self.insert(box_id, box[1:5])
+
+    def __len__(self):
+        return len(self._rects)
+
+    def insert(self, box_id, rect):
+        rect = self._normalize(rect)
+        self._rects[box_id] = rect
+        for cell in self._cells_of(rect):
+            self._cells[cell].add(box_id)
+
+    def remove(self, box_id):
+        rect = self._rects.pop(box_id, None)
+        if rect is None:
+            return
+        for cell in self._cells_of(rect):
+            ids = self._cells.get(cell)
+            if ids is not None:
+                ids.discard(box_id)
+                if not ids:
+                    del self._cells[cell]
+
+    def update(self, box_id, rect):
+        self.remove(box_id)
+        self.insert(box_id, rect)
+
+    def hit(self, x, y, tolerance=0.0):
+        """
+        返回包含点 (x, y) 的框编号，没有则返回None
+
+        多个框重叠时取面积最小的（嵌套的小框也能选中），面积相同时取后画的
+        """
+        best_id = None
+        best_area = None
+        for box_id in self.query(x - tolerance, y - tolerance, x + tolerance, y + tolerance):
+            x1, y1, x2, y2 = self._rects[box_id]
+            area = (x2 - x1) * (y2 - y1)
+            if best_area is None or area < best_area or (area == best_area and box_id > best_id):
+                best_id = box_id
+                best_area = area
+        return best_id
+
+    def query(self, x1, y1, x2, y2):
+        """返回与矩形相交的框编号集合"""
+        x1, y1, x2, y2 = self._normalize((x1, y1, x2, y2))
+        result = set()
+        for cell in self._cells_of((x1, y1, x2, y2)):
+            for box_id in self._cells.get(cell, ()):
+                bx1, by1, bx2, by2 = self._rects[box_id]
+                if bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2:
+                    result.add(box_id)
+        return result
+
+    def _cells_of(self, rect):
+        x1, y1, x2, y2 = rect
+        s = self.cell_size
+        for cx in range(math.floor(x1 / s), math.floor(x2 / s) + 1):
+            for cy in range(math.floor(y1 / s), math.floor(y2 / s) + 1):
+                yield cx, cy
+
+    @staticmethod
+    def _normalize(rect):
+        x1, y1, x2, y2 = rect
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
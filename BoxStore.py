@@ -0,0 +1,167 @@
+import numpy as np
+
+from LabelWriter import atomic_write_text
+
+YOLO_LINE_FORMAT = "%d %.6f %.6f %.6f %.6f"
+
+
+class BoxStore:
+    """
+    标注框存储
+
+    类别为 (N,) 的int32列，坐标为 (N, 4) 的float32块 (x1, y1, x2, y2)，坐标单位为原图像素；
+    不传图片尺寸时按 (1, 1) 处理，即直接保存YOLO的归一化坐标（批处理工具用）。
+    数组按容量成倍增长，逐个添加框是均摊O(1)的。
+    取单个框时返回 (class_id, x1, y1, x2, y2) 元组。
+    """
+
+    def __init__(self, classes=None, coords=None):
+        if classes is None:
+            classes = np.empty(0, dtype=np.int32)
+            coords = np.empty((0, 4), dtype=np.float32)
+        self._classes = np.ascontiguousarray(classes, dtype=np.int32)
+        self._coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 4)
+        self._size = len(self._classes)
+
+    # ---------- YOLO格式转换 ----------
+
+    @classmethod
+    def from_yolo(cls, rows, image_size=None):
+        """由 (N, 5) 的YOLO数组 (class_id, 中心x, 中心y, 宽, 高)（归一化坐标）创建"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+        img_w, img_h = image_size or (1, 1)
+        half_w = rows[:, 3] / 2
+        half_h = rows[:, 4] / 2
+        coords = np.empty((len(rows), 4), dtype=np.float32)
+        coords[:, 0] = (rows[:, 1] - half_w) * img_w
+        coords[:, 1] = (rows[:, 2] - half_h) * img_h
+        coords[:, 2] = (rows[:, 1] + half_w) * img_w
+        coords[:, 3] = (rows[:, 2] + half_h) * img_h
+        return cls(rows[:, 0].astype(np.int32), coords)
+
+    def to_yolo(self, image_size=None):
+        """转换为 (N, 5) 的YOLO数组（归一化坐标，float64）"""
+        img_w, img_h = image_size or (1, 1)
+        coords = self.coords.astype(np.float64)
+        rows = np.empty((len(self), 5), dtype=np.float64)
+        rows[:, 0] = self.classes
+        rows[:, 1] = (coords[:, 0] + coords[:, 2]) / 2 / img_w
+        rows[:, 2] = (coords[:, 1] + coords[:, 3]) / 2 / img_h
+        rows[:, 3] = (coords[:, 2] - coords[:, 0]) / img_w
+        rows[:, 4] = (coords[:, 3] - coords[:, 1]) / img_h
+        return rows
+
+    @classmethod
+    def from_yolo_text(cls, text, image_size=None):
+        """
+        解析YOLO标注文本
+
+        逐行检查字段数，只取正好5个数的行（空行和其他格式的行如分割多边形跳过），再整体交给NumPy转换
+        """
+        rows = [row for row in (line.split() for line in text.splitlines()) if len(row) == 5]
+        values = np.array(rows, dtype=np.float64) if rows else np.empty((0, 5))
+        return cls.from_yolo(values, image_size)
+
+    def to_yolo_text(self, image_size=None):
+        """格式化为YOLO标注文本（每行以换行结尾）"""
+        if not len(self):
+            return ""
+        rows = self.to_yolo(image_size)
+        # 第一列按整数格式化，其余保留6位小数
+        rows = [(int(r[0]),) + tuple(r[1:]) for r in rows.tolist()]
+        return "\n".join(YOLO_LINE_FORMAT % row for row in rows) + "\n"
+
+    @classmethod
+    def load(cls, path, image_size=None):
+        """读取YOLO标注文件，文件不存在时返回空的BoxStore"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_yolo_text(f.read(), image_size)
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path, image_size=None):
+        """原子写入YOLO标注文件"""
+        atomic_write_text(path, self.to_yolo_text(image_size))
+
+    # ---------- 数组视图 ----------
+
+    @property
+    def classes(self):
+        return self._classes[:self._size]
+
+    @property
+    def coords(self):
+        return self._coords[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("标注框下标超出范围")
+        return (int(self._classes[index]),) + tuple(self._coords[index].tolist())
+
+    def __iter__(self):
+        for class_id, rect in zip(self.classes.tolist(), self.coords.tolist()):
+            yield (class_id,) + tuple(rect)
+
+    def rect(self, index):
+        """第index个框的 (x1, y1, x2, y2)"""
+        return self[index][1:5]
+
+    def intersecting(self, x1, y1, x2, y2):
+        """与矩形相交的框的下标数组（向量化判断，用于绘制前裁剪）"""
+        c = self.coords
+        mask = (c[:, 0] <= x2) & (c[:, 2] >= x1) & (c[:, 1] <= y2) & (c[:, 3] >= y1)
+        return np.flatnonzero(mask)
+
+    # ---------- 修改 ----------
+
+    def append(self, class_id, rect):
+        """添加一个框，返回它的下标"""
+        return self.insert(self._size, class_id, rect)
+
+    def insert(self, index, class_id, rect):
+        """在index处插入一个框，后面的框下标后移"""
+        if self._size == len(self._classes):
+            self._grow()
+        n = self._size
+        if index < n:
+            self._classes[index + 1:n + 1] = self._classes[index:n]
+            self._coords[index + 1:n + 1] = self._coords[index:n]
+        self._classes[index] = class_id
+        self._coords[index] = rect
+        self._size += 1
+        return index
+
+    def pop(self, index=-1):
+        """删除并返回一个框 (class_id, x1, y1, x2, y2)，后面的框下标前移"""
+        box = self[index]
+        if index < 0:
+            index += self._size
+        n = self._size
+        self._classes[index:n - 1] = self._classes[index + 1:n]
+        self._coords[index:n - 1] = self._coords[index + 1:n]
+        self._size -= 1
+        return box
+
+    def set_rect(self, index, rect):
+        self._coords[:self._size][index] = rect
+
+    def set_class(self, index, class_id):
+        self._classes[:self._size][index] = class_id
+
+    def clear(self):
+        self._size = 0
+
+    def _grow(self):
+        capacity = max(16, len(self._classes) * 2)
+        classes = np.empty(capacity, dtype=np.int32)
+        coords = np.empty((capacity, 4), dtype=np.float32)
+        classes[:self._size] = self.classes
+        coords[:self._size] = self.coords
+        self._classes = classes
+        self._coords = coords
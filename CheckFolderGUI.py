@@ -1,13 +1,12 @@
 import sys
 import time
-import cv2
-import numpy as np
 from pathlib import Path
 from functools import partial
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QLabel, QProgressBar, QMessageBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from SvgRenderer import get_check_svg_icon, set_svg_icon_from_string
+from BatchCore import check_images
 
 
 class ImageChecker(QThread):
@@ -18,43 +17,9 @@ class ImageChecker(QThread):
         super().__init__()
         self.folder_path = Path(folder_path)
         self.target_size = target_size
-        self.valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff'}
-
-    def read_image_with_cn_path(self, file_path):
-        """解决中文路径问题"""
-        try:
-            with open(file_path, 'rb') as f:
-                img_bytes = np.frombuffer(f.read(), dtype=np.uint8)
-                return cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
-        except Exception as e:
-            print(f"读取文件失败: {file_path}, 错误: {str(e)}")
-            return None
 
     def run(self):
-        invalid_files = []
-        image_files = [f for f in self.folder_path.iterdir()
-                       if f.suffix.lower() in self.valid_extensions]
-        total_files = len(image_files)
-
-        for idx, file in enumerate(image_files, 1):
-            try:
-                img = self.read_image_with_cn_path(str(file))
-                if img is None:
-                    invalid_files.append((file.name, "无法读取"))
-                    self.progress_updated.emit(int(idx / total_files * 100), f"检查: {file.name} (无法读取)")
-                    continue
-
-                h, w = img.shape[:2]
-                if w != self.target_size[0] or h != self.target_size[1]:
-                    invalid_files.append((file.name, f"{w}x{h}"))
-                    self.progress_updated.emit(int(idx / total_files * 100), f"检查: {file.name} ({w}x{h})")
-                else:
-                    self.progress_updated.emit(int(idx / total_files * 100), f"检查: {file.name} (符合)")
-
-            except Exception as e:
-                invalid_files.append((file.name, f"错误: {str(e)}"))
-                self.progress_updated.emit(int(idx / total_files * 100), f"检查: {file.name} (错误)")
-
+        invalid_files = check_images(self.folder_path, self.target_size, progress=self.progress_updated.emit)
         self.checking_finished.emit(len(invalid_files) == 0, invalid_files)
 
 
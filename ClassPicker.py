@@ -0,0 +1,169 @@
+from bisect import bisect_left
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from ConfigGUI import text_color_for
+
+
+class ClassIndex:
+    """
+    类别名的前缀/模糊索引，类别改变时重新创建
+
+    类名从每个单词（用 _ - 空格 分开）开始的后缀小写后排序：前缀查找用二分；
+    前缀结果不足时再做模糊匹配（从某个单词开始、输入的字符按顺序出现，如 tl 匹配 traffic_light），
+    模糊匹配只检查以输入首字母开头的后缀，找到limit个就停止。
+    """
+    SEPARATORS = " _-"
+
+    def __init__(self, classes):
+        self.classes = list(classes)
+        keys = []
+        for class_id, name in enumerate(self.classes):
+            name = name.lower()
+            for start, char in enumerate(name):
+                if char not in self.SEPARATORS and (start == 0 or name[start - 1] in self.SEPARATORS):
+                    keys.append((name[start:], class_id))
+        keys.sort()
+        self._keys = keys
+
+    def __len__(self):
+        return len(self.classes)
+
+    def _range(self, text):
+        """以text开头的键在_keys中的起始位置"""
+        return bisect_left(self._keys, (text, -1))
+
+    def prefix(self, text, limit):
+        """类名或其中某个单词以text开头的类别序号（按匹配的单词排序）"""
+        text = text.lower()
+        found = []
+        for position in range(self._range(text), len(self._keys)):
+            key, class_id = self._keys[position]
+            if not key.startswith(text) or len(found) >= limit:
+                break
+            if class_id not in found:
+                found.append(class_id)
+        return found
+
+    def fuzzy(self, text, limit, exclude=()):
+        """从某个单词开始、text的字符按顺序出现的类别序号"""
+        text = text.lower()
+        found = []
+        for position in range(self._range(text[0]), len(self._keys)):
+            key, class_id = self._keys[position]
+            if key[0] != text[0] or len(found) >= limit:
+                break
+            if class_id in exclude or class_id in found:
+                continue
+            index = 1
+            for char in text[1:]:
+                index = key.find(char, index) + 1
+                if not index:
+                    break
+            else:
+                found.append(class_id)
+        return found
+
+    def search(self, text, limit=20):
+        """
+        查找类别，返回最多limit个序号：
+        纯数字时优先匹配该序号，然后是前缀匹配，最后是模糊匹配
+        """
+        text = text.strip()
+        if not text:
+            return list(range(min(limit, len(self.classes))))
+        found = []
+        if text.isdigit() and int(text) < len(self.classes):
+            found.append(int(text))
+        for class_id in self.prefix(text, limit):
+            if class_id not in found:
+                found.append(class_id)
+        if len(found) < limit:
+            found.extend(self.fuzzy(text, limit - len(found), exclude=set(found)))
+        return found[:limit]
+
+
+class ClassPickerPopup(QWidget):
+    """
+    输入即搜索的类别选择弹窗
+
+    输入类名前缀、其中的单词、字母缩写或序号，回车选择第一项或选中的项，Esc关闭；
+    输入为空时先列出最近使用的类别。选择后发出class_picked(序号)
+    """
+    class_picked = pyqtSignal(int)
+    MAX_RESULTS = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.index = ClassIndex([])
+        self.colors = []
+        self.recent = []
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(2, 2, 2, 2)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("输入类名或序号搜索")
+        self.search_edit.textChanged.connect(self.update_results)
+        self.search_edit.installEventFilter(self)
+        layout.addWidget(self.search_edit)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(lambda item: self.pick(item.data(Qt.UserRole)))
+        layout.addWidget(self.result_list)
+        self.setLayout(layout)
+        self.resize(260, 320)
+
+    def set_classes(self, classes, colors):
+        """类别改变时重建索引，colors为每个类别的(r, g, b)"""
+        self.index = ClassIndex(classes)
+        self.colors = list(colors)
+        self.recent = [class_id for class_id in self.recent if class_id < len(classes)]
+
+    def popup(self, pos, recent=()):
+        """在pos（全局坐标）处弹出，recent为最近使用的类别序号"""
+        self.recent = list(recent)
+        self.search_edit.clear()
+        self.update_results("")
+        self.move(pos)
+        self.show()
+        self.search_edit.setFocus()
+
+    def update_results(self, text):
+        if text.strip():
+            class_ids = self.index.search(text, self.MAX_RESULTS)
+        else:
+            class_ids = self.recent + [class_id for class_id in self.index.search("", self.MAX_RESULTS)
+                                       if class_id not in self.recent]
+        self.result_list.clear()
+        for class_id in class_ids[:self.MAX_RESULTS]:
+            item = QListWidgetItem(f"#{class_id} {self.index.classes[class_id]}")
+            item.setData(Qt.UserRole, class_id)
+            if class_id < len(self.colors):
+                color = QColor(*self.colors[class_id])
+                item.setBackground(color)
+                item.setForeground(text_color_for(color))
+            self.result_list.addItem(item)
+        if self.result_list.count():
+            self.result_list.setCurrentRow(0)
+
+    def pick(self, class_id):
+        self.hide()
+        self.class_picked.emit(class_id)
+
+    def eventFilter(self, obj, event):
+        # 在搜索框中用上下键移动选中的结果，回车选择
+        if obj is self.search_edit and event.type() == event.KeyPress:
+            key = event.key()
+            if key in (Qt.Key_Up, Qt.Key_Down):
+                row = self.result_list.currentRow() + (1 if key == Qt.Key_Down else -1)
+                if 0 <= row < self.result_list.count():
+                    self.result_list.setCurrentRow(row)
+                return True
+            if key in (Qt.Key_Return, Qt.Key_Enter):
+                item = self.result_list.currentItem()
+                if item is not None:
+                    self.pick(item.data(Qt.UserRole))
+                return True
+        return super().eventFilter(obj, event)
@@ -1,86 +1,106 @@
 import sys
-import json
+import copy
 import colorsys
-import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QLineEdit, QPushButton, QColorDialog, QGridLayout,
-                             QFileDialog, QInputDialog, QScrollArea, QFrame)
-from PyQt5.QtGui import QColor, QPainter, QFontMetrics, QFont, QMouseEvent
-from PyQt5.QtCore import Qt, QSize, pyqtSignal
+                             QLabel, QLineEdit, QPushButton, QColorDialog, QListView,
+                             QFileDialog, QInputDialog, QStyledItemDelegate, QStyle)
+from PyQt5.QtGui import QColor, QPen, QFont
+from PyQt5.QtCore import (Qt, QSize, QTimer, QAbstractListModel, QModelIndex,
+                          QSortFilterProxyModel, QItemSelectionModel)
 
 from SvgRenderer import get_config_svg_icon, set_svg_icon_from_string
+from ConfigStore import config_store
 
 
-class ColorLabel(QFrame):
-    clicked = pyqtSignal()
+# 类别列表的自定义数据角色：类别序号、用于搜索的文本（"序号 类名"）
+INDEX_ROLE = Qt.UserRole
+FILTER_ROLE = Qt.UserRole + 1
 
-    def __init__(self, index, label_data, parent=None):
-        super().__init__(parent)
-        self.index = index
-        self.label_data = label_data
-        self.selected = False
-
-        self.setFrameShape(QFrame.Box)
-        self.setLineWidth(1)
-        self.setFixedSize(120, 60)  # 固定大小
-        self.setCursor(Qt.PointingHandCursor)
-
-        # 主布局
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
-
-        # 标签信息部分
-        self.index_label = QLabel(f"{index}")
-        self.index_label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
 
-        self.text_label = QLabel(label_data["label"])
-        self.text_label.setAlignment(Qt.AlignCenter)
+def text_color_for(color):
+    """根据背景色自动选择合适的前景色"""
+    if (color.red() * 0.299 + color.green() * 0.587 + color.blue() * 0.114) > 150:
+        return QColor(Qt.black)
+    return QColor(Qt.white)
 
-        layout.addWidget(self.index_label)
-        layout.addWidget(self.text_label)
 
-        self.update_color()
-        self.update_selection()
+class ClassListModel(QAbstractListModel):
+    """
+    类别列表模型，直接引用编辑器中的classes列表
 
-    def update_color(self):
-        # 设置整个标签的背景色
-        color = QColor(
-            self.label_data["r"],
-            self.label_data["g"],
-            self.label_data["b"]
-        )
+    增删改只通知受影响的行，视图只绘制可见的行，几千个类别也不需要为每个类别创建控件
+    """
 
-        # 根据背景色自动选择合适的前景色
-        if (color.red() * 0.299 + color.green() * 0.587 + color.blue() * 0.114) > 150:
-            text_color = Qt.black
-        else:
-            text_color = Qt.white
-
-        # 应用样式
-        self.setStyleSheet(f"""
-            ColorLabel {{
-                background-color: rgb({color.red()}, {color.green()}, {color.blue()});
-                border: 1px solid gray;
-            }}
-            QLabel {{
-                color: {'black' if text_color == Qt.black else 'white'};
-            }}
-        """)
-
-    def update_selection(self):
-        # 更新选中状态
-        if self.selected:
-            self.setStyleSheet(self.styleSheet() + "ColorLabel { border: 2px solid black; }")
-        else:
-            self.setStyleSheet(self.styleSheet() + "ColorLabel { border: 1px solid gray; }")
-
-    def mousePressEvent(self, event: QMouseEvent):
-        self.clicked.emit()
-        super().mousePressEvent(event)
-
-    def mouseDoubleClickEvent(self, event: QMouseEvent):
-        self.clicked.emit()
-        super().mouseDoubleClickEvent(event)
+    def __init__(self, classes, parent=None):
+        super().__init__(parent)
+        self.classes = classes
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.classes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        class_data = self.classes[index.row()]
+        if role == Qt.DisplayRole:
+            return class_data["label"]
+        if role == Qt.BackgroundRole:
+            return QColor(class_data["r"], class_data["g"], class_data["b"])
+        if role == Qt.ToolTipRole:
+            return f"#{index.row()} {class_data['label']}"
+        if role == INDEX_ROLE:
+            return index.row()
+        if role == FILTER_ROLE:
+            return f"{index.row()} {class_data['label']}"
+        return None
+
+    def set_classes(self, classes):
+        self.beginResetModel()
+        self.classes = classes
+        self.endResetModel()
+
+    def append_class(self, class_data):
+        row = len(self.classes)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.classes.append(class_data)
+        self.endInsertRows()
+        return row
+
+    def remove_class(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.classes[row]
+        self.endRemoveRows()
+        # 后面的类别序号都减了1
+        if row < len(self.classes):
+            self.dataChanged.emit(self.index(row), self.index(len(self.classes) - 1))
+
+    def class_changed(self, first, last=None):
+        """通知从first到last（包含）的类别已修改"""
+        self.dataChanged.emit(self.index(first), self.index(first if last is None else last))
+
+
+class ClassColorDelegate(QStyledItemDelegate):
+    """绘制一个类别：类别颜色的色块，左上角是序号，中间是类名，选中时加粗边框"""
+    ITEM_SIZE = QSize(120, 60)
+
+    def sizeHint(self, option, index):
+        return self.ITEM_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(1, 1, -1, -1)
+        color = index.data(Qt.BackgroundRole)
+        painter.fillRect(rect, color)
+        selected = bool(option.state & QStyle.State_Selected)
+        painter.setPen(QPen(Qt.black, 2) if selected else QPen(Qt.gray, 1))
+        painter.drawRect(rect)
+
+        painter.setPen(text_color_for(color))
+        text_rect = rect.adjusted(5, 5, -5, -5)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop, str(index.data(INDEX_ROLE)))
+        label = option.fontMetrics.elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignCenter, label)
+        painter.restore()
 
 
 class JSONEditor(QMainWindow):
@@ -89,73 +109,21 @@ class JSONEditor(QMainWindow):
         self.setWindowTitle("标注编辑器")
         self.setGeometry(1000, 100, 800, 600)
 
-        # 配置文件路径
-        self.config_file = "resource/config.json"
-
-        # 初始化数据
-        self.data = {
-            "open_default_dir": "C:/Users",
-            "classes": [
-                {
-                    "label": "Category1",
-                    "r": 255,
-                    "g": 0,
-                    "b": 0
-                },
-                {
-                    "label": "Category2",
-                    "r": 255,
-                    "g": 170,
-                    "b": 0
-                },
-                {
-                    "label": "Category3",
-                    "r": 169,
-                    "g": 255,
-                    "b": 0
-                },
-                {
-                    "label": "Category4",
-                    "r": 0,
-                    "g": 255,
-                    "b": 0
-                },
-                {
-                    "label": "Category5",
-                    "r": 0,
-                    "g": 255,
-                    "b": 170
-                },
-                {
-                    "label": "Category6",
-                    "r": 0,
-                    "g": 169,
-                    "b": 255
-                },
-                {
-                    "label": "Category7",
-                    "r": 0,
-                    "g": 0,
-                    "b": 255
-                },
-                {
-                    "label": "Category8",
-                    "r": 170,
-                    "g": 0,
-                    "b": 255
-                },
-                {
-                    "label": "Category9",
-                    "r": 255,
-                    "g": 0,
-                    "b": 169
-                }
-            ]
-        }
+        # 共享配置（与标注工具等窗口共用，修改后会通知它们）
+        self.store = config_store()
+        self.store.changed.connect(self.on_store_changed)
+        self.data = {}
 
         # 当前选中的标签索引
         self.current_selected = None
 
+        # 连续的修改合并为一次延迟保存，只写入本窗口修改过的配置项
+        self.dirty_keys = set()
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(300)
+        self.save_timer.timeout.connect(self.save_config)
+
         # 尝试加载现有配置
         self.load_config()
 
@@ -184,23 +152,37 @@ class JSONEditor(QMainWindow):
 
         main_layout.addLayout(dir_layout)
 
-        # 类标签部分
-        main_layout.addWidget(QLabel("类标签:"))
-
-        # 创建一个可滚动的区域来放置标签
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setFrameShape(QFrame.NoFrame)
-
-        self.labels_container = QWidget()
-        # 使用网格布局实现流式布局效果
-        self.labels_layout = QGridLayout(self.labels_container)
-        self.labels_layout.setSpacing(10)
-        self.labels_layout.setContentsMargins(5, 5, 5, 5)
-        self.labels_layout.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-
-        scroll.setWidget(self.labels_container)
-        main_layout.addWidget(scroll)
+        # 类标签部分（带搜索）
+        label_layout = QHBoxLayout()
+        label_layout.addWidget(QLabel("类标签:"))
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("按序号或类名搜索")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_changed)
+        label_layout.addWidget(self.search_edit)
+        main_layout.addLayout(label_layout)
+
+        # 虚拟化的类别列表：只绘制可见的类别
+        self.model = ClassListModel(self.data["classes"], self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterRole(FILTER_ROLE)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.list_view = QListView()
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSpacing(5)
+        self.list_view.setSelectionMode(QListView.SingleSelection)
+        self.list_view.setItemDelegate(ClassColorDelegate(self.list_view))
+        self.list_view.setModel(self.proxy)
+        self.list_view.selectionModel().currentChanged.connect(self.on_current_changed)
+        # 双击编辑功能
+        self.list_view.doubleClicked.connect(
+            lambda index: self.edit_class_by_index(self.proxy.mapToSource(index).row()))
+        main_layout.addWidget(self.list_view)
 
         # 按钮部分
         button_layout = QHBoxLayout()
@@ -228,62 +210,46 @@ class JSONEditor(QMainWindow):
         main_layout.addLayout(button_layout)
 
         set_svg_icon_from_string(self, get_config_svg_icon())
-        # 存储标签对象
-        self.label_widgets = {}
 
     def load_config(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    loaded_data = json.load(f)
-                    # 只更新我们关心的字段
-                    if "open_default_dir" in loaded_data:
-                        self.data["open_default_dir"] = loaded_data["open_default_dir"]
-                    if "classes" in loaded_data:
-                        self.data["classes"] = loaded_data["classes"]
-            except Exception as e:
-                print(f"加载配置文件失败: {e}")
+        self.data = {
+            "open_default_dir": self.store["open_default_dir"],
+            "classes": copy.deepcopy(self.store["classes"]),
+        }
 
     def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"保存配置文件失败: {e}")
+        """修改过的配置项写入共享配置，写盘由配置实例延迟合并"""
+        self.save_timer.stop()
+        keys, self.dirty_keys = self.dirty_keys, set()
+        self.store.update({key: self.data[key] for key in keys})
+
+    def schedule_save(self, key="classes"):
+        self.dirty_keys.add(key)
+        self.save_timer.start()
+
+    def on_store_changed(self, key):
+        """
+        其他窗口修改了配置（如类别映射生成器替换了类别、标注工具记下了打开的目录）时重新载入该项
+
+        本窗口其他项尚未写入的修改照常保存；只有本窗口也修改了同一项时才放弃本窗口的修改
+        """
+        if key not in self.data or self.store[key] == self.data[key]:
+            return
+        if key in self.dirty_keys:
+            self.dirty_keys.discard(key)
+            if not self.dirty_keys:
+                self.save_timer.stop()
+        self.data[key] = copy.deepcopy(self.store[key])
+        if key == "classes":
+            self.current_selected = None
+            self.update_ui()
+        else:
+            self.dir_edit.setText(self.data["open_default_dir"])
 
     def update_ui(self):
-        # 更新目录显示
+        """整体刷新（只在载入配置时使用，单个类别的修改只刷新对应的行）"""
         self.dir_edit.setText(self.data["open_default_dir"])
-
-        # 清除现有标签
-        for i in reversed(range(self.labels_layout.count())):
-            widget = self.labels_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        self.label_widgets.clear()
-
-        # 计算每行可以放多少个标签 (基于窗口宽度)
-        width = self.width()
-        cols = max(1, width // 140)  # 每个标签大约140像素宽
-
-        # 创建新标签
-        for i, class_data in enumerate(self.data["classes"]):
-            label = ColorLabel(i, class_data)
-            label.clicked.connect(lambda checked=False, idx=i: self.select_label(idx))
-
-            # 双击编辑功能
-            label.mouseDoubleClickEvent = lambda event, idx=i: self.edit_class_by_index(idx)
-
-            self.label_widgets[i] = label
-
-            # 计算位置
-            row = i // cols
-            col = i % cols
-            self.labels_layout.addWidget(label, row, col)
-
-        # 保存配置
-        self.save_config()
+        self.model.set_classes(self.data["classes"])
 
         # 如果没有选中任何标签，尝试选中第一个
         if self.current_selected is None and self.data["classes"]:
@@ -301,38 +267,47 @@ class JSONEditor(QMainWindow):
         directory = QFileDialog.getExistingDirectory(self, "选择默认目录", self.data["open_default_dir"])
         if directory:
             self.data["open_default_dir"] = directory
-            self.update_ui()
+            self.dir_edit.setText(directory)
+            self.schedule_save("open_default_dir")
 
-    def select_label(self, index):
-        # 取消之前选中的标签
-        if self.current_selected is not None and self.current_selected in self.label_widgets:
-            self.label_widgets[self.current_selected].selected = False
-            self.label_widgets[self.current_selected].update_selection()
+    def on_search_changed(self, text):
+        self.proxy.setFilterFixedString(text.strip())
+        if self.current_selected is not None:
+            self.list_view.scrollTo(self.proxy.mapFromSource(self.model.index(self.current_selected)))
+
+    def on_current_changed(self, current, _previous):
+        source = self.proxy.mapToSource(current)
+        self.current_selected = source.row() if source.isValid() else None
 
-        # 选中新的标签
-        if index in self.label_widgets:
-            self.current_selected = index
-            self.label_widgets[index].selected = True
-            self.label_widgets[index].update_selection()
+    def select_label(self, index):
+        """选中序号为index的类别并滚动到它（被搜索过滤掉时只记录序号）"""
+        self.current_selected = index
+        proxy_index = self.proxy.mapFromSource(self.model.index(index))
+        if proxy_index.isValid():
+            self.list_view.selectionModel().setCurrentIndex(proxy_index, QItemSelectionModel.ClearAndSelect)
+            self.list_view.scrollTo(proxy_index)
 
     def add_class(self):
         text, ok = QInputDialog.getText(self, '添加类', '输入类名:')
         if ok and text:
             # 新添加的类默认使用白色
-            new_class = {"label": text, "r": 255, "g": 255, "b": 255}
-            self.data["classes"].append(new_class)
-            self.update_ui()
+            row = self.model.append_class({"label": text, "r": 255, "g": 255, "b": 255})
             # 选中新添加的标签
-            self.select_label(len(self.data["classes"]) - 1)
+            self.select_label(row)
+            self.schedule_save()
 
     def remove_class(self):
         if self.current_selected is None:
             return
 
         if 0 <= self.current_selected < len(self.data["classes"]):
-            del self.data["classes"][self.current_selected]
+            row = self.current_selected
+            self.model.remove_class(row)
+            self.proxy.invalidateFilter()  # 后面类别的序号变了
             self.current_selected = None
-            self.update_ui()
+            if self.data["classes"]:
+                self.select_label(min(row, len(self.data["classes"]) - 1))
+            self.schedule_save()
 
     def edit_class(self):
         if self.current_selected is None:
@@ -346,49 +321,44 @@ class JSONEditor(QMainWindow):
             text, ok = QInputDialog.getText(self, '编辑类', '输入新类名(最好是英文):', text=old_data["label"])
             if ok and text and text != old_data["label"]:
                 self.data["classes"][index]["label"] = text
-                self.update_ui()
+                self.model.class_changed(index)
                 # 选中编辑后的标签
                 self.select_label(index)
+                self.schedule_save()
 
     def set_class_color(self):
         if self.current_selected is None:
             return
 
         if 0 <= self.current_selected < len(self.data["classes"]):
-            current_color = (
-                self.data["classes"][self.current_selected]["r"],
-                self.data["classes"][self.current_selected]["g"],
-                self.data["classes"][self.current_selected]["b"]
-            )
-            color = QColorDialog.getColor(QColor(*current_color), self, "选择颜色")
+            class_data = self.data["classes"][self.current_selected]
+            color = QColorDialog.getColor(QColor(class_data["r"], class_data["g"], class_data["b"]), self, "选择颜色")
             if color.isValid():
-                self.data["classes"][self.current_selected]["r"] = color.red()
-                self.data["classes"][self.current_selected]["g"] = color.green()
-                self.data["classes"][self.current_selected]["b"] = color.blue()
-                self.update_ui()
-                # 保持选中状态
-                self.select_label(self.current_selected)
+                class_data["r"] = color.red()
+                class_data["g"] = color.green()
+                class_data["b"] = color.blue()
+                self.model.class_changed(self.current_selected)
+                self.schedule_save()
 
     def format_colors(self):
         # 生成彩虹色
         colors = self.generate_rainbow_colors(len(self.data["classes"]))
 
         # 为每个类分配颜色
-        for i, class_data in enumerate(self.data["classes"]):
-            if i < len(colors):
-                class_data["r"] = colors[i][0]
-                class_data["g"] = colors[i][1]
-                class_data["b"] = colors[i][2]
-
-        self.update_ui()
-        # 保持当前选中状态
-        if self.current_selected is not None:
-            self.select_label(self.current_selected)
-
-    def resizeEvent(self, event):
-        # 窗口大小改变时重新布局
-        super().resizeEvent(event)
-        self.update_ui()
+        for class_data, (r, g, b) in zip(self.data["classes"], colors):
+            class_data["r"] = r
+            class_data["g"] = g
+            class_data["b"] = b
+
+        if self.data["classes"]:
+            self.model.class_changed(0, len(self.data["classes"]) - 1)
+            self.schedule_save()
+
+    def closeEvent(self, event):
+        # 关闭窗口时立即提交尚未保存的修改
+        if self.dirty_keys:
+            self.save_config()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
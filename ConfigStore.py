@@ -0,0 +1,142 @@
+import copy
+import json
+import locale
+import os
+
+from PyQt5.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+
+from LabelWriter import atomic_write_text
+
+CONFIG_PATH = os.path.join("resource", "config.json")
+SHORTCUTS_PATH = os.path.join("resource", "shortcuts.json")
+
+# 默认配置（配置文件中缺少的项用这里的值补齐）
+DEFAULT_CONFIG = {
+    "open_default_dir": "C:/Users",
+    "classes": [
+        {"label": "Category1", "r": 255, "g": 0, "b": 0},
+        {"label": "Category2", "r": 255, "g": 170, "b": 0},
+        {"label": "Category3", "r": 169, "g": 255, "b": 0},
+        {"label": "Category4", "r": 0, "g": 255, "b": 0},
+        {"label": "Category5", "r": 0, "g": 255, "b": 170},
+        {"label": "Category6", "r": 0, "g": 169, "b": 255},
+        {"label": "Category7", "r": 0, "g": 0, "b": 255},
+        {"label": "Category8", "r": 170, "g": 0, "b": 255},
+        {"label": "Category9", "r": 255, "g": 0, "b": 169},
+    ]
+}
+
+# 默认快捷键
+DEFAULT_SHORTCUTS = {
+    "open_btn": "Ctrl+O",
+    "prev_btn": "Left",
+    "next_btn": "Right",
+    "save_btn": "Ctrl+S",
+    "del_btn": "Ctrl+D",
+    "setting_btn": "Ctrl+I",
+    "class_combo": "Ctrl+Q",
+    "undo_btn": "Ctrl+Z",
+    "redo_btn": "Ctrl+Y",
+    "next_unlabeled_btn": "Ctrl+U",
+    "class_picker": "Ctrl+F",
+}
+
+
+class ConfigStore(QObject):
+    """
+    进程内共享的JSON配置文件
+
+    配置读入内存后各窗口共用同一个实例：修改后发出changed(键)信号通知所有打开的窗口，
+    写盘延迟save_delay_ms合并为一次，并以原子方式替换文件；程序退出时写入尚未保存的修改。
+    get返回的是内部对象，不要直接修改，修改请用set/update（保存的是传入值的副本）。
+    """
+    changed = pyqtSignal(str)
+
+    def __init__(self, path, defaults=None, save_delay_ms=500):
+        super().__init__()
+        self.path = path
+        self._data = copy.deepcopy(defaults or {})
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(save_delay_ms)
+        self._save_timer.timeout.connect(self.flush)
+        self._dirty = False
+
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            try:
+                text = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                text = raw.decode(locale.getpreferredencoding(False))  # 旧版本按系统编码写入的文件
+            self._data.update(json.loads(text))
+        except (FileNotFoundError, ValueError):
+            # 文件不存在或格式错误时写入默认配置
+            self.save_later()
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def as_dict(self):
+        """所有配置项的副本"""
+        return copy.deepcopy(self._data)
+
+    def set(self, key, value):
+        """修改一项配置，值没有变化时什么也不做"""
+        if key in self._data and self._data[key] == value:
+            return
+        self._data[key] = copy.deepcopy(value)
+        self.save_later()
+        self.changed.emit(key)
+
+    def update(self, values):
+        for key, value in values.items():
+            self.set(key, value)
+
+    def save_later(self):
+        """安排一次延迟写盘（期间的多次修改合并写入）"""
+        self._dirty = True
+        self._save_timer.start()
+
+    def flush(self):
+        """立即写入尚未保存的修改，写入失败返回False"""
+        self._save_timer.stop()
+        if not self._dirty:
+            return True
+        try:
+            atomic_write_text(self.path, json.dumps(self._data, indent=4, ensure_ascii=False))
+        except OSError as e:
+            print(f"保存配置文件失败: {self.path}, 错误: {str(e)}")
+            return False
+        self._dirty = False
+        return True
+
+
+_stores = {}
+
+
+def config_store():
+    """共享的 resource/config.json"""
+    if CONFIG_PATH not in _stores:
+        _stores[CONFIG_PATH] = ConfigStore(CONFIG_PATH, DEFAULT_CONFIG)
+    return _stores[CONFIG_PATH]
+
+
+def shortcuts_store():
+    """共享的 resource/shortcuts.json（缺少的快捷键使用默认值）"""
+    if SHORTCUTS_PATH not in _stores:
+        _stores[SHORTCUTS_PATH] = ConfigStore(SHORTCUTS_PATH, DEFAULT_SHORTCUTS)
+    return _stores[SHORTCUTS_PATH]
@@ -1,6 +1,4 @@
 import sys
-import cv2
-import numpy as np
 from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QFileDialog, QProgressBar,
@@ -8,6 +6,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
 from PyQt5.QtGui import QIntValidator, QColor
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from SvgRenderer import get_deal_svg_icon, set_svg_icon_from_string
+from BatchCore import resize_images
 
 
 class ImageProcessor(QThread):
@@ -24,87 +23,15 @@ class ImageProcessor(QThread):
         self._is_running = True
 
     def run(self):
-        if not self.input_folder.exists():
+        try:
+            processed_count, failed_count = resize_images(
+                self.input_folder, self.output_folder, self.target_size, self.padding_color, self.output_format,
+                progress=self.progress_updated.emit, should_stop=lambda: not self._is_running)
+        except FileNotFoundError:
             self.progress_updated.emit(0, "❌ 输入文件夹不存在")
             return
-
-        self.output_folder.mkdir(parents=True, exist_ok=True)
-
-        image_files = [f for f in self.input_folder.glob('*')
-                       if f.suffix.lower() in ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')]
-        total_files = len(image_files)
-        processed_count = 0
-        failed_count = 0
-
-        for idx, file_path in enumerate(image_files, 1):
-            if not self._is_running:
-                break
-
-            # 使用Path对象处理路径，避免编码问题
-            output_path = self.output_folder / file_path.stem
-            output_path = output_path.with_suffix(f'.{self.output_format.lower()}')
-
-            processed = self.resize_with_padding(file_path)
-            status = ""
-
-            if processed is not None:
-                try:
-                    # 使用cv2.imencode + 文件操作代替imwrite
-                    if self.output_format.lower() == 'jpg':
-                        success, buf = cv2.imencode('.jpg', processed, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
-                    elif self.output_format.lower() == 'png':
-                        success, buf = cv2.imencode('.png', processed, [int(cv2.IMWRITE_PNG_COMPRESSION), 3])
-                    else:
-                        success, buf = cv2.imencode(f'.{self.output_format.lower()}', processed)
-
-                    if success:
-                        # 使用二进制写入模式保存文件
-                        with open(str(output_path), 'wb') as f:
-                            f.write(buf.tobytes())
-                        processed_count += 1
-                        status = f"✅ 已处理: {file_path.name}"
-                    else:
-                        failed_count += 1
-                        status = f"❌ 编码失败: {file_path.name}"
-                except Exception as e:
-                    failed_count += 1
-                    status = f"❌ 保存失败: {file_path.name} ({str(e)})"
-            else:
-                failed_count += 1
-                status = f"❌ 处理失败: {file_path.name}"
-
-            progress = int((idx / total_files) * 100)
-            self.progress_updated.emit(progress, status)
-
         self.finished_processing.emit(processed_count, failed_count)
 
-    def resize_with_padding(self, image_path):
-        try:
-            with open(image_path, 'rb') as f:
-                img_bytes = np.frombuffer(f.read(), dtype=np.uint8)
-                image = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
-
-            if image is None:
-                return None
-
-            h, w = image.shape[:2]
-            target_w, target_h = self.target_size, self.target_size
-
-            scale = min(target_w / w, target_h / h)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-
-            resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.IMREAD_COLOR)
-            canvas = np.full((target_h, target_w, 3), self.padding_color, dtype=np.uint8)
-
-            x_offset = (target_w - new_w) // 2
-            y_offset = (target_h - new_h) // 2
-
-            canvas[y_offset:y_offset + new_h, x_offset:x_offset + new_w] = resized
-            return canvas
-        except Exception:
-            return None
-
     def stop(self):
         self._is_running = False
 
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from LabelWriter import atomic_write_text
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+INDEX_CACHE_DIR = os.path.join("resource", "cache", "index")
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def natural_sort_key(name):
+    """自然排序键：img2 排在 img10 前面"""
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS.split(name)]
+
+
+def _index_cache_path(dir_path, recursive):
+    key = hashlib.sha1(f"{os.path.abspath(dir_path)}|{recursive}".encode('utf-8')).hexdigest()
+    return os.path.join(INDEX_CACHE_DIR, f"{key}.json")
+
+
+def load_cached_index(dir_path, recursive=False):
+    """
+    读取持久化的文件夹索引
+
+    索引里记录了扫描时每个目录的修改时间，只要这些目录都没有增删文件就直接返回排好序的文件列表，
+    否则返回None
+    """
+    try:
+        with open(_index_cache_path(dir_path, recursive), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for rel_dir, mtime_ns in data["dirs"].items():
+            if os.stat(os.path.join(dir_path, rel_dir)).st_mtime_ns != mtime_ns:
+                return None
+        return data["files"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_cached_index(dir_path, recursive, files, dir_mtimes):
+    try:
+        atomic_write_text(_index_cache_path(dir_path, recursive), json.dumps({
+            "dir": os.path.abspath(dir_path),
+            "recursive": recursive,
+            "dirs": dir_mtimes,
+            "files": files,
+        }, ensure_ascii=False))
+    except OSError as e:
+        print(f"保存文件夹索引失败: {e}")
+
+
+class DirectoryIndexer(QThread):
+    """
+    用os.scandir流式扫描图片文件夹
+
+    找到第一张图片立即通过batch_found发出，之后按时间间隔分批发出（顺序为扫描顺序），
+    扫描结束后通过indexing_finished发出按自然顺序排好的完整列表，并持久化索引。
+    列表中为相对dir_path的路径。
+    """
+    batch_found = pyqtSignal(list)
+    indexing_finished = pyqtSignal(list)
+
+    def __init__(self, dir_path, recursive=False, batch_interval=0.2):
+        super().__init__()
+        self.dir_path = dir_path
+        self.recursive = recursive
+        self.batch_interval = batch_interval
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        files = []
+        batch = []
+        dir_mtimes = {}
+        last_emit = 0.0
+        stack = [""]
+
+        while stack and self._is_running:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(self.dir_path, rel_dir)
+            try:
+                dir_mtimes[rel_dir] = os.stat(abs_dir).st_mtime_ns
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        if not self._is_running:
+                            break
+                        name = entry.name
+                        if self.recursive and entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(rel_dir, name))
+                        elif name.lower().endswith(IMAGE_EXTENSIONS):
+                            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                            files.append(rel_path)
+                            batch.append(rel_path)
+
+                        # 第一张立即发出，之后按时间间隔批量发出
+                        now = time.monotonic()
+                        if batch and (len(files) == 1 or now - last_emit >= self.batch_interval):
+                            self.batch_found.emit(batch)
+                            batch = []
+                            last_emit = now
+            except OSError as e:
+                print(f"扫描文件夹失败: {abs_dir}, 错误: {str(e)}")
+
+        if not self._is_running:
+            return
+        if batch:
+            self.batch_found.emit(batch)
+
+        files.sort(key=natural_sort_key)
+        save_cached_index(self.dir_path, self.recursive, files, dir_mtimes)
+        self.indexing_finished.emit(files)
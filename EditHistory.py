@@ -0,0 +1,157 @@
+from collections import OrderedDict, deque
+
+# 编辑命令（紧凑元组，rect为 (x1, y1, x2, y2)）:
+#   ("add", index, class_id, rect)          在index处添加框
+#   ("delete", index, class_id, rect)       删除index处的框
+#   ("move", index, old_rect, new_rect)     移动或调整框
+#   ("class", index, old_class, new_class)  修改框的类别
+
+
+def apply_command(store, command, reverse=False):
+    """在BoxStore上执行命令，reverse为True时执行它的逆操作"""
+    kind, index, a, b = command
+    if kind == "add":
+        if reverse:
+            store.pop(index)
+        else:
+            store.insert(index, a, b)
+    elif kind == "delete":
+        if reverse:
+            store.insert(index, a, b)
+        else:
+            store.pop(index)
+    elif kind == "move":
+        store.set_rect(index, a if reverse else b)
+    elif kind == "class":
+        store.set_class(index, a if reverse else b)
+    else:
+        raise ValueError(f"未知的编辑命令: {kind}")
+
+
+def invert_command(command):
+    """返回与command效果相反的命令（撤销写入预写日志时使用）"""
+    kind, index, a, b = command
+    if kind == "add":
+        return "delete", index, a, b
+    if kind == "delete":
+        return "add", index, a, b
+    return kind, index, b, a
+
+
+class _ImageHistory:
+    __slots__ = ("undo", "redo")
+
+    def __init__(self):
+        self.undo = deque()
+        self.redo = []
+
+
+class EditHistory:
+    """
+    按图片记录的撤销/重做历史
+
+    每张图片（以标注文件路径为键）各有一个撤销栈和重做栈，保存的是编辑命令而不是快照；
+    整个会话的命令总数不超过max_commands，超出时先丢弃最久没访问的图片的最早命令。
+    同时缓存最近访问的图片的BoxStore（总框数不超过max_cached_boxes），
+    回到这些图片时不需要重新读标注文件，撤销/重做直接在缓存上进行。
+    """
+
+    def __init__(self, max_commands=20000, max_cached_boxes=500000):
+        self.max_commands = max_commands
+        self.max_cached_boxes = max_cached_boxes
+        self._histories = OrderedDict()  # 键 -> _ImageHistory，按最近访问排序
+        self._command_count = 0
+        self._stores = OrderedDict()  # 键 -> BoxStore，按最近访问排序
+
+    def record(self, key, command):
+        """记录一条已执行的命令，并清空该图片的重做栈"""
+        history = self._touch(key)
+        self._command_count -= len(history.redo)
+        history.redo.clear()
+        history.undo.append(command)
+        self._command_count += 1
+        self._enforce_limit(key)
+
+    def undo(self, key, store):
+        """撤销该图片的最后一条命令，返回被撤销的命令，没有可撤销的返回None"""
+        history = self._histories.get(key)
+        if history is None or not history.undo:
+            return None
+        command = history.undo.pop()
+        apply_command(store, command, reverse=True)
+        history.redo.append(command)
+        return command
+
+    def redo(self, key, store):
+        """重做该图片最后撤销的命令，返回该命令，没有可重做的返回None"""
+        history = self._histories.get(key)
+        if history is None or not history.redo:
+            return None
+        command = history.redo.pop()
+        apply_command(store, command)
+        history.undo.append(command)
+        return command
+
+    def peek_undo(self, key):
+        """下一次撤销将会撤销的命令，没有返回None"""
+        history = self._histories.get(key)
+        return history.undo[-1] if history is not None and history.undo else None
+
+    def peek_redo(self, key):
+        """下一次重做将会执行的命令，没有返回None"""
+        history = self._histories.get(key)
+        return history.redo[-1] if history is not None and history.redo else None
+
+    def can_undo(self, key):
+        history = self._histories.get(key)
+        return history is not None and bool(history.undo)
+
+    def can_redo(self, key):
+        history = self._histories.get(key)
+        return history is not None and bool(history.redo)
+
+    def command_count(self):
+        return self._command_count
+
+    def cached_store(self, key):
+        """取缓存的BoxStore，没有则返回None"""
+        store = self._stores.get(key)
+        if store is not None:
+            self._stores.move_to_end(key)
+        return store
+
+    def cache_store(self, key, store):
+        """
+        缓存BoxStore（之后的编辑直接修改这个对象，不需要再次缓存）
+
+        被淘汰的图片保留撤销历史：离开图片时标注已保存，重新读取文件得到的框与缓存中一致
+        """
+        self._stores[key] = store
+        self._stores.move_to_end(key)
+        total = sum(len(s) for s in self._stores.values())
+        while total > self.max_cached_boxes and len(self._stores) > 1:
+            _, evicted = self._stores.popitem(last=False)
+            total -= len(evicted)
+
+    def _touch(self, key):
+        history = self._histories.get(key)
+        if history is None:
+            history = self._histories[key] = _ImageHistory()
+        else:
+            self._histories.move_to_end(key)
+        return history
+
+    def _enforce_limit(self, current_key):
+        """命令总数超出上限时，从最久没访问的图片开始丢弃最早的命令"""
+        while self._command_count > self.max_commands and self._histories:
+            key, history = next(iter(self._histories.items()))
+            if key == current_key and len(self._histories) > 1:
+                self._histories.move_to_end(key)
+                continue
+            if history.undo:
+                history.undo.popleft()
+            elif history.redo:
+                history.redo.pop(0)
+            self._command_count -= 1
+            if not history.undo and not history.redo and key != current_key:
+                del self._histories[key]
@@ -0,0 +1,146 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QDockWidget, QTableView, QAbstractItemView, QHeaderView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QColor
+
+from ThumbnailCache import ThumbnailCache
+
+
+class ThumbnailStripModel(QAbstractTableModel):
+    """
+    胶片栏模型：一行，每张图片一列
+
+    只保存相对路径列表，缩略图在视图第一次请求某一列的图标时才向ThumbnailCache申请，
+    生成完成后通过dataChanged刷新该列；内存中只保留最近使用的max_pixmaps张缩略图。
+    """
+    thumbnail_ready = pyqtSignal(str, bytes)  # 由缩略图线程发出，排队回到界面线程
+
+    def __init__(self, thumbnail_size=96, max_pixmaps=1000, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = thumbnail_size
+        self.max_pixmaps = max_pixmaps
+        self._root = ""
+        self._files = []
+        self._requested = {}  # 已申请缩略图的绝对路径 -> 列号
+        self._pixmaps = OrderedDict()  # 绝对路径 -> QPixmap
+        self._placeholder = QPixmap(thumbnail_size, thumbnail_size)
+        self._placeholder.fill(QColor(60, 60, 60))
+        self.thumbnail_ready.connect(self.on_thumbnail_ready, Qt.QueuedConnection)
+        self.thumbnails = ThumbnailCache(size=thumbnail_size, on_ready=self.thumbnail_ready.emit)
+
+    def set_files(self, root, files):
+        """替换整个列表"""
+        self.beginResetModel()
+        self._root = root
+        self._files = list(files)
+        self._requested.clear()
+        self._pixmaps.clear()
+        self.endResetModel()
+
+    def append_files(self, files):
+        """在末尾追加（扫描过程中分批到达的图片）"""
+        if not files:
+            return
+        start = len(self._files)
+        self.beginInsertColumns(QModelIndex(), start, start + len(files) - 1)
+        self._files.extend(files)
+        self.endInsertColumns()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._files)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        rel_path = self._files[column]
+        if role == Qt.ToolTipRole:
+            return f"#{column + 1} {rel_path}"
+        if role == Qt.DecorationRole:
+            path = os.path.join(self._root, rel_path)
+            pixmap = self._pixmaps.get(path)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(path)
+                return pixmap
+            self._requested[path] = column
+            for dropped in self.thumbnails.request(path):
+                # 被丢弃的请求不会再有回调，再次显示该列时重新申请
+                self._requested.pop(dropped, None)
+            return self._placeholder
+        return None
+
+    def on_thumbnail_ready(self, path, data):
+        column = self._requested.pop(path, None)
+        if column is None:
+            return  # 已经切换了文件夹
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data):
+            return
+        self._pixmaps[path] = pixmap
+        while len(self._pixmaps) > self.max_pixmaps:
+            self._pixmaps.popitem(last=False)
+        index = self.index(0, column)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def close(self):
+        self.thumbnails.close()
+
+
+class FilmstripDock(QDockWidget):
+    """
+    缩略图胶片栏
+
+    单行QTableView：列宽固定，布局与图片数量无关，只有可见的列会被绘制和请求缩略图，
+    点击缩略图时发出image_activated(序号)
+    """
+    image_activated = pyqtSignal(int)
+
+    def __init__(self, thumbnail_size=96, parent=None):
+        super().__init__("缩略图", parent)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetClosable)
+
+        cell_size = thumbnail_size + 8
+        self.model = ThumbnailStripModel(thumbnail_size, parent=self)
+        self.view = QTableView()
+        self.view.horizontalHeader().hide()
+        self.view.verticalHeader().hide()
+        # 固定列宽，10万张图片也不需要逐列计算布局
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.horizontalHeader().setDefaultSectionSize(cell_size)
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(cell_size)
+        self.view.setShowGrid(False)
+        self.view.setIconSize(QSize(thumbnail_size, thumbnail_size))
+        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.view.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # 不接收键盘焦点，点击缩略图后左右键仍由主窗口用来翻页
+        self.view.setFocusPolicy(Qt.NoFocus)
+        self.view.setFixedHeight(cell_size + self.view.horizontalScrollBar().sizeHint().height() + 4)
+        self.view.setModel(self.model)
+        self.view.clicked.connect(lambda index: self.image_activated.emit(index.column()))
+        self.view.activated.connect(lambda index: self.image_activated.emit(index.column()))
+        self.setWidget(self.view)
+
+    def set_files(self, root, files):
+        self.model.set_files(root, files)
+
+    def append_files(self, files):
+        self.model.append_files(files)
+
+    def set_current(self, column):
+        """选中并滚动到当前图片（不发出image_activated）"""
+        index = self.model.index(0, column)
+        if index.isValid():
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+
+    def close_cache(self):
+        self.model.close()
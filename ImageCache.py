@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+def imread_unicode(image_path, flags=cv2.IMREAD_COLOR):
+    """读取图片（解决中文路径问题），解码失败时返回None"""
+    with open(image_path, 'rb') as f:
+        img_bytes = np.frombuffer(f.read(), dtype=np.uint8)
+    return cv2.imdecode(img_bytes, flags)
+
+
+# JPEG解码时按1/2、1/4、1/8缩小的读取标志（libjpeg在DCT阶段缩小，比完整解码快得多）
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def imread_reduced(image_path, factor):
+    """按1/factor缩小解码图片，factor为2、4或8"""
+    return imread_unicode(image_path, REDUCED_DECODE_FLAGS[factor])
+
+
+class DecodedImageCache:
+    """按字节数限制容量的LRU解码帧缓存（线程安全）"""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.pending_hits = 0  # 缓存中还没有，但等到了正在进行的预取
+        self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key, count_miss=True):
+        """取出缓存的帧并更新命中统计，未命中返回None（count_miss为False时未命中由调用者用record_*统计）"""
+        with self._lock:
+            image = self._items.get(key)
+            if image is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def record_pending_hit(self):
+        with self._lock:
+            self.pending_hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key, image):
+        """放入一帧，超出容量时淘汰最久未使用的帧；单帧超过总容量时不缓存"""
+        if image is None or image.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._items[key] = image
+            self._bytes += image.nbytes
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def discard(self, key):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """返回缓存统计: 命中数、等到预取的次数、未命中数、命中率（含等到预取）、帧数、占用字节数"""
+        with self._lock:
+            total = self.hits + self.pending_hits + self.misses
+            return {
+                'hits': self.hits,
+                'pending_hits': self.pending_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.pending_hits) / total if total else 0.0,
+                'count': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class ImagePrefetcher:
+    """用线程池在后台预解码当前图片前后若干张，结果放入DecodedImageCache"""
+
+    def __init__(self, cache=None, ahead=3, behind=1, workers=2, decoder=imread_unicode):
+        self.cache = cache if cache is not None else DecodedImageCache()
+        self.ahead = ahead
+        self.behind = behind
+        self.decoder = decoder
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._pending = {}  # 路径 -> Future
+        self._lock = threading.Lock()
+        self._generation = 0  # invalidate后加一，之前提交的解码结果不再放入缓存
+
+    def _decode_into_cache(self, image_path, generation):
+        image = None
+        try:
+            image = self.decoder(image_path)
+            return image
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    self.cache.put(image_path, image)
+                    self._pending.pop(image_path, None)
+
+    def request(self, image_path):
+        """异步请求解码一张图片（已在预取中的复用同一任务），返回Future"""
+        with self._lock:
+            future = self._pending.get(image_path)
+            if future is None or future.cancelled():
+                future = self._executor.submit(self._decode_into_cache, image_path, self._generation)
+                self._pending[image_path] = future
+            return future
+
+    def is_ready(self, image_path):
+        """是否已在缓存中或正在解码（此时load无需在当前线程完整解码）"""
+        with self._lock:
+            if image_path in self._pending:
+                return True
+        return image_path in self.cache
+
+    def load(self, image_path):
+        """获取解码后的帧：优先从缓存取，正在预取的等待其完成，否则在当前线程解码"""
+        image = self.cache.get(image_path, count_miss=False)
+        if image is not None:
+            return image
+
+        with self._lock:
+            future = self._pending.get(image_path)
+        if future is not None and not future.cancelled():
+            image = future.result()
+            if image is not None:
+                self.cache.record_pending_hit()
+                return image
+
+        self.cache.record_miss()
+        image = self.decoder(image_path)
+        self.cache.put(image_path, image)
+        return image
+
+    def prefetch(self, path_at, count, index):
+        """
+        以index为中心预取后ahead张、前behind张图片，窗口外（当前图片除外）尚未开始的任务会被取消
+
+        参数:
+            path_at: 根据序号返回图片路径的函数
+            count: 图片总数
+            index: 当前图片序号
+        """
+        wanted = []
+        for offset in range(1, self.ahead + 1):
+            if index + offset < count:
+                wanted.append(path_at(index + offset))
+        for offset in range(1, self.behind + 1):
+            if index - offset >= 0:
+                wanted.append(path_at(index - offset))
+
+        keep = set(wanted)
+        keep.add(path_at(index))
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in keep and future.cancel():
+                    del self._pending[path]
+
+            for path in wanted:
+                if path in self._pending or path in self.cache:
+                    continue
+                self._pending[path] = self._executor.submit(self._decode_into_cache, path, self._generation)
+
+    def invalidate(self):
+        """图片文件被改写后调用：取消尚未开始的预取并清空缓存"""
+        with self._lock:
+            self._generation += 1
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
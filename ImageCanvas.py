@@ -0,0 +1,476 @@
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QRect, QRectF, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor
+
+from TilePyramid import TilePyramid
+from BoxStore import BoxStore
+
+
+def bgr_to_qcolor(color):
+    """OpenCV的BGR颜色元组转换为QColor"""
+    b, g, r = color[:3]
+    return QColor(int(r), int(g), int(b))
+
+
+def ndarray_to_qimage(image):
+    """BGR格式的np.ndarray转换为QImage（拷贝数据，避免引用被释放的内存）"""
+    h, w, ch = image.shape
+    bytes_per_line = ch * w
+    return QImage(image.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
+
+
+class ImageCanvas(QWidget):
+    """
+    分层绘制的标注画布
+
+    图层:
+        底图层: 适应窗口时为按控件大小缩放一次后缓存的QPixmap，只在换图或控件大小变化时重建；
+                放大后改为从金字塔中取当前级别的可见瓦片绘制，瓦片QPixmap缓存在有容量上限的LRU中
+        标注层: 已提交的标注框，绘制在控件大小的透明QPixmap上，只在标注框变化或缩放/平移时重建
+        覆盖层: 正在拖拽的框和选中的框（带调整手柄），直接在paintEvent中绘制，只刷新它们所在的区域；
+                选中的框不画在标注层里，移动/调整选中框时不需要重建标注层
+
+    操作: 滚轮以光标为中心缩放，中键拖动平移，中键双击还原为适应窗口
+    """
+
+    pyramid_level_ready = pyqtSignal()
+    frame_painted = pyqtSignal(float)  # 每次绘制的耗时（毫秒）
+
+    TILE_CACHE_BYTES = 256 * 1024 * 1024
+    MAX_PIXEL_ZOOM = 8  # 最大放大到1个原图像素占8个屏幕像素
+    HANDLE_SIZE = 6  # 选中框调整手柄的半径（屏幕像素）
+    HANDLES = ('tl', 't', 'tr', 'r', 'br', 'b', 'bl', 'l')  # 手柄名中的字母表示它移动的边
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(320, 240)
+        self.setToolTip("滚轮缩放，中键拖动平移，中键双击还原")
+
+        # 底图层（原始帧 + 按控件大小缩放后的显示缓存）
+        self._frame = None
+        self._base_pixmap = None
+        self._base_dirty = False
+        self._fit_size = (0, 0)
+        self.image_w = 0
+        self.image_h = 0
+
+        # 放大后的瓦片金字塔和瓦片缓存
+        self._pyramid = None
+        self._tile_cache = OrderedDict()  # (级别, tx, ty) -> QPixmap
+        self._tile_bytes = 0
+        self.pyramid_level_ready.connect(self.update)
+
+        # 标注层
+        self._boxes = BoxStore()
+        self._classes = []
+        self._colors = []
+        self._boxes_layer = None
+        self._boxes_dirty = True
+
+        # 覆盖层（图片坐标）
+        self._drag_rect = None
+        self._drag_color = QColor(255, 255, 255)
+        self._selected = None  # 选中框的下标
+        self._selected_rect = None  # 选中框当前的位置（移动/调整中与标注列表不同）
+
+        # 坐标转换参数（控件坐标 = 图片坐标 * scale + offset）
+        self.zoom = 1.0  # 相对适应窗口的放大倍数
+        self._fit_scale = 1.0
+        self.scale = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.scaled_w = 0
+        self.scaled_h = 0
+        self._pan_origin = None
+
+    def sizeHint(self):
+        return QSize(800, 600)
+
+    def set_palette(self, classes, colors):
+        """设置类别名称和颜色（颜色为BGR元组）"""
+        self._classes = list(classes)
+        self._colors = [bgr_to_qcolor(c) for c in colors]
+        self._boxes_dirty = True
+        self.update()
+
+    def set_image(self, image, image_size=None, keep_view=False):
+        """
+        设置底图（BGR格式的np.ndarray），为None时清空画布；显示缓存在下次绘制时按控件大小重建
+
+        参数:
+            image_size: 原图尺寸 (宽, 高)，image为缩小解码的预览帧时传入，坐标仍按原图计算
+            keep_view: 为True时保持当前缩放和平移（同一张图从预览帧换成完整帧时使用）
+        """
+        self._frame = image
+        self._base_pixmap = None
+        self._reset_pyramid()
+        if image is None:
+            self.image_w = 0
+            self.image_h = 0
+        elif image_size is not None:
+            self.image_w, self.image_h = image_size
+        else:
+            self.image_h, self.image_w = image.shape[:2]
+        if not keep_view:
+            self._drag_rect = None
+            self.zoom = 1.0
+        self._update_transform()
+        if self.zoom > 1.0:
+            self._ensure_pyramid()
+        self.update()
+
+    def set_boxes(self, boxes):
+        """设置已提交的标注框（BoxStore），标注层在下次绘制时重建"""
+        self._boxes = boxes
+        if self._selected is not None:
+            if self._selected < len(boxes):
+                self._selected_rect = tuple(boxes[self._selected][1:5])
+            else:
+                self._selected = None
+                self._selected_rect = None
+        self._boxes_dirty = True
+        self.update()
+
+    def set_selection(self, index):
+        """选中下标为index的框，为None时取消选中"""
+        if index is not None and not 0 <= index < len(self._boxes):
+            index = None
+        if index == self._selected:
+            return
+        self._selected = index
+        self._selected_rect = None if index is None else tuple(self._boxes[index][1:5])
+        self._boxes_dirty = True
+        self.update()
+
+    def move_selection(self, rect):
+        """移动/调整中更新选中框的显示位置（图片坐标），只刷新覆盖层"""
+        old_rect = self._selected_rect
+        self._selected_rect = rect
+        # 刷新区域要包含框上方的类别文字
+        class_id = self._boxes[self._selected][0]
+        text = self._classes[class_id] if 0 <= class_id < len(self._classes) else ""
+        metrics = self.fontMetrics()
+        self._update_overlay(old_rect, rect, self.HANDLE_SIZE + 3,
+                             metrics.height() + 5, metrics.horizontalAdvance(text))
+
+    def handle_at(self, pos):
+        """返回控件坐标pos处选中框的调整手柄名称，没有则返回None"""
+        rect = self._widget_rect(self._selected_rect)
+        if rect is None:
+            return None
+        for name, point in zip(self.HANDLES, self._handle_points(rect)):
+            if abs(pos.x() - point[0]) <= self.HANDLE_SIZE and abs(pos.y() - point[1]) <= self.HANDLE_SIZE:
+                return name
+        return None
+
+    def set_drag_rect(self, rect, class_id=None):
+        """设置正在拖拽的框（图片坐标 x1, y1, x2, y2），为None时清除；只刷新新旧框覆盖的区域"""
+        old_rect = self._drag_rect
+        self._drag_rect = rect
+        if class_id is not None and 0 <= class_id < len(self._colors):
+            self._drag_color = self._colors[class_id]
+        self._update_overlay(old_rect, rect, 3)
+
+    def _update_overlay(self, old_rect, new_rect, margin, text_height=0, text_width=0):
+        """覆盖层中的框从old_rect变为new_rect时，只刷新两者覆盖的区域（含框上方的文字）"""
+        dirty = self._widget_rect(old_rect)
+        new_rect = self._widget_rect(new_rect)
+        if dirty is None:
+            dirty = new_rect
+        elif new_rect is not None:
+            dirty = dirty.united(new_rect)
+        if dirty is not None:
+            self.update(dirty.adjusted(-margin, -margin - text_height, margin + text_width, margin))
+
+    def widget_to_image(self, pos):
+        """控件坐标转图片坐标，不在图片范围内时返回None"""
+        if self._frame is None or self.scale <= 0:
+            return None
+        x, y = pos.x(), pos.y()
+        if not (self.offset_x <= x <= self.offset_x + self.scaled_w and
+                self.offset_y <= y <= self.offset_y + self.scaled_h):
+            return None
+        img_x = (x - self.offset_x) / self.scale
+        img_y = (y - self.offset_y) / self.scale
+        img_x = max(0, min(img_x, self.image_w))
+        img_y = max(0, min(img_y, self.image_h))
+        return img_x, img_y
+
+    def zoom_at(self, pos, factor):
+        """以控件坐标pos为中心缩放，zoom不小于1（适应窗口）"""
+        if self._frame is None:
+            return
+        max_zoom = max(1.0, self.MAX_PIXEL_ZOOM / self._fit_scale)
+        new_zoom = min(max(self.zoom * factor, 1.0), max_zoom)
+        if new_zoom == self.zoom:
+            return
+
+        # 保持光标下的图片点不动
+        img_x = (pos.x() - self.offset_x) / self.scale
+        img_y = (pos.y() - self.offset_y) / self.scale
+        self.zoom = new_zoom
+        new_scale = self._fit_scale * new_zoom
+        self.offset_x = pos.x() - img_x * new_scale
+        self.offset_y = pos.y() - img_y * new_scale
+        self._update_transform()
+        if self.zoom > 1.0:
+            self._ensure_pyramid()
+        self.update()
+
+    def pan_by(self, dx, dy):
+        """放大状态下平移视图"""
+        if self.zoom <= 1.0:
+            return
+        self.offset_x += dx
+        self.offset_y += dy
+        self._update_transform()
+        self.update()
+
+    def reset_view(self):
+        """还原为适应窗口"""
+        self.zoom = 1.0
+        self._update_transform()
+        self.update()
+
+    def _reset_pyramid(self):
+        if self._pyramid is not None:
+            self._pyramid.stop()
+        self._pyramid = None
+        self._tile_cache.clear()
+        self._tile_bytes = 0
+
+    def _ensure_pyramid(self):
+        """第一次放大时才开始在后台构建金字塔"""
+        if self._pyramid is None and self._frame is not None:
+            self._pyramid = TilePyramid(self._frame, (self.image_w, self.image_h),
+                                        on_level_ready=self.pyramid_level_ready.emit)
+            self._pyramid.start()
+
+    def _tile_pixmap(self, level_index, level, tx, ty):
+        """取瓦片的QPixmap，缓存超过容量时淘汰最久未使用的瓦片"""
+        key = (level_index, tx, ty)
+        pixmap = self._tile_cache.get(key)
+        if pixmap is not None:
+            self._tile_cache.move_to_end(key)
+            return pixmap
+
+        tile = np.ascontiguousarray(self._pyramid.tile(level, tx, ty))
+        pixmap = QPixmap.fromImage(ndarray_to_qimage(tile))
+        self._tile_cache[key] = pixmap
+        self._tile_bytes += pixmap.width() * pixmap.height() * 4
+        while self._tile_bytes > self.TILE_CACHE_BYTES and len(self._tile_cache) > 1:
+            _, evicted = self._tile_cache.popitem(last=False)
+            self._tile_bytes -= evicted.width() * evicted.height() * 4
+        return pixmap
+
+    def _widget_rect(self, rect):
+        """图片坐标的框转换为控件坐标的QRect"""
+        if rect is None:
+            return None
+        x1, y1, x2, y2 = rect
+        left = min(x1, x2) * self.scale + self.offset_x
+        top = min(y1, y2) * self.scale + self.offset_y
+        right = max(x1, x2) * self.scale + self.offset_x
+        bottom = max(y1, y2) * self.scale + self.offset_y
+        return QRect(int(left), int(top), int(right - left) + 1, int(bottom - top) + 1)
+
+    @staticmethod
+    def _handle_points(rect):
+        """按HANDLES的顺序返回控件坐标框的各手柄中心"""
+        left, top, right, bottom = rect.left(), rect.top(), rect.right(), rect.bottom()
+        cx, cy = (left + right) // 2, (top + bottom) // 2
+        return ((left, top), (cx, top), (right, top), (right, cy),
+                (right, bottom), (cx, bottom), (left, bottom), (left, cy))
+
+    def _color_of(self, class_id):
+        return self._colors[class_id] if 0 <= class_id < len(self._colors) else QColor(255, 255, 255)
+
+    def _update_transform(self):
+        """根据控件大小和缩放倍数计算显示缓存尺寸和坐标转换参数"""
+        if self.image_w > 0 and self.image_h > 0:
+            fit = min(self.width() / self.image_w, self.height() / self.image_h)
+            fit_size = (max(1, int(round(self.image_w * fit))), max(1, int(round(self.image_h * fit))))
+            if fit_size != self._fit_size or self._base_pixmap is None:
+                self._base_dirty = True
+            self._fit_size = fit_size
+            self._fit_scale = fit_size[0] / self.image_w
+
+            if self.zoom <= 1.0:
+                self.zoom = 1.0
+                self.scaled_w, self.scaled_h = fit_size
+                self.scale = self._fit_scale
+                self.offset_x = (self.width() - self.scaled_w) // 2
+                self.offset_y = (self.height() - self.scaled_h) // 2
+            else:
+                self.scale = self._fit_scale * self.zoom
+                self.scaled_w = self.image_w * self.scale
+                self.scaled_h = self.image_h * self.scale
+                self.offset_x = self._clamp_offset(self.offset_x, self.scaled_w, self.width())
+                self.offset_y = self._clamp_offset(self.offset_y, self.scaled_h, self.height())
+        else:
+            self._base_pixmap = None
+            self._base_dirty = False
+            self._fit_size = (0, 0)
+            self.zoom = 1.0
+            self.scale = 1.0
+            self.offset_x = 0
+            self.offset_y = 0
+            self.scaled_w = 0
+            self.scaled_h = 0
+        self._boxes_dirty = True
+
+    @staticmethod
+    def _clamp_offset(offset, scaled, view):
+        """图片比视图小时居中，否则不允许露出图片外的空白"""
+        if scaled <= view:
+            return (view - scaled) / 2
+        return min(0.0, max(view - scaled, offset))
+
+    def _rebuild_base(self):
+        """把原始帧缩放到适应窗口的尺寸并缓存，之后的绘制不再缩放"""
+        self._base_dirty = False
+        fit_w, fit_h = self._fit_size
+        if self._frame is None or fit_w <= 0 or fit_h <= 0:
+            self._base_pixmap = None
+            return
+        frame_h, frame_w = self._frame.shape[:2]
+        if (fit_w, fit_h) == (frame_w, frame_h):
+            display = self._frame
+        else:
+            # 缩小用INTER_AREA避免摩尔纹，放大用INTER_LINEAR
+            interpolation = cv2.INTER_AREA if fit_w < frame_w else cv2.INTER_LINEAR
+            display = cv2.resize(self._frame, (fit_w, fit_h), interpolation=interpolation)
+        self._base_pixmap = QPixmap.fromImage(ndarray_to_qimage(display))
+
+    def _rebuild_boxes_layer(self):
+        """重建标注层（只绘制与控件相交的框，裁剪由BoxStore向量化完成）"""
+        self._boxes_dirty = False
+        if self.width() <= 0 or self.height() <= 0 or self.scale <= 0:
+            self._boxes_layer = None
+            return
+
+        layer = QPixmap(self.size())
+        layer.fill(Qt.transparent)
+        painter = QPainter(layer)
+        visible = self._boxes.intersecting(-self.offset_x / self.scale, -self.offset_y / self.scale,
+                                           (self.width() - self.offset_x) / self.scale,
+                                           (self.height() - self.offset_y) / self.scale)
+        classes = self._boxes.classes[visible].tolist()
+        coords = self._boxes.coords[visible].tolist()
+        for i, class_id, rect in zip(visible.tolist(), classes, coords):
+            if i == self._selected:
+                continue  # 选中的框画在覆盖层
+            rect = self._widget_rect(rect)
+            painter.setPen(QPen(self._color_of(class_id), 2))
+            painter.drawRect(rect)
+            if 0 <= class_id < len(self._classes):
+                painter.drawText(rect.left(), rect.top() - 5, self._classes[class_id])
+        painter.end()
+        self._boxes_layer = layer
+
+    def _paint_tiles(self, painter, region):
+        """放大状态下只绘制region内可见的瓦片"""
+        level_index, level, fx, fy = self._pyramid.best_level(self.scale)
+        x0 = (region.left() - self.offset_x) / self.scale / fx
+        y0 = (region.top() - self.offset_y) / self.scale / fy
+        x1 = (region.right() + 1 - self.offset_x) / self.scale / fx
+        y1 = (region.bottom() + 1 - self.offset_y) / self.scale / fy
+        tx0, ty0, tx1, ty1 = self._pyramid.tile_range(level, x0, y0, x1, y1)
+
+        t = self._pyramid.tile_size
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        for ty in range(ty0, ty1):
+            for tx in range(tx0, tx1):
+                pixmap = self._tile_pixmap(level_index, level, tx, ty)
+                target = QRectF(self.offset_x + tx * t * fx * self.scale,
+                                self.offset_y + ty * t * fy * self.scale,
+                                pixmap.width() * fx * self.scale,
+                                pixmap.height() * fy * self.scale)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+    def _paint_selection(self, painter):
+        """绘制选中的框和它的调整手柄"""
+        class_id = self._boxes[self._selected][0]
+        rect = self._widget_rect(self._selected_rect)
+        painter.setPen(QPen(self._color_of(class_id), 3))
+        painter.drawRect(rect)
+        if 0 <= class_id < len(self._classes):
+            painter.drawText(rect.left(), rect.top() - 5, self._classes[class_id])
+        painter.setPen(QPen(Qt.black, 1))
+        h = self.HANDLE_SIZE // 2
+        for x, y in self._handle_points(rect):
+            painter.fillRect(x - h, y - h, 2 * h, 2 * h, Qt.white)
+            painter.drawRect(x - h, y - h, 2 * h, 2 * h)
+
+    def resizeEvent(self, event):
+        self._update_transform()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom_at(event.pos(), 1.25 ** steps)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self._pan_origin = event.pos()
+            event.accept()
+        else:
+            super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._pan_origin is not None:
+            delta = event.pos() - self._pan_origin
+            self._pan_origin = event.pos()
+            self.pan_by(delta.x(), delta.y())
+            event.accept()
+        else:
+            super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self._pan_origin = None
+            event.accept()
+        else:
+            super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self.reset_view()
+            event.accept()
+        else:
+            super().mouseDoubleClickEvent(event)
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), Qt.black)
+        if self._frame is not None:
+            if self.zoom > 1.0 and self._pyramid is not None:
+                self._paint_tiles(painter, event.rect())
+            else:
+                if self._base_dirty:
+                    self._rebuild_base()
+                if self._base_pixmap is not None:
+                    painter.drawPixmap(self.offset_x, self.offset_y, self._base_pixmap)
+
+            if self._boxes_dirty:
+                self._rebuild_boxes_layer()
+            if self._boxes_layer is not None:
+                painter.drawPixmap(0, 0, self._boxes_layer)
+
+            if self._selected_rect is not None:
+                self._paint_selection(painter)
+            if self._drag_rect is not None:
+                painter.setPen(QPen(self._drag_color, 2))
+                painter.drawRect(self._widget_rect(self._drag_rect))
+        painter.end()
+        self.frame_painted.emit((time.perf_counter() - start) * 1000)
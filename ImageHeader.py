@@ -0,0 +1,73 @@
+import struct
+
+# EXIF方向标签中需要旋转90°/270°（宽高互换）的取值
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def _exif_orientation(tiff):
+    """从JPEG的APP1段中EXIF头之后的TIFF数据读取方向标签，没有或解析失败时返回1（正常方向）"""
+    try:
+        if tiff[:2] == b'II':
+            order = '<'
+        elif tiff[:2] == b'MM':
+            order = '>'
+        else:
+            return 1
+        ifd = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[ifd:ifd + 2])[0]
+        for i in range(count):
+            entry = ifd + 2 + 12 * i
+            tag = struct.unpack(order + 'H', tiff[entry:entry + 2])[0]
+            if tag == 0x0112:
+                return struct.unpack(order + 'H', tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        pass
+    return 1
+
+
+def read_image_size(image_path):
+    """
+    只读文件头获取图片尺寸 (宽, 高)，支持PNG、JPEG、BMP，其他格式或解析失败返回None
+
+    JPEG按EXIF方向标签返回旋转后的尺寸，与OpenCV解码出的图片一致
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(26)
+            if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:2] == b'BM' and len(head) >= 26:
+                w, h = struct.unpack('<ii', head[18:26])
+                return w, abs(h)
+            if head[:2] == b'\xff\xd8':
+                orientation = 1
+                f.seek(2)
+                while True:
+                    byte = f.read(1)
+                    if not byte:
+                        return None
+                    if byte != b'\xff':
+                        continue
+                    marker = f.read(1)
+                    while marker == b'\xff':
+                        marker = f.read(1)
+                    if not marker:
+                        return None
+                    m = marker[0]
+                    if m == 0xD8 or m == 0x01 or 0xD0 <= m <= 0xD7:
+                        continue  # 没有长度字段的标记
+                    length = struct.unpack('>H', f.read(2))[0]
+                    # SOF0-SOF15（排除DHT、JPG、DAC）里记录了图像尺寸
+                    if 0xC0 <= m <= 0xCF and m not in (0xC4, 0xC8, 0xCC):
+                        h, w = struct.unpack('>HH', f.read(5)[1:5])
+                        return (h, w) if orientation in _TRANSPOSED_ORIENTATIONS else (w, h)
+                    if m == 0xE1:
+                        # APP1段，EXIF在图像尺寸之前
+                        data = f.read(length - 2)
+                        if data[:6] == b'Exif\x00\x00':
+                            orientation = _exif_orientation(data[6:])
+                        continue
+                    f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return None
+    return None
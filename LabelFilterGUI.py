@@ -0,0 +1,102 @@
+from PyQt5.QtWidgets import (QWidget, QFormLayout, QVBoxLayout, QHBoxLayout, QComboBox,
+                             QSpinBox, QDoubleSpinBox, QPushButton, QLabel)
+
+from SvgRenderer import get_setting_svg_icon, set_svg_icon_from_string
+
+
+class LabelFilterWindow(QWidget):
+    """
+    标注筛选窗口
+
+    按类别、框大小、宽高比和框数筛选图片，点击"筛选"时回调 on_apply(条件字典)，
+    点击"显示全部"时回调 on_apply(None)。条件为0表示不限。
+    """
+
+    def __init__(self, classes, on_apply):
+        super().__init__()
+        self.on_apply = on_apply
+        self.setWindowTitle("筛选图片")
+        self.setGeometry(1000, 200, 320, 260)
+        self.init_ui()
+        self.set_classes(classes)
+        set_svg_icon_from_string(self, get_setting_svg_icon())
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.class_combo = QComboBox()
+        form.addRow("类别:", self.class_combo)
+
+        self.max_size_spin = self._spin_box(" 像素")
+        form.addRow("框的宽或高小于:", self.max_size_spin)
+        self.min_size_spin = self._spin_box(" 像素")
+        form.addRow("框的宽或高大于:", self.min_size_spin)
+
+        self.min_aspect_spin = self._aspect_spin_box()
+        self.max_aspect_spin = self._aspect_spin_box()
+        aspect_layout = QHBoxLayout()
+        aspect_layout.addWidget(self.min_aspect_spin)
+        aspect_layout.addWidget(QLabel("~"))
+        aspect_layout.addWidget(self.max_aspect_spin)
+        form.addRow("框的宽高比:", aspect_layout)
+
+        self.min_count_spin = self._spin_box(" 个")
+        form.addRow("每张框数不少于:", self.min_count_spin)
+        self.max_count_spin = self._spin_box(" 个")
+        form.addRow("每张框数不多于:", self.max_count_spin)
+        layout.addLayout(form)
+
+        button_layout = QHBoxLayout()
+        apply_btn = QPushButton("筛选")
+        apply_btn.clicked.connect(lambda: self.on_apply(self.query_params()))
+        button_layout.addWidget(apply_btn)
+        clear_btn = QPushButton("显示全部")
+        clear_btn.clicked.connect(lambda: self.on_apply(None))
+        button_layout.addWidget(clear_btn)
+        layout.addLayout(button_layout)
+
+        hint_label = QLabel("提示：0表示不限；框的条件需要由同一个框满足")
+        hint_label.setStyleSheet("color: green; font-size: 10px;")
+        layout.addWidget(hint_label)
+        self.setLayout(layout)
+
+    @staticmethod
+    def _spin_box(suffix):
+        spin = QSpinBox()
+        spin.setRange(0, 100000)
+        spin.setSuffix(suffix)
+        spin.setSpecialValueText("不限")
+        return spin
+
+    @staticmethod
+    def _aspect_spin_box():
+        spin = QDoubleSpinBox()
+        spin.setRange(0, 100)
+        spin.setDecimals(2)
+        spin.setSingleStep(0.1)
+        spin.setSpecialValueText("不限")
+        return spin
+
+    def set_classes(self, classes):
+        """类别改变后刷新下拉框（保持选中的序号）"""
+        current = self.class_combo.currentIndex()
+        self.class_combo.clear()
+        self.class_combo.addItem("全部类别")
+        self.class_combo.addItems([f"#{i} {name}" for i, name in enumerate(classes)])
+        self.class_combo.setCurrentIndex(max(0, min(current, self.class_combo.count() - 1)))
+
+    def query_params(self):
+        """当前条件，对应ProjectIndex.query的参数（不限的条件不出现）"""
+        values = {
+            "max_size": self.max_size_spin.value(),
+            "min_size": self.min_size_spin.value(),
+            "min_aspect": self.min_aspect_spin.value(),
+            "max_aspect": self.max_aspect_spin.value(),
+            "min_count": self.min_count_spin.value(),
+            "max_count": self.max_count_spin.value(),
+        }
+        params = {key: value for key, value in values.items() if value}
+        if self.class_combo.currentIndex() > 0:
+            params["class_id"] = self.class_combo.currentIndex() - 1
+        return params
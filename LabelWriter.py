@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def atomic_write_text(path, text):
+    """原子写文本文件：先写同目录下的临时文件，再用os.replace替换目标文件"""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+# 进程的umask（只能通过设置来读取，在导入时读一次，避免写文件的后台线程读到临时修改的值）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _target_mode(path):
+    """原子写入后文件应有的权限：已存在的文件保持原权限，新文件为 0o666 & ~umask"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write_bytes(path, data, fsync=True):
+    """原子写二进制文件；可再生成的缓存文件可传fsync=False省去刷盘"""
+    dir_name = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp创建的文件权限是0600，替换前改成原文件的权限（新文件按umask），共享的数据集其他用户仍可读
+        os.chmod(tmp_path, _target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LabelWriter:
+    """
+    后台写标注文件的队列
+
+    同一文件在写入前的多次提交会合并为最后一次，写入由单独的线程完成，
+    界面线程提交后立即返回。
+    """
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error  # 写入失败时回调 (path, error_message)，在写线程中调用
+        self._pending = OrderedDict()  # 路径 -> 待写入文本
+        self._writing = None  # 正在写入的 (路径, 文本)
+        self._failed = set()  # 最近一次写入失败的路径
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="label-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, text):
+        """提交一次写入，覆盖同一文件尚未写入的旧内容"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("LabelWriter已关闭")
+            self._pending.pop(path, None)
+            self._pending[path] = text
+            self._cond.notify_all()
+
+    def pending_text(self, path):
+        """返回尚未落盘的最新内容，没有则返回None（读取标注前先查询，避免读到旧文件）"""
+        with self._cond:
+            if path in self._pending:
+                return self._pending[path]
+            if self._writing is not None and self._writing[0] == path:
+                return self._writing[1]
+            return None
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending) + (1 if self._writing is not None else 0)
+
+    def flush(self, timeout=None):
+        """等待队列写空，超时返回False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._writing is None, timeout)
+
+    def failed_count(self):
+        """最近一次写入失败、之后也没有写成功的文件数"""
+        with self._cond:
+            return len(self._failed)
+
+    def close(self, timeout=None):
+        """写完剩余队列后停止写线程，全部写入成功时返回True"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            return flushed and not self._failed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                self._writing = self._pending.popitem(last=False)
+            path, text = self._writing
+            try:
+                atomic_write_text(path, text)
+                with self._cond:
+                    self._failed.discard(path)
+            except Exception as e:
+                with self._cond:
+                    self._failed.add(path)
+                if self.on_error:
+                    self.on_error(path, str(e))
+            finally:
+                with self._cond:
+                    self._writing = None
+                    self._cond.notify_all()
@@ -1,5 +1,4 @@
 import colorsys
-import json
 import os
 import sys
 from functools import partial
@@ -10,8 +9,7 @@ import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QLabel,
                              QPushButton, QVBoxLayout, QWidget, QHBoxLayout,
                              QSpinBox, QComboBox, QSizePolicy, QMessageBox)
-from PyQt5.QtCore import Qt, QPoint
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 from CheckFolderGUI import ImageSizeCheckerApp
 from SettingGUI import MainWindow
@@ -19,12 +17,36 @@ from ShowSelectGUI import ColorTextWindow
 
 from SvgRenderer import get_main_svg_icon, set_svg_icon_from_string
 from DealImagesGUI import ImageResizerApp
+from ImageCanvas import ImageCanvas
+from ImageCache import DecodedImageCache, ImagePrefetcher, imread_reduced
+from ImageHeader import read_image_size
+from LabelWriter import LabelWriter
+from DirectoryIndexer import DirectoryIndexer, load_cached_index
+from FilmstripGUI import FilmstripDock
+from BoxIndex import BoxIndex
+from BoxStore import BoxStore
+from EditHistory import EditHistory, apply_command, invert_command
+from AnnotationJournal import AnnotationJournal, read_label_text
+from ConfigStore import config_store, shortcuts_store
+from RepaintScheduler import RepaintScheduler
+from ProjectIndex import ProjectIndex, ProjectIndexBuilder, LABEL_MISSING, LABEL_EMPTY, LABEL_BOXES
+from BatchCore import label_path_for
+from LabelFilterGUI import LabelFilterWindow
+from ClassPicker import ClassPickerPopup
+
+# 排序下拉框各项对应的ProjectIndex排序方式
+SORT_KEYS = ("name", "status", "boxes")
 
 
 class LabelTool(QMainWindow):
+    label_write_failed = pyqtSignal(str, str)
+    full_frame_ready = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.create_success = False
+        self.resident = False  # 由常驻启动器打开时为True：关闭窗口只隐藏，进程退出时再调用shutdown
+        self.is_shut_down = False
 
         self.setWindowTitle("YOLO标注工具")
         self.setGeometry(100, 100, 400, 400)
@@ -32,34 +54,82 @@ class LabelTool(QMainWindow):
 
         # 变量初始化
         self.image_dir = ""
-        self.current_image = None
+        self.image_files = []
+        self.current_index = 0
+        self.indexer = None
+        self.project = None  # 当前文件夹的项目索引（SQLite）
+        self.project_builder = None
+        self.resume_path = ""  # 上次浏览到的图片，文件列表就绪后跳转过去
+        self.navigated = False  # 打开文件夹后是否已手动翻页（翻过页就不再自动跳转）
+        self.file_filter = None  # 当前的筛选条件（ProjectIndex.query的参数），None表示显示全部图片
+        self.image_rel_path = ""  # 当前图片相对图片文件夹的路径
+        self.rapid_scrolling = False  # 按住翻页键快速浏览中（只更新序号和缩略图）
+        self.current_image = None  # 当前显示的帧（预览时为缩小解码的帧）
+        self.image_size = None  # 原图尺寸 (宽, 高)，标注坐标始终按原图计算
+        self.previewing = False
         self.image_path = ""
         self.drawing = False
-        self.rect_start = QPoint()
-        self.rect_end = QPoint()
-        self.rectangles = []  # 存储所有标注框 [class_id, x1, y1, x2, y2]
+        self.rect_start = None  # 拖拽起点（图片坐标）
+        self.rect_end = None
+        self.boxes = BoxStore()  # 当前图片的所有标注框（类别 + 原图像素坐标）
+        self.label_path = ""  # 当前图片的标注文件路径，同时是撤销历史的键
+        self.box_index = BoxIndex()  # 标注框的空间索引，用于点选
+        self.selected_index = None  # 选中框的下标
+        self.edit_handle = None  # 正在进行的编辑："move"或调整手柄名称
+        self.edit_origin = None  # 开始编辑时的光标位置（图片坐标）
+        self.edit_start_rect = None  # 开始编辑时选中框的位置
+        self.edit_rect = None  # 编辑中选中框的当前位置
+        self.labels_dirty = False  # 当前图片的标注是否有未保存的修改
 
         self.classes = []  # 默认类别
         self.classes_colors = []
+        self.recent_classes = []  # 最近使用的类别序号，第一个是当前类别
         self.open_default_dir = ""
         self.config = None
         self.load_config()
 
-        # 坐标转换参数
-        self.scale = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        self.scaled_w = 0
-        self.scaled_h = 0
         self.shortcuts = {}  # 存储快捷键配置
         self.load_shortcuts()  # 初始化时加载配置
 
+        # 解码缓存与后台预取（容量和预取张数可在config.json中配置）
+        self.prefetcher = ImagePrefetcher(
+            DecodedImageCache(self.config.get("decode_cache_mb", 512) * 1024 * 1024),
+            ahead=self.config.get("prefetch_ahead", 3),
+            behind=self.config.get("prefetch_behind", 1))
+        # 缓存未命中的大JPEG先缩小解码预览，完整帧在后台解码后替换
+        self.preview_decode = self.config.get("preview_decode", True)
+        self.full_frame_ready.connect(self.on_full_frame_ready, Qt.QueuedConnection)
+
+        # 快速浏览停下后（或松开按键时）才完整加载图片
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(self.config.get("rapid_scroll_settle_ms", 250))
+        self.settle_timer.timeout.connect(self.settle_scroll)
+
+        # 撤销/重做历史（整个会话的命令数有上限）
+        self.history = EditHistory(self.config.get("undo_limit", 20000))
+
+        # 后台写标注文件（写失败通过信号回到界面线程提示）
+        self.label_write_failed.connect(self.on_label_write_failed)
+        self.label_writer = LabelWriter(on_error=self.label_write_failed.emit)
+
+        # 上次异常退出时，把预写日志中尚未落盘的编辑恢复到标注文件，然后开始新的日志
+        recovered, unrecoverable = AnnotationJournal.replay()
+        self.journal = AnnotationJournal()
+
         # UI初始化
         self.init_ui()
+        self.remember_class(self.class_combo.currentIndex())
+        self.config.changed.connect(self.on_config_changed)
+        shortcuts_store().changed.connect(self.on_shortcuts_changed)
+        if recovered or unrecoverable:
+            self.statusBar().showMessage(f"已从编辑日志恢复 {len(recovered)} 个标注文件"
+                                         + (f"，{len(unrecoverable)} 个文件已被修改，无法恢复" if unrecoverable else ""))
         self.setting_window = None
         self.color_show_window = None
         self.check_window = None
         self.deal_windows = None
+        self.filter_window = None
 
         self.create_success = True
 
@@ -72,12 +142,15 @@ class LabelTool(QMainWindow):
         main_layout = QVBoxLayout()
         central_widget.setLayout(main_layout)
 
-        # 图像显示区域
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setStyleSheet("background-color: black;")
+        # 图像显示区域（分层画布）
+        self.image_label = ImageCanvas()
+        self.image_label.set_palette(self.classes, self.classes_colors)
         main_layout.addWidget(self.image_label, 1)
 
+        # 拖拽时合并鼠标移动事件，每个显示帧最多重绘一次
+        self.repaint_scheduler = RepaintScheduler(self.render_drag, parent=self)
+        self.image_label.frame_painted.connect(self.repaint_scheduler.frame_done)
+
         # 控制面板
         control_panel = QWidget()
         control_layout = QHBoxLayout()
@@ -97,6 +170,23 @@ class LabelTool(QMainWindow):
         self.next_btn.clicked.connect(self.next_image)
         control_layout.addWidget(self.next_btn)
 
+        # 跳到下一张未标注的图片（查询项目索引）
+        self.next_unlabeled_btn = QPushButton("下一张未标注")
+        self.next_unlabeled_btn.clicked.connect(self.next_unlabeled)
+        control_layout.addWidget(self.next_unlabeled_btn)
+
+        # 文件列表排序方式
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems(["文件名", "未标注优先", "框数"])
+        self.sort_combo.currentIndexChanged.connect(self.on_sort_changed)
+        control_layout.addWidget(QLabel("排序:"))
+        control_layout.addWidget(self.sort_combo)
+
+        # 按类别、框大小、框数筛选图片
+        self.filter_btn = QPushButton("筛选")
+        self.filter_btn.clicked.connect(self.open_filter)
+        control_layout.addWidget(self.filter_btn)
+
         # 类别选择
         self.class_combo = QComboBox()
         self.class_combo.addItems(self.classes)
@@ -105,37 +195,69 @@ class LabelTool(QMainWindow):
             width: 50px;
                     }
         """)
+        self.class_combo.setMaxVisibleItems(20)
         self.class_combo.currentIndexChanged.connect(self.on_combo_changed)
         control_layout.addWidget(QLabel("类别:"))
         control_layout.addWidget(self.class_combo)
 
+        # 输入即搜索的类别选择（类别很多时用）
+        self.class_picker = ClassPickerPopup(self)
+        self.class_picker.set_classes(self.classes, self.classes_rgb())
+        self.class_picker.class_picked.connect(self.select_class)
+        self.class_picker_btn = QPushButton("查找类别")
+        self.class_picker_btn.clicked.connect(self.open_class_picker)
+        control_layout.addWidget(self.class_picker_btn)
+
         # 保存按钮
         self.save_btn = QPushButton("保存标注")
-        self.save_btn.clicked.connect(self.save_labels)
+        self.save_btn.clicked.connect(lambda: self.save_labels(explicit=True))
         control_layout.addWidget(self.save_btn)
 
-        # 删除最后一个框按钮
-        self.del_btn = QPushButton("删除最后一个框")
-        self.del_btn.clicked.connect(self.delete_last_rect)
+        # 删除选中的框（没有选中时删除最后一个框）按钮
+        self.del_btn = QPushButton("删除选中的框")
+        self.del_btn.clicked.connect(self.delete_selected_rect)
         control_layout.addWidget(self.del_btn)
 
+        # 撤销/重做按钮
+        self.undo_btn = QPushButton("撤销")
+        self.undo_btn.clicked.connect(self.undo_edit)
+        control_layout.addWidget(self.undo_btn)
+
+        self.redo_btn = QPushButton("重做")
+        self.redo_btn.clicked.connect(self.redo_edit)
+        control_layout.addWidget(self.redo_btn)
+
         # 删除最后一个框按钮
         self.setting_btn = QPushButton("设置")
         self.setting_btn.clicked.connect(self.open_setting)
         control_layout.addWidget(self.setting_btn)
 
         main_layout.addWidget(control_panel)
+
+        # 缩略图胶片栏（虚拟化列表，缩略图缓存在磁盘上）
+        self.filmstrip = FilmstripDock(self.config.get("thumbnail_size", 96), self)
+        self.filmstrip.image_activated.connect(self.goto_image)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.filmstrip)
+
         set_svg_icon_from_string(self, get_main_svg_icon())
         # 状态栏
         self.statusBar().showMessage("准备就绪")
+        self.cache_label = QLabel()
+        self.statusBar().addPermanentWidget(self.cache_label)
+        self.render_label = QLabel()
+        self.statusBar().addPermanentWidget(self.render_label)
+        self.project_label = QLabel()
+        self.statusBar().addPermanentWidget(self.project_label)
 
     def open_image_dir(self):
         """打开图片文件夹"""
         dir_path = QFileDialog.getExistingDirectory(self, "选择图片文件夹", self.open_default_dir)
         if dir_path:
+            # 边建索引边显示，尺寸检查在后台同时进行
+            self.start_indexing(dir_path)
             self.check_window = ImageSizeCheckerApp(dir_path, {
                 'continue': partial(self.open_image_dir_check_ok, dir_path),
-                'cancel': lambda: sys.exit(),
+                'cancel': self.quit_app,
                 'deal': partial(self.deal_dir, dir_path),
                 'close': self.show_exit_confirmation,
             })
@@ -151,100 +273,391 @@ class LabelTool(QMainWindow):
             QMessageBox.Ok
         )
 
-    def open_image_dir_check_ok(self, dir_path):
-
-        if dir_path:
-            self.image_dir = dir_path
-            self.image_files = [f for f in os.listdir(dir_path)
-                                if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    def open_image_dir_check_ok(self, dir_path, force=False):
+        """尺寸检查通过或缩放处理完成后打开文件夹；force为True时即使是当前文件夹也不用持久化索引、重新扫描"""
+        if dir_path and (force or dir_path != self.image_dir):
+            self.start_indexing(dir_path, use_cache=not force)
 
-            self.config["open_default_dir"] = dir_path
-            self.open_default_dir = dir_path
-            self.save_config()
+        self.update_tooltips()
 
-            self.current_index = 0
-            if self.image_files:
-                self.load_image(os.path.join(dir_path, self.image_files[0]))
-                self.statusBar().showMessage(f"已加载 {len(self.image_files)} 张图片")
-            else:
-                self.statusBar().showMessage("文件夹中没有图片文件")
+        text_select, color_select, index_select = self.get_class_combo_select()
+        if self.color_show_window is None:
+            self.color_show_window = ColorTextWindow(bg_color=color_select, classes_text=text_select,
+                                                     index=index_select)
+        self.color_show_window.show()
 
+    def update_tooltips(self):
+        """按钮提示中显示当前的快捷键"""
         self.open_btn.setToolTip("快捷键：" + self.shortcuts["open_btn"])
         self.prev_btn.setToolTip("快捷键：" + self.shortcuts["prev_btn"])
         self.next_btn.setToolTip("快捷键：" + self.shortcuts["next_btn"])
         self.save_btn.setToolTip("快捷键：" + self.shortcuts["save_btn"])
         self.del_btn.setToolTip("快捷键：" + self.shortcuts["del_btn"])
-        self.class_combo.setToolTip("快捷键：" + self.shortcuts["class_combo"] + " 循环选择")
+        self.undo_btn.setToolTip("快捷键：" + self.shortcuts["undo_btn"])
+        self.redo_btn.setToolTip("快捷键：" + self.shortcuts["redo_btn"])
+        self.next_unlabeled_btn.setToolTip("快捷键：" + self.shortcuts["next_unlabeled_btn"])
+        self.class_combo.setToolTip("快捷键：" + self.shortcuts["class_combo"] + " 循环选择，"
+                                    "数字键1~9、0选择前10个类别，Alt+数字键选择最近使用的类别")
+        self.class_picker_btn.setToolTip("快捷键：" + self.shortcuts["class_picker"])
         self.setting_btn.setToolTip("快捷键：" + self.shortcuts["setting_btn"])
 
-        text_select, color_select, index_select = self.get_class_combo_select()
-        if self.color_show_window is None:
-            self.color_show_window = ColorTextWindow(bg_color=color_select, classes_text=text_select,
-                                                     index=index_select)
-        self.color_show_window.show()
+    def open_path(self, dir_path):
+        """打开命令行指定的图片文件夹（由启动器调用，不弹出尺寸检查窗口）"""
+        if not os.path.isdir(dir_path):
+            self.statusBar().showMessage(f"文件夹不存在: {dir_path}")
+        elif not self.image_dir or os.path.normpath(dir_path) != os.path.normpath(self.image_dir):
+            self.start_indexing(dir_path)
+
+    def start_indexing(self, dir_path, use_cache=True):
+        """打开图片文件夹：有未过期的持久化索引时直接使用（use_cache为False时不用），否则在后台流式扫描"""
+        self.save_labels()
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+            self.indexer = None
+        self.close_project()
+
+        self.image_dir = dir_path
+        self.image_files = []
+        self.current_index = 0
+        self.filmstrip.set_files(dir_path, [])
+
+        # 打开项目索引，记下上次浏览的位置；排序恢复为按文件名
+        self.project = ProjectIndex(dir_path)
+        self.resume_path = self.project.get_meta("last_visited", "")
+        self.navigated = False
+        self.file_filter = None
+        self.sort_combo.blockSignals(True)
+        self.sort_combo.setCurrentIndex(0)
+        self.sort_combo.blockSignals(False)
+
+        self.config["open_default_dir"] = dir_path  # 共享配置延迟合并写盘
+        self.open_default_dir = dir_path
+
+        recursive = self.config.get("recursive_scan", False)
+        cached = load_cached_index(dir_path, recursive) if use_cache else None
+        if cached is not None:
+            self.apply_index(cached)
+            return
+
+        self.statusBar().showMessage("正在扫描图片文件夹...")
+        self.indexer = DirectoryIndexer(dir_path, recursive)
+        self.indexer.batch_found.connect(self.on_index_batch)
+        self.indexer.indexing_finished.connect(self.on_indexing_finished)
+        self.indexer.start()
+
+    def on_index_batch(self, files):
+        """扫描中陆续找到图片：追加到列表，找到第一张就立即显示"""
+        if self.sender() is not self.indexer:
+            return
+        first = not self.image_files
+        self.image_files.extend(files)
+        self.filmstrip.append_files(files)
+        if first:
+            self.current_index = 0
+            self.load_image(os.path.join(self.image_dir, self.image_files[0]))
+        self.statusBar().showMessage(f"正在扫描图片文件夹... 已找到 {len(self.image_files)} 张图片")
+
+    def on_indexing_finished(self, files):
+        """扫描完成"""
+        if self.sender() is not self.indexer:
+            return
+        self.indexer = None
+        self.apply_index(files)
+
+    def apply_index(self, files):
+        """
+        换成自然排序后的完整列表，并保持当前图片不变
+
+        还没有翻过页时跳转到上次浏览的图片；之后在后台增量更新项目索引
+        """
+        current = self.image_files[self.current_index] if self.image_files else None
+        self.image_files = files
+        self.filmstrip.set_files(self.image_dir, files)
+        self.start_project_build(files)
+        resume, self.resume_path = self.resume_path, ""
+        if not files:
+            self.current_index = 0
+            self.statusBar().showMessage("文件夹中没有图片文件")
+            return
+
+        if current is None:
+            self.current_index = files.index(resume) if resume in files else 0
+            self.load_image(os.path.join(self.image_dir, files[self.current_index]))
+        else:
+            self.current_index = files.index(current) if current in files else 0
+            self.filmstrip.set_current(self.current_index)
+            self.prefetch_neighbors()
+            if not self.navigated and resume != current and resume in files:
+                self.goto_image(files.index(resume))
+        self.statusBar().showMessage(f"已加载 {len(self.image_files)} 张图片")
+
+    def start_project_build(self, files):
+        """在后台同步文件顺序、只重新扫描有变化的图片和标注，更新项目索引"""
+        if self.project_builder is not None:
+            self.project_builder.stop()
+            self.project_builder.wait()
+        self.project_builder = ProjectIndexBuilder(self.project, files,
+                                                   self.config.get("project_index_workers", 8))
+        self.project_builder.order_synced.connect(self.on_project_ordered)
+        self.project_builder.progress.connect(self.on_project_progress)
+        self.project_builder.build_finished.connect(self.on_project_built)
+        self.project_builder.start()
+
+    def on_project_ordered(self):
+        """文件顺序已写入项目索引：顺序同步前已切换了排序或筛选时，按新的顺序重新查询"""
+        if self.sender() is not self.project_builder:
+            return
+        if self.sort_combo.currentIndex() != 0 or self.file_filter is not None:
+            self.refresh_file_list(self.file_filter)
+
+    def on_project_progress(self, done, total):
+        if self.sender() is self.project_builder:
+            self.project_label.setText(f"索引 {done}/{total}")
+
+    def on_project_built(self, scanned):
+        if self.sender() is not self.project_builder:
+            return
+        self.project_builder = None
+        self.update_project_label()
+
+    def update_project_label(self):
+        """状态栏显示各标注状态的图片数"""
+        counts = self.project.status_counts()
+        self.project_label.setText(f"未标注 {counts.get(LABEL_MISSING, 0)} | 空 {counts.get(LABEL_EMPTY, 0)}"
+                                   f" | 已标注 {counts.get(LABEL_BOXES, 0)}")
+
+    def close_project(self):
+        if self.project_builder is not None:
+            self.project_builder.stop()
+            self.project_builder.wait()
+            self.project_builder = None
+        if self.project is not None:
+            self.project.close()
+            self.project = None
+
+    def next_unlabeled(self):
+        """跳到当前图片之后（按文件名顺序）第一张没有标注文件的图片，到末尾后从头找"""
+        if self.project is None or not self.image_files:
+            return
+        seq = self.project.seq_of(self.image_rel_path)
+        row = self.project.next_with_status(-1 if seq is None else seq, LABEL_MISSING)
+        if row is None:
+            self.statusBar().showMessage("没有未标注的图片" if self.project_builder is None
+                                        else "项目索引建立中，暂未找到未标注的图片")
+            return
+        seq, rel_path = row
+        if seq < len(self.image_files) and self.image_files[seq] == rel_path:
+            index = seq  # 按文件名排序且没有筛选时序号就是列表下标
+        elif rel_path in self.image_files:
+            index = self.image_files.index(rel_path)  # 扫描中（发现顺序）、其他排序或筛选时按路径查找
+        else:
+            self.statusBar().showMessage(f"下一张未标注的图片不在筛选结果中: {rel_path}")
+            return
+        self.goto_image(index)
+
+    def on_sort_changed(self, index):
+        """按项目索引重新排序文件列表，保持当前图片不变"""
+        if self.project is not None and self.image_files:
+            self.refresh_file_list(self.file_filter)
+
+    def open_filter(self):
+        if self.filter_window is None:
+            self.filter_window = LabelFilterWindow(self.classes, self.apply_filter)
+        self.filter_window.show()
+
+    def apply_filter(self, file_filter):
+        """只浏览符合条件的图片，file_filter为None时恢复全部图片"""
+        if self.project is None or not self.image_files:
+            return
+        if self.refresh_file_list(file_filter):
+            self.file_filter = file_filter
+            if file_filter is None:
+                self.statusBar().showMessage(f"显示全部 {len(self.image_files)} 张图片")
+            else:
+                self.statusBar().showMessage(f"筛选结果: {len(self.image_files)} 张图片"
+                                             + ("（项目索引建立中，结果可能不完整）" if self.project_builder else ""))
+
+    def refresh_file_list(self, file_filter):
+        """
+        按当前的排序方式和筛选条件从项目索引重新取文件列表
+
+        当前图片在结果中时保持不变，否则跳到第一张；没有符合条件的图片时不改变列表，返回False
+        """
+        if self.indexer is not None:
+            self.statusBar().showMessage("正在扫描图片文件夹，请稍后再排序或筛选")
+            return False
+        files = self.project.query(SORT_KEYS[self.sort_combo.currentIndex()], **(file_filter or {}))
+        if not files:
+            self.statusBar().showMessage("没有符合条件的图片")
+            return False
+        self.image_files = files
+        self.filmstrip.set_files(self.image_dir, files)
+        if self.image_rel_path in files:
+            self.current_index = files.index(self.image_rel_path)
+            self.filmstrip.set_current(self.current_index)
+            self.prefetch_neighbors()
+        else:
+            self.save_labels()
+            self.navigated = True
+            self.current_index = 0
+            self.load_image(os.path.join(self.image_dir, files[0]))
+        return True
 
     def on_combo_changed(self):
         if self._is_programmatic_change:
             return  # 程序触发的变更直接跳过
         text_select, color_select, index_select = self.get_class_combo_select()
-        self.color_show_window.update_content(bg_color=color_select, classes_text=text_select, index=index_select)
+        self.remember_class(index_select)
+        if self.color_show_window is not None:
+            self.color_show_window.update_content(bg_color=color_select, classes_text=text_select, index=index_select)
+
+        # 有选中的框时同时修改它的类别
+        if self.selected_index is not None and self.boxes[self.selected_index][0] != index_select:
+            self.apply_edit(("class", self.selected_index, self.boxes[self.selected_index][0], index_select))
 
     def load_image(self, image_path):
         """加载图片（修复版）"""
         self.image_path = image_path
+        self.image_rel_path = self.image_files[self.current_index] if self.image_files else ""
+        if self.project is not None and self.image_rel_path:
+            self.project.set_meta("last_visited", self.image_rel_path)
         try:
-            with open(image_path, 'rb') as f:
-                img_bytes = bytearray(f.read())
-
-            self.current_image = cv2.imdecode(np.asarray(img_bytes), cv2.IMREAD_COLOR)
+            self.current_image, self.image_size, self.previewing = self.load_frame(image_path)
 
             if self.current_image is None:
                 raise ValueError("OpenCV无法解码图像")
 
-            self.rectangles = []
             self.load_labels()
+            self.box_index.rebuild(self.boxes, self.image_size)
+            self.labels_dirty = False
+            self.drawing = False
+            self.edit_handle = None
+            self.image_label.set_image(self.current_image, self.image_size)
             self.show_image()
+            self.select_box(None)
+            self.prefetch_neighbors()
+            self.filmstrip.set_current(self.current_index)
 
         except Exception as e:
             self.statusBar().showMessage(f"错误: {str(e)}")
             self.current_image = None
+            self.image_size = None
+            self.previewing = False
+            self.labels_dirty = False
             error_img = np.zeros((500, 800, 3), dtype=np.uint8)
             cv2.putText(error_img, f"无法加载图片: {os.path.basename(image_path)}",
                         (50, 250), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             cv2.putText(error_img, f"错误: {str(e)}", (50, 300),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 1)
 
-            h, w, ch = error_img.shape
-            bytes_per_line = ch * w
-            q_img = QImage(error_img.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-            self.image_label.setPixmap(QPixmap.fromImage(q_img))
+            self.boxes = BoxStore()
+            self.box_index.rebuild(self.boxes)
+            self.image_label.set_image(error_img)
+            self.image_label.set_boxes(self.boxes)
+            self.select_box(None)
+
+    def load_frame(self, image_path):
+        """
+        获取用于显示的帧，返回 (帧, 原图尺寸, 是否为预览帧)
+
+        缓存中没有且未在预取的JPEG，若缩小解码仍能填满画布，则先按1/2~1/8缩小解码快速显示，
+        完整帧在后台解码完成后替换（开始拖拽时立即替换）
+        """
+        if (self.preview_decode and image_path.lower().endswith(('.jpg', '.jpeg'))
+                and not self.prefetcher.is_ready(image_path)):
+            size = read_image_size(image_path)
+            factor = self.preview_factor(size)
+            if factor > 1:
+                preview = imread_reduced(image_path, factor)
+                size = self.match_preview_size(size, preview, factor)
+                if size is not None:
+                    future = self.prefetcher.request(image_path)
+                    future.add_done_callback(lambda _f, p=image_path: self.full_frame_ready.emit(p))
+                    return preview, size, True
+
+        frame = self.prefetcher.load(image_path)
+        if frame is None:
+            return None, None, False
+        return frame, (frame.shape[1], frame.shape[0]), False
+
+    def preview_factor(self, size):
+        """缩小解码后仍不低于画布显示分辨率的最大缩小倍数，不适合预览时返回1"""
+        if size is None or size[0] <= 0 or size[1] <= 0:
+            return 1
+        fit = min(self.image_label.width() / size[0], self.image_label.height() / size[1])
+        for factor in (8, 4, 2):
+            if factor * fit <= 1:
+                return factor
+        return 1
+
+    @staticmethod
+    def match_preview_size(size, preview, factor):
+        """
+        校验预览帧与文件头尺寸是否一致，返回原图尺寸 (宽, 高)
+
+        OpenCV解码时会按EXIF方向旋转，文件头里的宽高可能与解码结果相反；都对不上时返回None
+        """
+        if preview is None:
+            return None
+        preview_h, preview_w = preview.shape[:2]
+        w, h = size
+        if abs(preview_w - w / factor) <= 1 and abs(preview_h - h / factor) <= 1:
+            return w, h
+        if abs(preview_w - h / factor) <= 1 and abs(preview_h - w / factor) <= 1:
+            return h, w
+        return None
+
+    def on_full_frame_ready(self, image_path):
+        """后台完整解码完成后，若仍停留在该图片的预览上则替换为完整帧"""
+        if image_path == self.image_path and self.previewing:
+            self.upgrade_to_full()
+
+    def upgrade_to_full(self):
+        """把当前的预览帧替换为完整帧，保持缩放和平移"""
+        try:
+            frame = self.prefetcher.load(self.image_path)
+        except Exception as e:
+            self.statusBar().showMessage(f"错误: {str(e)}")
+            return
+        if frame is None:
+            return
+        self.current_image = frame
+        self.previewing = False
+        self.image_label.set_image(frame, self.image_size, keep_view=True)
+
+    def prefetch_neighbors(self):
+        """后台预取当前图片前后的图片，并刷新缓存命中统计"""
+        if self.image_files:
+            self.prefetcher.prefetch(lambda i: os.path.join(self.image_dir, self.image_files[i]),
+                                     len(self.image_files), self.current_index)
+        stats = self.prefetcher.stats()
+        self.cache_label.setText(f"缓存 命中:{stats['hits']} 等待预取:{stats['pending_hits']} "
+                                 f"未命中:{stats['misses']} ({stats['bytes'] // (1024 * 1024)}MB)")
 
     def load_labels(self):
-        """加载已有的YOLO格式标注文件"""
+        """
+        加载已有的YOLO格式标注文件
+
+        最近访问过的图片直接使用撤销历史中缓存的BoxStore，否则后台队列中尚未落盘的内容优先
+        """
         label_path = self.get_label_path()
-        if os.path.exists(label_path):
-            with open(label_path, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) == 5:
-                        class_id = int(parts[0])
-                        x_center, y_center, width, height = map(float, parts[1:])
-
-                        img_h, img_w = self.current_image.shape[:2]
-                        x1 = (x_center - width / 2) * img_w
-                        y1 = (y_center - height / 2) * img_h
-                        x2 = (x_center + width / 2) * img_w
-                        y2 = (y_center + height / 2) * img_h
-
-                        self.rectangles.append([class_id, x1, y1, x2, y2])
+        self.label_path = label_path
+        cached = self.history.cached_store(label_path)
+        if cached is not None:
+            self.boxes = cached
+            return
+
+        text = self.label_writer.pending_text(label_path)
+        if text is None:
+            self.boxes = BoxStore.load(label_path, self.image_size)
+        else:
+            self.boxes = BoxStore.from_yolo_text(text, self.image_size)
+        self.history.cache_store(label_path, self.boxes)
 
     def get_label_path(self):
-        """获取对应的标签文件路径"""
-        base_name = os.path.splitext(os.path.basename(self.image_path))[0]
-        dir_name = os.path.dirname(self.image_path)
-        label_dir = os.path.join(dir_name, "../labels")
-        os.makedirs(label_dir, exist_ok=True)
-        return os.path.join(label_dir, f"{base_name}.txt")
+        """获取对应的标签文件路径（labels目录在写入标注时才创建）"""
+        return label_path_for(self.image_dir, os.path.relpath(self.image_path, self.image_dir))
 
     def next_class(self):
         """切换到下一个类别（循环）"""
@@ -252,230 +665,188 @@ class LabelTool(QMainWindow):
         next_index = (current_index + 1) % self.class_combo.count()  # 循环计算下一个索引
         self.class_combo.setCurrentIndex(next_index)
 
+    def select_class(self, class_id):
+        """选择序号为class_id的类别（不存在时忽略）"""
+        if 0 <= class_id < self.class_combo.count():
+            self.class_combo.setCurrentIndex(class_id)
+
+    def remember_class(self, class_id):
+        """把class_id放到最近使用的类别的最前面（最多记10个）"""
+        if class_id < 0:
+            return
+        if class_id in self.recent_classes:
+            self.recent_classes.remove(class_id)
+        self.recent_classes = [class_id] + self.recent_classes[:9]
+
+    def select_recent_class(self, n):
+        """选择第n个最近使用的类别（1为上一个类别）"""
+        if n < len(self.recent_classes):
+            self.select_class(self.recent_classes[n])
+
+    def open_class_picker(self):
+        pos = self.class_combo.mapToGlobal(self.class_combo.rect().bottomLeft())
+        self.class_picker.popup(pos, self.recent_classes)
+
+    def classes_rgb(self):
+        return [(b, g, r) for b, g, r in self.classes_colors]
+
     def show_image(self):
-        """显示图片和标注框（包含坐标转换参数计算）"""
+        """刷新标注层（底图和坐标转换参数由画布缓存）"""
         if self.current_image is not None:
-            display_image = self.current_image.copy()
-
-            # 绘制所有标注框
-            for rect in self.rectangles:
-                class_id, x1, y1, x2, y2 = rect
-
-                cv2.rectangle(display_image, (int(x1), int(y1)), (int(x2), int(y2)), self.classes_colors[class_id], 2)
-
-                cv2.putText(display_image, self.classes[class_id], (int(x1), int(y1) - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.classes_colors[class_id], 1)
-
-            # 绘制当前框
-
-            if self.drawing:
-                x1, y1 = self.rect_start.x(), self.rect_start.y()
-                x2, y2 = self.rect_end.x(), self.rect_end.y()
-                cv2.rectangle(display_image, (x1, y1), (x2, y2), self.classes_colors[self.class_combo.currentIndex()],
-                              2)
-
-            # 转换为Qt格式
-            h, w, ch = display_image.shape
-            bytes_per_line = ch * w
-            q_img = QImage(display_image.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-            pixmap = QPixmap.fromImage(q_img)
-            self.image_label.setPixmap(pixmap)
-
-            # 计算坐标转换参数
-            label_width = self.image_label.width()
-            label_height = self.image_label.height()
-            pixmap_width = pixmap.width()
-            pixmap_height = pixmap.height()
-
-            if pixmap_width > 0 and pixmap_height > 0:
-                w_ratio = label_width / pixmap_width
-                h_ratio = label_height / pixmap_height
-                self.scale = min(w_ratio, h_ratio)
-                self.scaled_w = pixmap_width * self.scale
-                self.scaled_h = pixmap_height * self.scale
-                self.offset_x = (label_width - self.scaled_w) / 2
-                self.offset_y = (label_height - self.scaled_h) / 2
-            else:
-                self.scale = 1.0
-                self.offset_x = 0
-                self.offset_y = 0
-                self.scaled_w = 0
-                self.scaled_h = 0
+            self.image_label.set_boxes(self.boxes)
+
+    def event_to_image_pos(self, event):
+        """鼠标事件位置转换为图片坐标，不在图片范围内时返回None"""
+        pos_in_label = self.image_label.mapFrom(self, event.pos())
+        return self.image_label.widget_to_image(pos_in_label)
 
     def mousePressEvent(self, event):
-        """鼠标按下事件（带坐标转换）"""
-        if event.button() == Qt.LeftButton and self.image_label.underMouse():
-            pos_in_label = self.image_label.mapFromParent(event.pos())
-            x = pos_in_label.x()
-            y = pos_in_label.y()
-
-            if (self.offset_x <= x <= self.offset_x + self.scaled_w and
-                    self.offset_y <= y <= self.offset_y + self.scaled_h):
-                img_x = (x - self.offset_x) / self.scale
-                img_y = (y - self.offset_y) / self.scale
-                pixmap = self.image_label.pixmap()
-                if pixmap:
-                    img_x = max(0, min(img_x, pixmap.width()))
-                    img_y = max(0, min(img_y, pixmap.height()))
-                    self.drawing = True
-                    self.rect_start = QPoint(int(img_x), int(img_y))
-                    self.rect_end = self.rect_start
-                    self.show_image()
+        """
+        鼠标按下事件（带坐标转换）
+
+        按在选中框的手柄上调整大小，按在框内选中并移动，否则画新框；按住Shift总是画新框
+        """
+        if self.rapid_scrolling and event.button() == Qt.LeftButton:
+            self.settle_scroll()
+        if event.button() == Qt.LeftButton and self.current_image is not None and self.image_label.underMouse():
+            img_pos = self.event_to_image_pos(event)
+            if img_pos is not None:
+                if self.previewing:
+                    self.upgrade_to_full()
+
+                self.repaint_scheduler.reset_stats()
+                if not event.modifiers() & Qt.ShiftModifier:
+                    handle = self.image_label.handle_at(self.image_label.mapFrom(self, event.pos()))
+                    hit = None
+                    if handle is None:
+                        # 容差为屏幕上的3个像素
+                        hit = self.box_index.hit(img_pos[0], img_pos[1], 3 / self.image_label.scale)
+                    if handle is not None or hit is not None:
+                        if hit is not None:
+                            self.select_box(hit)
+                        self.edit_handle = handle or "move"
+                        self.edit_origin = img_pos
+                        self.edit_start_rect = self.boxes.rect(self.selected_index)
+                        self.edit_rect = self.edit_start_rect
+                        return
+
+                self.select_box(None)
+                self.drawing = True
+                self.rect_start = (int(img_pos[0]), int(img_pos[1]))
+                self.rect_end = self.rect_start
+                self.image_label.set_drag_rect(self.rect_start + self.rect_end, self.class_combo.currentIndex())
 
     def mouseMoveEvent(self, event):
-        """鼠标移动事件（带坐标转换）"""
-        if self.drawing and self.image_label.underMouse():
-            pos_in_label = self.image_label.mapFromParent(event.pos())
-            x = pos_in_label.x()
-            y = pos_in_label.y()
-
-            if (self.offset_x <= x <= self.offset_x + self.scaled_w and
-                    self.offset_y <= y <= self.offset_y + self.scaled_h):
-                img_x = (x - self.offset_x) / self.scale
-                img_y = (y - self.offset_y) / self.scale
-                pixmap = self.image_label.pixmap()
-                if pixmap:
-                    img_x = max(0, min(img_x, pixmap.width()))
-                    img_y = max(0, min(img_y, pixmap.height()))
-                    self.rect_end = QPoint(int(img_x), int(img_y))
-                    self.show_image()
+        """鼠标移动事件：只记录最新位置，由重绘调度器按帧提交"""
+        if (self.drawing or self.edit_handle is not None) and self.image_label.underMouse():
+            img_pos = self.event_to_image_pos(event)
+            if img_pos is not None:
+                self.repaint_scheduler.request(img_pos)
+
+    def render_drag(self, img_pos):
+        """把拖拽的最新位置提交到画布（只刷新覆盖层中的拖拽框或选中框）"""
+        if self.edit_handle is not None:
+            self.edit_rect = self.edited_rect(img_pos)
+            self.image_label.move_selection(self.edit_rect)
+        elif self.drawing:
+            self.rect_end = (int(img_pos[0]), int(img_pos[1]))
+            self.image_label.set_drag_rect(self.rect_start + self.rect_end)
+
+    def finish_drag(self, event):
+        """拖拽结束：丢弃未提交的位置，返回释放位置（图片坐标），并显示本次拖拽的重绘统计"""
+        self.repaint_scheduler.cancel()
+        stats = self.repaint_scheduler.stats()
+        if stats["frames"]:
+            self.render_label.setText(f"拖拽 {stats['requests']}次移动/{stats['frames']}帧 "
+                                      f"平均{stats['avg_ms']:.1f}ms 最长{stats['max_ms']:.1f}ms "
+                                      f"跳过{stats['skipped']}帧")
+        return self.event_to_image_pos(event)
+
+    def edited_rect(self, img_pos):
+        """移动/调整中光标位于img_pos时选中框的新位置（不超出图片范围）"""
+        x1, y1, x2, y2 = self.edit_start_rect
+        dx = img_pos[0] - self.edit_origin[0]
+        dy = img_pos[1] - self.edit_origin[1]
+        img_w, img_h = self.image_size
+        if self.edit_handle == "move":
+            dx = min(max(dx, -x1), img_w - x2)
+            dy = min(max(dy, -y1), img_h - y2)
+            return x1 + dx, y1 + dy, x2 + dx, y2 + dy
+
+        # 调整大小时手柄对应的边跟随光标，但不越过对边
+        if 'l' in self.edit_handle:
+            x1 = min(max(0, x1 + dx), x2 - 1)
+        if 'r' in self.edit_handle:
+            x2 = max(min(img_w, x2 + dx), x1 + 1)
+        if 't' in self.edit_handle:
+            y1 = min(max(0, y1 + dy), y2 - 1)
+        if 'b' in self.edit_handle:
+            y2 = max(min(img_h, y2 + dy), y1 + 1)
+        return x1, y1, x2, y2
+
+    def select_box(self, index):
+        """选中下标为index的框，为None时取消选中"""
+        self.selected_index = index
+        self.image_label.set_selection(index)
+        if index is not None:
+            class_id = self.boxes[index][0]
+            name = self.classes[class_id] if 0 <= class_id < len(self.classes) else str(class_id)
+            self.statusBar().showMessage(f"已选中第 {index + 1} 个框: {name}（拖动移动，拖动手柄调整大小，Del删除）")
 
     def mouseReleaseEvent(self, event):
         """鼠标释放事件（带坐标转换）"""
+        if event.button() == Qt.LeftButton and self.edit_handle is not None:
+            img_pos = self.finish_drag(event)
+            if img_pos is not None:
+                self.edit_rect = self.edited_rect(img_pos)
+                self.image_label.move_selection(self.edit_rect)
+            self.edit_handle = None
+            if self.edit_rect != self.edit_start_rect and self.selected_index is not None:
+                self.apply_edit(("move", self.selected_index, self.edit_start_rect, self.edit_rect))
+            return
+
         if event.button() == Qt.LeftButton and self.drawing:
-            pos_in_label = self.image_label.mapFromParent(event.pos())
-            x = pos_in_label.x()
-            y = pos_in_label.y()
-
-            if (self.offset_x <= x <= self.offset_x + self.scaled_w and
-                    self.offset_y <= y <= self.offset_y + self.scaled_h):
-                img_x = (x - self.offset_x) / self.scale
-                img_y = (y - self.offset_y) / self.scale
-                pixmap = self.image_label.pixmap()
-                if pixmap:
-                    img_x = max(0, min(img_x, pixmap.width()))
-                    img_y = max(0, min(img_y, pixmap.height()))
-                    self.rect_end = QPoint(int(img_x), int(img_y))
-
-                    if abs(self.rect_end.x() - self.rect_start.x()) > 10 and abs(
-                            self.rect_end.y() - self.rect_start.y()) > 10:
-                        class_id = self.class_combo.currentIndex()
-                        x1 = min(self.rect_start.x(), self.rect_end.x())
-                        y1 = min(self.rect_start.y(), self.rect_end.y())
-                        x2 = max(self.rect_start.x(), self.rect_end.x())
-                        y2 = max(self.rect_start.y(), self.rect_end.y())
-                        self.rectangles.append([class_id, x1, y1, x2, y2])
-
-                    self.drawing = False
-                    self.show_image()
-
-    def resizeEvent(self, event):
-        """窗口大小改变时更新显示"""
-        self.show_image()
-        super().resizeEvent(event)
+            img_pos = self.finish_drag(event)
+            if img_pos is not None:
+                self.rect_end = (int(img_pos[0]), int(img_pos[1]))
+
+            if abs(self.rect_end[0] - self.rect_start[0]) > 10 and abs(
+                    self.rect_end[1] - self.rect_start[1]) > 10:
+                class_id = self.class_combo.currentIndex()
+                x1 = min(self.rect_start[0], self.rect_end[0])
+                y1 = min(self.rect_start[1], self.rect_end[1])
+                x2 = max(self.rect_start[0], self.rect_end[0])
+                y2 = max(self.rect_start[1], self.rect_end[1])
+                self.drawing = False
+                self.image_label.set_drag_rect(None)
+                self.apply_edit(("add", len(self.boxes), class_id, (x1, y1, x2, y2)))
+                return
+
+            self.drawing = False
+            self.image_label.set_drag_rect(None)
 
     def load_shortcuts(self):
-        """加载快捷键配置"""
-        try:
-            with open('resource/shortcuts.json', 'r') as f:
-                self.shortcuts = json.load(f)
-
-        except (FileNotFoundError, json.JSONDecodeError):
-            # 如果文件不存在或格式错误，使用默认配置
-            self.shortcuts = {
-                "open_btn": "Ctrl+O",
-                "prev_btn": "Left",
-                "next_btn": "Right",
-                "save_btn": "Ctrl+S",
-                "del_btn": "Ctrl+D",
-                "setting_btn": "Ctrl+I",
-                "class_combo": "Ctrl+Q"
-            }
-            # 可以保存默认配置到文件
-            self.save_shortcuts()
+        """从共享配置读取快捷键（缺少的项已用默认值补齐）"""
+        self.shortcuts = shortcuts_store().as_dict()
 
     def load_config(self):
-        """加载快捷键配置"""
-        try:
-            with open('resource/config.json', 'r') as f:
-                self.config = json.load(f)
-
-        except (FileNotFoundError, json.JSONDecodeError):
-            # 如果文件不存在或格式错误，使用默认配置
-            self.config = {
-                "open_default_dir": "C:/Users",
-                "classes": [
-                    {
-                        "label": "Category1",
-                        "r": 255,
-                        "g": 0,
-                        "b": 0
-                    },
-                    {
-                        "label": "Category2",
-                        "r": 255,
-                        "g": 170,
-                        "b": 0
-                    },
-                    {
-                        "label": "Category3",
-                        "r": 169,
-                        "g": 255,
-                        "b": 0
-                    },
-                    {
-                        "label": "Category4",
-                        "r": 0,
-                        "g": 255,
-                        "b": 0
-                    },
-                    {
-                        "label": "Category5",
-                        "r": 0,
-                        "g": 255,
-                        "b": 170
-                    },
-                    {
-                        "label": "Category6",
-                        "r": 0,
-                        "g": 169,
-                        "b": 255
-                    },
-                    {
-                        "label": "Category7",
-                        "r": 0,
-                        "g": 0,
-                        "b": 255
-                    },
-                    {
-                        "label": "Category8",
-                        "r": 170,
-                        "g": 0,
-                        "b": 255
-                    },
-                    {
-                        "label": "Category9",
-                        "r": 255,
-                        "g": 0,
-                        "b": 169
-                    }
-                ]
-            }
-            self.save_config()
+        """从共享配置读取默认目录和类别"""
+        self.config = config_store()
         self.open_default_dir = self.config["open_default_dir"]
 
         self.classes = [item['label'] for item in self.config["classes"]]
         self.classes_colors = [(item["b"], item["g"], item["r"],) for item in self.config["classes"]]
 
-    def save_config(self):
-        """保存快捷键配置到文件"""
-        with open('resource/config.json', 'w') as f:
-            json.dump(self.config, f, indent=4)
+    def on_config_changed(self, key):
+        """其他窗口修改了配置"""
+        if key == "classes":
+            self.reload_all_setting()
+        elif key == "open_default_dir":
+            self.open_default_dir = self.config["open_default_dir"]
 
-    def save_shortcuts(self):
-        """保存快捷键配置到文件"""
-        with open('resource/shortcuts.json', 'w') as f:
-            json.dump(self.shortcuts, f, indent=4)
+    def on_shortcuts_changed(self, key):
+        self.load_shortcuts()
+        self.update_tooltips()
 
     def reload_all_setting(self):
         self._is_programmatic_change = True
@@ -483,15 +854,25 @@ class LabelTool(QMainWindow):
         self.load_config()
         self.class_combo.clear()  # 移除所有现有选项
         self.class_combo.addItems(self.classes)  # 重新添加新的选项
+        self.image_label.set_palette(self.classes, self.classes_colors)
+        self.class_picker.set_classes(self.classes, self.classes_rgb())
+        self.recent_classes = [class_id for class_id in self.recent_classes if class_id < len(self.classes)]
+        self.remember_class(self.class_combo.currentIndex())
+        if self.filter_window is not None:
+            self.filter_window.set_classes(self.classes)
         self._is_programmatic_change = False
 
     def open_setting(self):
         if self.setting_window is None:
-            self.setting_window = MainWindow(self.reload_all_setting)
+            self.setting_window = MainWindow()  # 设置的修改通过共享配置的变更信号通知
         self.setting_window.show()
 
     def keyPressEvent(self, event):
         """键盘事件"""
+        # 快速浏览中按下其他键（删除、撤销、选类别等）时先完整加载当前图片，编辑不会落到上一张图片上
+        if self.rapid_scrolling and not event.isAutoRepeat():
+            self.settle_scroll()
+
         # 获取当前按下的组合键
         modifiers = event.modifiers()
         key = event.key()
@@ -520,23 +901,62 @@ class LabelTool(QMainWindow):
                 if action == "open_btn":
                     self.open_image_dir()
                 elif action == "prev_btn":
-                    self.prev_image()
+                    if event.isAutoRepeat():
+                        self.rapid_step(-1)
+                    else:
+                        self.prev_image()
                 elif action == "next_btn":
-                    self.next_image()
+                    if event.isAutoRepeat():
+                        self.rapid_step(1)
+                    else:
+                        self.next_image()
                 elif action == "save_btn":
-                    self.save_labels()
+                    self.save_labels(explicit=True)
                 elif action == "del_btn":
-                    self.delete_last_rect()
+                    self.delete_selected_rect()
                 elif action == "class_combo":
                     self.next_class()
+                elif action == "class_picker":
+                    self.open_class_picker()
+                elif action == "undo_btn":
+                    self.undo_edit()
+                elif action == "redo_btn":
+                    self.redo_edit()
+                elif action == "next_unlabeled_btn":
+                    self.next_unlabeled()
 
                 elif action == "setting_btn":
                     self.open_setting()
                 return
 
+        # 数字键1~9、0选择前10个类别，Alt+数字键选择最近使用的类别
+        if Qt.Key_0 <= key <= Qt.Key_9:
+            digit = key - Qt.Key_0
+            if modifiers in (Qt.NoModifier, Qt.KeypadModifier):
+                self.select_class((digit - 1) % 10)
+                return
+            if modifiers == Qt.AltModifier and digit:
+                self.select_recent_class(digit)
+                return
+
+        # Delete删除选中的框，Esc取消选中
+        if key == Qt.Key_Delete and self.selected_index is not None:
+            self.delete_selected_rect()
+            return
+        if key == Qt.Key_Escape and self.selected_index is not None:
+            self.select_box(None)
+            return
+
         # 如果没有匹配的自定义快捷键，执行默认操作
         super().keyPressEvent(event)
 
+    def keyReleaseEvent(self, event):
+        """松开翻页键时立即加载停下的图片（按键自动重复产生的释放事件忽略）"""
+        if self.rapid_scrolling and not event.isAutoRepeat():
+            self.settle_scroll()
+            return
+        super().keyReleaseEvent(event)
+
     def get_class_combo_select(self):
         """返回class_combo选中的文本，颜色，序号"""
         color = self.classes_colors[self.class_combo.currentIndex()]
@@ -574,45 +994,180 @@ class LabelTool(QMainWindow):
 
         return None
 
-    def save_labels(self):
-        """保存标注为YOLO格式"""
+    def save_labels(self, explicit=False):
+        """
+        保存标注为YOLO格式（写入由后台队列完成）
+
+        翻页等自动保存时，没有修改且标注文件已存在就不写盘；
+        explicit为True（保存按钮或快捷键）时总是写入，没有框的图片也会得到空标注文件
+        """
         if not self.image_path or self.current_image is None:
             return
-
         label_path = self.get_label_path()
-        img_h, img_w = self.current_image.shape[:2]
-
-        with open(label_path, 'w') as f:
-            for rect in self.rectangles:
-                class_id, x1, y1, x2, y2 = rect
-                x_center = ((x1 + x2) / 2) / img_w
-                y_center = ((y1 + y2) / 2) / img_h
-                width = (x2 - x1) / img_w
-                height = (y2 - y1) / img_h
-                f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+        if not explicit and not self.labels_dirty and os.path.exists(label_path):
+            return
+
+        text = self.boxes.to_yolo_text(self.image_size)
+        self.label_writer.submit(label_path, text)
+        self.journal.record_save(label_path, text)
+        if self.project is not None:
+            self.project.update_labels(self.image_rel_path, self.boxes)
+            if self.project_builder is None:
+                self.update_project_label()
+        self.labels_dirty = False
         self.statusBar().showMessage(f"标注已保存到: {label_path}")
         self.statusBar().setToolTip(f"路径: {label_path}")
 
+    def on_label_write_failed(self, label_path, error):
+        """后台写标注失败时提示"""
+        self.statusBar().showMessage(f"保存标注失败: {label_path} ({error})")
+        QMessageBox.warning(self, "保存失败", f"标注文件写入失败:\n{label_path}\n{error}")
+
+    def delete_selected_rect(self):
+        """删除选中的标注框，没有选中时删除最后一个"""
+        self.settle_scroll()
+        if self.selected_index is None:
+            self.delete_last_rect()
+            return
+        self.delete_rect(self.selected_index)
+        self.statusBar().showMessage("已删除选中的标注框")
+
     def delete_last_rect(self):
         """删除最后一个标注框"""
-        if self.rectangles:
-            self.rectangles.pop()
-            self.show_image()
+        if len(self.boxes):
+            self.delete_rect(len(self.boxes) - 1)
             self.statusBar().showMessage("已删除最后一个标注框")
 
+    def delete_rect(self, index):
+        box = self.boxes[index]
+        self.apply_edit(("delete", index, box[0], box[1:5]))
+
+    def apply_edit(self, command):
+        """执行一条编辑命令并记入撤销历史（所有对标注框的修改都经过这里）"""
+        self.journal_edit(command)
+        apply_command(self.boxes, command)
+        self.history.record(self.label_path, command)
+        kind = command[0]
+        self.refresh_after_edit(command, removed=kind == "delete", select=kind in ("move", "class"))
+
+    def undo_edit(self):
+        """撤销当前图片的上一次编辑"""
+        self.settle_scroll()
+        if self.current_image is None or self.drawing or self.edit_handle is not None:
+            return
+        if not self.history.can_undo(self.label_path):
+            self.statusBar().showMessage("没有可以撤销的操作")
+            return
+        self.journal_edit(invert_command(self.history.peek_undo(self.label_path)))
+        command = self.history.undo(self.label_path, self.boxes)
+        removed = command[0] == "add"
+        self.refresh_after_edit(command, removed=removed, select=not removed)
+        self.statusBar().showMessage(f"已撤销: {self.describe_command(command)}")
+
+    def redo_edit(self):
+        """重做当前图片上一次撤销的编辑"""
+        self.settle_scroll()
+        if self.current_image is None or self.drawing or self.edit_handle is not None:
+            return
+        if not self.history.can_redo(self.label_path):
+            self.statusBar().showMessage("没有可以重做的操作")
+            return
+        self.journal_edit(self.history.peek_redo(self.label_path))
+        command = self.history.redo(self.label_path, self.boxes)
+        removed = command[0] == "delete"
+        self.refresh_after_edit(command, removed=removed, select=not removed)
+        self.statusBar().showMessage(f"已重做: {self.describe_command(command)}")
+
+    def journal_edit(self, command):
+        """执行编辑前先写预写日志；该文件在日志中的第一次编辑前先记下当前文件内容的哈希"""
+        if not self.journal.has_chain(self.label_path):
+            base_text = self.label_writer.pending_text(self.label_path)
+            if base_text is None:
+                base_text = read_label_text(self.label_path)
+            self.journal.begin(self.label_path, self.image_size, base_text)
+        self.journal.record_edit(self.label_path, command)
+
+    def compact_journal(self):
+        """日志过大且所有标注都已落盘时清空日志"""
+        if (self.journal.size() > self.config.get("journal_compact_bytes", 4 * 1024 * 1024)
+                and not self.labels_dirty and self.label_writer.pending_count() == 0
+                and self.label_writer.failed_count() == 0):
+            self.journal.truncate()
+
+    def refresh_after_edit(self, command, removed, select):
+        """命令执行后同步空间索引、保存状态、画布和选中框"""
+        kind, index = command[0], command[1]
+        if kind == "move":
+            self.box_index.update(index, self.boxes.rect(index))
+        elif kind == "add" and not removed and index == len(self.boxes) - 1:
+            self.box_index.insert(index, self.boxes.rect(index))
+        elif kind != "class":
+            self.box_index.rebuild(self.boxes)  # 中间插入/删除后下标移动，需要重建索引
+        self.labels_dirty = True
+        self.show_image()
+        self.select_box(index if select else None)
+
+    @staticmethod
+    def describe_command(command):
+        return {"add": "添加标注框", "delete": "删除标注框", "move": "移动/调整标注框",
+                "class": "修改类别"}[command[0]]
+
     def prev_image(self):
         """上一张图片"""
-        if hasattr(self, 'image_files') and self.current_index > 0:
-            self.save_labels()
-            self.current_index -= 1
-            self.load_image(os.path.join(self.image_dir, self.image_files[self.current_index]))
+        self.goto_image(self.current_index - 1)
 
     def next_image(self):
         """下一张图片"""
-        if hasattr(self, 'image_files') and self.current_index < len(self.image_files) - 1:
+        self.goto_image(self.current_index + 1)
+
+    def goto_image(self, index):
+        """跳转到指定序号的图片（保存当前图片的标注）"""
+        if not 0 <= index < len(self.image_files):
+            return
+        if self.rapid_scrolling:
+            # 快速浏览中序号已经变了，但显示的还不是这张图片
+            self.rapid_scrolling = False
+            self.settle_timer.stop()
+        elif index == self.current_index:
+            return
+        self.compact_journal()
+        self.save_labels()
+        self.navigated = True
+        self.current_index = index
+        self.load_image(os.path.join(self.image_dir, self.image_files[self.current_index]))
+
+    def rapid_step(self, delta):
+        """
+        快速浏览：按键自动重复时只移动序号并显示磁盘缓存中的缩略图，
+        不解码原图、不读写标注；停下后由settle_scroll完整加载
+        """
+        index = max(0, min(self.current_index + delta, len(self.image_files) - 1))
+        if not self.image_files or index == self.current_index:
+            return
+        if not self.rapid_scrolling:
+            # 离开当前图片前先保存，后台写队列中的内容不受快速浏览影响
             self.save_labels()
-            self.current_index += 1
-            self.load_image(os.path.join(self.image_dir, self.image_files[self.current_index]))
+            self.select_box(None)
+            self.drawing = False
+            self.edit_handle = None
+            self.image_label.set_drag_rect(None)
+            self.rapid_scrolling = True
+        self.current_index = index
+
+        rel_path = self.image_files[index]
+        data = self.filmstrip.model.thumbnails.cached(os.path.join(self.image_dir, rel_path))
+        thumbnail = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) if data else None
+        if thumbnail is not None:
+            self.image_label.set_image(thumbnail)
+            self.image_label.set_boxes(BoxStore())
+        self.filmstrip.set_current(index)
+        self.statusBar().showMessage(f"快速浏览 {index + 1}/{len(self.image_files)}: {rel_path}")
+        self.settle_timer.start()
+
+    def settle_scroll(self):
+        """快速浏览停下：完整加载当前序号的图片和标注"""
+        if self.rapid_scrolling:
+            self.goto_image(self.current_index)
 
     def generate_rainbow_colors(self, n, s=1.0, l=0.5):
         colors = []
@@ -623,11 +1178,61 @@ class LabelTool(QMainWindow):
         return colors
 
     def deal_dir(self, need_deal_dir):
-        self.deal_windows = ImageResizerApp(callbacks=self.open_image_dir_check_ok, deal_dir=need_deal_dir)
+        self.deal_windows = ImageResizerApp(callbacks=self.open_resized_dir, deal_dir=need_deal_dir)
         self.deal_windows.show()
 
+    def open_resized_dir(self, dir_path):
+        """
+        缩放处理完成：输出文件夹可能就是当前文件夹（图片被原地改写），
+        先丢弃解码缓存、瓦片金字塔和内存中的缩略图，再强制重新扫描
+        （磁盘缩略图以修改时间为键，改写后自动失效）
+        """
+        self.prefetcher.invalidate()
+        self.image_label.set_image(None)
+        self.filmstrip.set_files(self.image_dir, [])
+        self.open_image_dir_check_ok(dir_path, force=True)
+
     def closeEvent(self, event):
-        sys.exit()
+        """
+        关闭窗口时保存当前图片
+
+        常驻启动器中只隐藏窗口（后台线程和缓存保留，再次打开时直接复用），
+        否则等待后台写队列全部落盘后退出
+        """
+        if self.resident:
+            self.save_labels()
+            # 主窗口隐藏时，由它打开的设置、颜色提示、筛选等窗口一起隐藏
+            for window in (self.setting_window, self.color_show_window, self.check_window,
+                           self.deal_windows, self.filter_window):
+                if window is not None:
+                    window.hide()
+            event.accept()
+            return
+        self.shutdown()
+        event.accept()
+        QApplication.quit()
+
+    def quit_app(self):
+        """退出程序（尺寸检查中选择取消时）：先保存标注、关闭日志，再退出事件循环"""
+        self.shutdown()
+        QApplication.quit()
+
+    def shutdown(self):
+        """停止后台线程并等待标注全部落盘（可重复调用）"""
+        if self.is_shut_down:
+            return
+        self.is_shut_down = True
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+        self.save_labels()
+        self.close_project()
+        self.prefetcher.shutdown()
+        self.filmstrip.close_cache()
+        # 标注全部写入成功才清空预写日志，否则留给下次启动时恢复
+        self.journal.close(truncate=self.label_writer.close())
+        self.config.flush()
+        shortcuts_store().flush()
 
 
 if __name__ == "__main__":
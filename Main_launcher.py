@@ -1,45 +1,254 @@
+import getpass
+import importlib
+import json
+import os
 import sys
-from PyQt5.QtWidgets import QApplication
+import time
+import unicodedata
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
 
+from SvgRenderer import get_main_svg_icon, set_svg_icon_from_string
 
-def main():
-    app = QApplication(sys.argv)
+# 各工具：(命令行参数, 名称, 模块, 窗口类)；模块在打开工具时才导入
+TOOLS = [
+    ('--class-mapping', '类别映射生成器', 'AutoCreateCategory', 'ClassMappingGenerator'),
+    ('--image-resizer', '批量图片处理器', 'DealImagesGUI', 'ImageResizerApp'),
+    ('--file-renamer', '文件重命名工具', 'FileRename', 'FileRenamer'),
+    ('--label-tool', 'YOLO标注工具', 'MainGUI', 'LabelTool'),
+    ('--dataset-split', '数据集分割工具', 'SplitDataSets', 'DatasetSplitApp'),
+]
 
-    # 获取命令行参数
-    args = set(sys.argv[1:])  # 使用集合去重
+# 常驻实例监听的本地套接字名（按用户区分）
+SERVER_NAME = f"yolo-dataset-tools-{getpass.getuser()}"
 
-    # 默认启动所有窗口（无参数时）
-    if not args:
-        args = {'--all'}
 
-    windows = []
+def load_tool(module_name, class_name):
+    """导入工具模块，返回窗口类"""
+    return getattr(importlib.import_module(module_name), class_name)
 
-    # 根据参数创建对应的窗口实例
-    if '--all' in args or '--class-mapping' in args:
-        from AutoCreateCategory import ClassMappingGenerator
-        windows.append(ClassMappingGenerator())
 
-    if '--all' in args or '--image-resizer' in args:
-        from DealImagesGUI import ImageResizerApp
-        windows.append(ImageResizerApp())
+def parse_args(args):
+    """
+    解析命令行，返回 [(工具参数, 路径或None)]
 
-    if '--all' in args or '--file-renamer' in args:
-        from FileRename import FileRenamer
-        windows.append(FileRenamer())
+    工具参数后面紧跟的非选项参数是要打开的路径，如 --label-tool D:/data/images；--all 展开为所有工具
+    """
+    requests = []
+    for arg in args:
+        if arg == '--all':
+            requests.extend((flag, None) for flag, *_ in TOOLS)
+        elif any(arg == flag for flag, *_ in TOOLS):
+            requests.append((arg, None))
+        elif not arg.startswith('--') and requests and requests[-1][1] is None:
+            requests[-1] = (requests[-1][0], arg)
+    return requests
 
-    if '--all' in args or '--label-tool' in args:
-        from MainGUI import LabelTool
-        windows.append(LabelTool())
 
-    if '--all' in args or '--dataset-split' in args:
-        from SplitDataSets import DatasetSplitApp
-        windows.append(DatasetSplitApp())
+def forward_to_running_instance(args, timeout_ms=300):
+    """已有常驻实例时把命令行（路径按当前目录转为绝对路径）转发给它，成功返回True"""
+    socket = QLocalSocket()
+    socket.connectToServer(SERVER_NAME)
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    args = [arg if arg.startswith('--') else os.path.abspath(arg) for arg in args]
+    socket.write((json.dumps(args) + "\n").encode('utf-8'))
+    sent = socket.waitForBytesWritten(timeout_ms)
+    socket.disconnectFromServer()
+    return sent
 
-    # 显示所有请求的窗口
-    for window in windows:
+
+class InstanceServer(QObject):
+    """常驻实例的本地套接字服务：每个连接发送一行JSON（命令行参数列表）"""
+    args_received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+        self._buffers = {}  # 连接 -> 尚未收到换行的数据
+
+    def listen(self):
+        """开始监听（只允许当前用户连接），上次异常退出残留的套接字会先被清理"""
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        if self.server.listen(SERVER_NAME):
+            return True
+        QLocalServer.removeServer(SERVER_NAME)
+        return self.server.listen(SERVER_NAME)
+
+    def close(self):
+        self.server.close()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self.on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self.on_disconnected(s))
+
+    def on_ready_read(self, socket):
+        data = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        while b"\n" in data:
+            line, data = data.split(b"\n", 1)
+            try:
+                args = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+            if isinstance(args, list):
+                self.args_received.emit([str(arg) for arg in args])
+        self._buffers[socket] = data
+
+    def on_disconnected(self, socket):
+        if socket.bytesAvailable():
+            self.on_ready_read(socket)
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+
+class LauncherHub(QWidget):
+    """
+    启动器：只显示各工具的按钮，点击时才导入模块并创建窗口（已创建的窗口直接重新显示）
+
+    resident为True时作为常驻实例运行：工具窗口关闭后只隐藏，下次打开直接复用；
+    关闭启动器窗口时才退出进程
+    """
+
+    def __init__(self, resident=False):
+        super().__init__()
+        self.resident = resident
+        self.setWindowTitle("YOLO数据集工具箱")
+        self.setGeometry(300, 200, 300, 260)
+        self.windows = {}  # 命令行参数 -> 已创建的窗口
+
+        layout = QVBoxLayout()
+        for flag, title, module_name, class_name in TOOLS:
+            button = QPushButton(title)
+            button.clicked.connect(lambda _checked, f=flag: self.open_tool(f))
+            layout.addWidget(button)
+        self.status_label = QLabel("点击打开工具")
+        self.status_label.setStyleSheet("color: green; font-size: 10px;")
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+        set_svg_icon_from_string(self, get_main_svg_icon())
+
+    def open_tool(self, flag, path=None):
+        window = self.windows.get(flag)
+        if window is None:
+            _, title, module_name, class_name = next(tool for tool in TOOLS if tool[0] == flag)
+            self.status_label.setText(f"正在打开{title}...")
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                window = self.windows[flag] = load_tool(module_name, class_name)()
+            finally:
+                QApplication.restoreOverrideCursor()
+            if hasattr(window, 'resident'):
+                window.resident = self.resident
+            self.status_label.setText(f"已打开{title}")
+        if path is not None and hasattr(window, 'open_path'):
+            window.open_path(path)
+        if window.isMinimized():
+            window.showNormal()
+        else:
+            window.show()
+        window.raise_()
+        window.activateWindow()
+
+    def handle_args(self, args):
+        """处理本进程或其他进程转发来的命令行，没有指定工具时显示启动器"""
+        requests = parse_args(args)
+        for flag, path in requests:
+            self.open_tool(flag, path)
+        if not requests:
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+
+    def shutdown_tools(self):
+        """进程退出前让工具保存数据、停止后台线程"""
+        for window in self.windows.values():
+            if hasattr(window, 'shutdown'):
+                window.shutdown()
+
+    def closeEvent(self, event):
+        if self.resident:
+            QApplication.quit()
+        super().closeEvent(event)
+
+
+def pad_to_width(text, width, left=False):
+    """按终端显示宽度（中文占两列）用空格补齐到width列"""
+    padding = " " * max(0, width - sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text))
+    return text + padding if left else padding + text
+
+
+def profile_startup(app, flags):
+    """逐个导入并创建工具窗口，打印各自的导入、创建和首次显示耗时（导入时间不含已被前面的工具加载的依赖）"""
+    # 表头与数据行使用相同的列宽（24列名称 + 3个10列的耗时）
+    print(pad_to_width('工具', 24, left=True)
+          + "".join(pad_to_width(title, 10) for title in ('导入', '创建', '显示')))
+    t0 = time.perf_counter()
+    hub = LauncherHub()
+    t1 = time.perf_counter()
+    hub.show()
+    app.processEvents()
+    print(f"{'LauncherHub':<24}{0:>10.1f}{(t1 - t0) * 1000:>10.1f}{(time.perf_counter() - t1) * 1000:>10.1f} ms")
+
+    windows = []
+    for flag, title, module_name, class_name in TOOLS:
+        if flags and flag not in flags:
+            continue
+        t0 = time.perf_counter()
+        window_class = load_tool(module_name, class_name)
+        t1 = time.perf_counter()
+        window = window_class()
+        t2 = time.perf_counter()
         window.show()
+        app.processEvents()
+        t3 = time.perf_counter()
+        windows.append(window)
+        print(f"{class_name:<24}{(t1 - t0) * 1000:>10.1f}{(t2 - t1) * 1000:>10.1f}{(t3 - t2) * 1000:>10.1f} ms")
+
+    for window in windows:
+        window.close()
+    hub.close()
+
+
+def main():
+    # 获取命令行参数
+    args = sys.argv[1:]
+
+    if '--profile-startup' in args:
+        app = QApplication(sys.argv)
+        profile_startup(app, {flag for flag, _ in parse_args(args)})
+        return
+
+    # 已有常驻实例时转发命令行后立即退出（不创建QApplication，也不导入任何工具）
+    standalone = '--standalone' in args
+    if not standalone and forward_to_running_instance(args):
+        return
+
+    app = QApplication(sys.argv)
+    hub = LauncherHub(resident=not standalone)
+    server = None
+    if not standalone:
+        server = InstanceServer(hub)
+        server.args_received.connect(hub.handle_args)
+        if server.listen():
+            # 工具窗口都关闭后进程继续常驻，关闭启动器窗口时才退出
+            app.setQuitOnLastWindowClosed(False)
+        else:
+            hub.resident = False
+    app.aboutToQuit.connect(hub.shutdown_tools)
 
-    sys.exit(app.exec_())
+    # 无参数时只显示启动器，工具在点击时才加载；指定了工具时启动器最小化显示
+    if parse_args(args):
+        hub.showMinimized()
+    hub.handle_args(args)
+    exit_code = app.exec_()
+    if server is not None:
+        server.close()
+    sys.exit(exit_code)
 
 
 if __name__ == '__main__':
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['AutoCreateCategory', 'DealImagesGUI', 'FileRename', 'MainGUI', 'SplitDataSets'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,332 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from BatchCore import label_path_for
+from BoxStore import BoxStore
+from ImageHeader import read_image_size
+
+PROJECT_INDEX_DIR = os.path.join("resource", "cache", "projects")
+
+# 标注状态
+LABEL_MISSING = 0  # 没有标注文件（未标注）
+LABEL_EMPTY = 1  # 有标注文件但没有框（负样本）
+LABEL_BOXES = 2  # 有框
+
+# 排序方式 -> ORDER BY 子句
+SORT_ORDERS = {
+    "name": "seq",
+    "status": "status IS NULL, status, seq",
+    "boxes": "box_count IS NULL, box_count DESC, seq",
+}
+
+# 表结构版本，结构变化时丢弃旧索引重建（索引可以从图片和标注文件完全再生成）
+SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    rel_path TEXT NOT NULL UNIQUE,
+    seq INTEGER,                -- 在自然排序的文件列表中的序号
+    width INTEGER,
+    height INTEGER,
+    label_path TEXT,
+    status INTEGER,             -- LABEL_MISSING / LABEL_EMPTY / LABEL_BOXES，未扫描时为NULL
+    box_count INTEGER,
+    class_counts TEXT,          -- JSON: {"类别序号": 框数}
+    image_mtime_ns INTEGER,
+    label_mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_images_seq ON images(seq);
+CREATE INDEX IF NOT EXISTS idx_images_status_seq ON images(status, seq);
+CREATE TABLE IF NOT EXISTS boxes (
+    image_id INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    width REAL,                 -- 原图像素，图片尺寸未知时为NULL
+    height REAL,
+    aspect REAL                 -- 宽/高
+);
+CREATE INDEX IF NOT EXISTS idx_boxes_class ON boxes(class_id, image_id);
+CREATE INDEX IF NOT EXISTS idx_boxes_image ON boxes(image_id);
+CREATE INDEX IF NOT EXISTS idx_boxes_width ON boxes(width);
+CREATE INDEX IF NOT EXISTS idx_boxes_height ON boxes(height);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_IMAGE_ID = "(SELECT id FROM images WHERE rel_path=?)"
+
+
+def label_summary(classes):
+    """由类别数组计算 (状态, 框数, 各类别框数JSON)"""
+    classes = np.asarray(classes, dtype=np.int64)
+    if not len(classes):
+        return LABEL_EMPTY, 0, "{}"
+    ids, counts = np.unique(classes, return_counts=True)
+    return LABEL_BOXES, len(classes), json.dumps(dict(zip(map(str, ids.tolist()), counts.tolist())))
+
+
+def box_rows(rel_path, store, has_size=True):
+    """BoxStore -> boxes表的行 (相对路径, 类别, 宽, 高, 宽高比)，没有像素尺寸时宽高为NULL"""
+    if not len(store):
+        return []
+    coords = store.coords.astype(np.float64)
+    widths = coords[:, 2] - coords[:, 0]
+    heights = coords[:, 3] - coords[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aspects = np.where(heights > 0, widths / heights, np.nan)
+    aspects = [None if np.isnan(a) else a for a in aspects.tolist()]
+    if not has_size:
+        return [(rel_path, c, None, None, a) for c, a in zip(store.classes.tolist(), aspects)]
+    return list(zip([rel_path] * len(store), store.classes.tolist(), widths.tolist(), heights.tolist(), aspects))
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ProjectIndex:
+    """
+    图片文件夹的项目索引（SQLite）
+
+    每张图片一行：尺寸、标注路径、标注状态、框数、各类别框数和修改时间，另有meta表保存上次浏览的图片。
+    boxes表每个框一行（类别、像素宽高、宽高比），用于按类别、框大小、框数筛选图片。
+    (status, seq)、class_id、width、height 上有索引，"下一张未标注"等查询是O(log n)的。
+    每个线程使用自己的连接（WAL模式，读写互不阻塞）。
+    """
+
+    def __init__(self, image_dir, db_path=None):
+        self.image_dir = image_dir
+        if db_path is None:
+            key = hashlib.sha1(os.path.abspath(image_dir).encode('utf-8')).hexdigest()
+            db_path = os.path.join(PROJECT_INDEX_DIR, f"{key}.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS images; DROP TABLE IF EXISTS boxes; DROP TABLE IF EXISTS meta;")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- meta ----------
+
+    def get_meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        with self._conn() as conn:
+            conn.execute("INSERT INTO meta(key, value) VALUES(?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, value))
+
+    # ---------- 文件列表 ----------
+
+    def set_order(self, files):
+        """同步文件列表（自然排序后的相对路径），列表没变时什么也不做"""
+        digest = hashlib.sha1("\n".join(files).encode('utf-8')).hexdigest()
+        if self.get_meta("files_hash") == digest:
+            return
+        with self._conn() as conn:
+            conn.execute("UPDATE images SET seq=NULL")
+            conn.executemany("INSERT INTO images(rel_path, seq) VALUES(?, ?) "
+                             "ON CONFLICT(rel_path) DO UPDATE SET seq=excluded.seq",
+                             ((rel_path, seq) for seq, rel_path in enumerate(files)))
+            conn.execute("DELETE FROM boxes WHERE image_id IN (SELECT id FROM images WHERE seq IS NULL)")
+            conn.execute("DELETE FROM images WHERE seq IS NULL")
+            conn.execute("INSERT INTO meta(key, value) VALUES('files_hash', ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value=excluded.value", (digest,))
+
+    def known_mtimes(self):
+        """{相对路径: (图片mtime, 标注mtime)}，用于增量扫描"""
+        rows = self._conn().execute("SELECT rel_path, image_mtime_ns, label_mtime_ns FROM images")
+        return {rel_path: (image_mtime, label_mtime) for rel_path, image_mtime, label_mtime in rows}
+
+    def scan_file(self, rel_path, known=None):
+        """
+        读取一张图片的尺寸和标注，返回可直接写入的 (图片行, 框行列表)；mtime与known相同时返回None
+
+        只解析文件头取尺寸，不解码图片
+        """
+        image_path = os.path.join(self.image_dir, rel_path)
+        label_path = label_path_for(self.image_dir, rel_path)
+        image_mtime = _mtime_ns(image_path)
+        label_mtime = _mtime_ns(label_path)
+        if known is not None and known == (image_mtime, label_mtime):
+            return None
+
+        size = read_image_size(image_path)
+        boxes = []
+        if label_mtime is None:
+            status, box_count, class_counts = LABEL_MISSING, 0, "{}"
+        else:
+            store = BoxStore.load(label_path, size)
+            status, box_count, class_counts = label_summary(store.classes)
+            boxes = box_rows(rel_path, store, size is not None)
+        size = size or (None, None)
+        return (size[0], size[1], label_path, status, box_count, class_counts,
+                image_mtime, label_mtime, rel_path), boxes
+
+    def write_rows(self, results):
+        """写入scan_file的结果"""
+        with self._conn() as conn:
+            conn.executemany("UPDATE images SET width=?, height=?, label_path=?, status=?, box_count=?, "
+                             "class_counts=?, image_mtime_ns=?, label_mtime_ns=? WHERE rel_path=?",
+                             (row for row, _ in results))
+            self._replace_boxes(conn, [row[-1] for row, _ in results],
+                                [box for _, boxes in results for box in boxes])
+
+    def update_labels(self, rel_path, store):
+        """保存标注后用BoxStore（原图像素坐标）更新该图片的标注统计（标注mtime置空，下次扫描时重新核对）"""
+        status, box_count, class_counts = label_summary(store.classes)
+        with self._conn() as conn:
+            conn.execute("UPDATE images SET status=?, box_count=?, class_counts=?, label_mtime_ns=NULL "
+                         "WHERE rel_path=?", (status, box_count, class_counts, rel_path))
+            self._replace_boxes(conn, [rel_path], box_rows(rel_path, store))
+
+    @staticmethod
+    def _replace_boxes(conn, rel_paths, boxes):
+        conn.executemany(f"DELETE FROM boxes WHERE image_id={_IMAGE_ID}", ((p,) for p in rel_paths))
+        conn.executemany("INSERT INTO boxes(image_id, class_id, width, height, aspect) "
+                         "SELECT id, ?, ?, ?, ? FROM images WHERE rel_path=?",
+                         ((c, w, h, a, p) for p, c, w, h, a in boxes))
+
+    # ---------- 查询 ----------
+
+    def seq_of(self, rel_path):
+        row = self._conn().execute("SELECT seq FROM images WHERE rel_path=?", (rel_path,)).fetchone()
+        return None if row is None else row[0]
+
+    def next_with_status(self, seq, status=LABEL_MISSING, wrap=True):
+        """序号大于seq的第一张指定状态的图片 (序号, 相对路径)，到末尾后从头找；没有返回None"""
+        sql = "SELECT seq, rel_path FROM images WHERE status=? AND seq>? ORDER BY seq LIMIT 1"
+        row = self._conn().execute(sql, (status, seq)).fetchone()
+        if row is None and wrap:
+            row = self._conn().execute(sql, (status, -1)).fetchone()
+        return row
+
+    def query(self, order="name", class_id=None, max_size=None, min_size=None,
+              min_aspect=None, max_aspect=None, min_count=None, max_count=None):
+        """
+        按条件筛选图片，返回按order排序的相对路径列表（不给条件时返回全部图片）
+
+        框的条件需要由同一个框满足:
+            class_id: 框的类别
+            max_size: 框的宽或高小于该像素数
+            min_size: 框的宽或高大于该像素数
+            min_aspect / max_aspect: 框的宽高比范围
+        min_count / max_count 是整张图片的框数范围
+        """
+        where, params = ["seq IS NOT NULL"], []
+        if min_count is not None:
+            where.append("box_count >= ?")
+            params.append(min_count)
+        if max_count is not None:
+            where.append("box_count <= ?")
+            params.append(max_count)
+
+        box_where, box_params = [], []
+        if class_id is not None:
+            box_where.append("class_id = ?")
+            box_params.append(class_id)
+        if max_size is not None:
+            box_where.append("(width < ? OR height < ?)")
+            box_params += [max_size, max_size]
+        if min_size is not None:
+            box_where.append("(width > ? OR height > ?)")
+            box_params += [min_size, min_size]
+        if min_aspect is not None:
+            box_where.append("aspect >= ?")
+            box_params.append(min_aspect)
+        if max_aspect is not None:
+            box_where.append("aspect <= ?")
+            box_params.append(max_aspect)
+        if box_where:
+            where.append(f"id IN (SELECT image_id FROM boxes WHERE {' AND '.join(box_where)})")
+            params += box_params
+
+        rows = self._conn().execute(f"SELECT rel_path FROM images WHERE {' AND '.join(where)} "
+                                    f"ORDER BY {SORT_ORDERS[order]}", params)
+        return [row[0] for row in rows]
+
+    def status_counts(self):
+        """{状态: 图片数}，未扫描的图片状态为None"""
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM images GROUP BY status")
+        return dict(rows.fetchall())
+
+
+class ProjectIndexBuilder(QThread):
+    """
+    在后台增量构建项目索引
+
+    先同步文件列表的顺序（大文件夹上要更新几十万行，不能放在界面线程），完成后发出order_synced；
+    然后只重新扫描图片或标注的mtime变化过的文件，文件头解析和标注统计在线程池中并行进行，
+    结果分批写入数据库
+    """
+    order_synced = pyqtSignal()
+    progress = pyqtSignal(int, int)  # 已处理数, 总数
+    build_finished = pyqtSignal(int)  # 本次重新扫描的文件数
+
+    BATCH_SIZE = 500
+
+    def __init__(self, project_index, files, workers=8):
+        super().__init__()
+        self.project_index = project_index
+        self.files = files
+        self.workers = workers
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        index = self.project_index
+        total = len(self.files)
+        scanned = 0
+        batch = []  # scan_file的结果 (图片行, 框行列表)
+        try:
+            index.set_order(self.files)
+            if not self._is_running:
+                return
+            self.order_synced.emit()
+            known = index.known_mtimes()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for start in range(0, total, self.BATCH_SIZE):
+                    if not self._is_running:
+                        break
+                    chunk = self.files[start:start + self.BATCH_SIZE]
+                    for result in pool.map(lambda f: index.scan_file(f, known.get(f)), chunk):
+                        if result is not None:
+                            batch.append(result)
+                    if batch:
+                        index.write_rows(batch)
+                        scanned += len(batch)
+                        batch = []
+                    self.progress.emit(min(start + self.BATCH_SIZE, total), total)
+        finally:
+            index.close()
+        if self._is_running:
+            self.build_finished.emit(scanned)
@@ -0,0 +1,92 @@
+import time
+
+from PyQt5.QtCore import Qt, QObject, QTimer
+from PyQt5.QtGui import QGuiApplication
+
+
+class RepaintScheduler(QObject):
+    """
+    拖拽重绘调度器
+
+    request()只记录最新的状态，按显示器刷新间隔最多调用一次render(最新状态)，
+    中间到达的鼠标事件被合并；上一帧还没有画完（frame_done尚未调用）时跳过这一帧，
+    状态留到下一个间隔再提交。frame_done(ms)由画布在每次绘制后调用，用于统计每帧耗时。
+    """
+
+    STALL_FRAMES = 4  # 提交后这么多个间隔仍未收到frame_done时不再等待（例如框在可见区域外没有触发绘制）
+
+    def __init__(self, render, interval_ms=None, parent=None):
+        super().__init__(parent)
+        self.render = render
+        if interval_ms is None:
+            screen = QGuiApplication.primaryScreen()
+            refresh_rate = screen.refreshRate() if screen is not None else 60.0
+            interval_ms = 1000.0 / (refresh_rate if refresh_rate > 0 else 60.0)
+        self.interval_ms = interval_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(max(1, int(interval_ms)))
+        self._timer.timeout.connect(self._tick)
+        self._pending = None
+        self._has_pending = False
+        self._awaiting_paint = False
+        self._submitted_at = 0.0
+        self.reset_stats()
+
+    def request(self, state):
+        """记录最新状态；空闲时立即提交，之后按帧间隔提交"""
+        self._pending = state
+        self._has_pending = True
+        self._requests += 1
+        if not self._timer.isActive():
+            self._timer.start()
+            self._tick()
+
+    def cancel(self):
+        """丢弃尚未提交的状态并停止计时器（拖拽结束时调用）"""
+        self._pending = None
+        self._has_pending = False
+        self._awaiting_paint = False
+        self._timer.stop()
+
+    def frame_done(self, paint_ms):
+        """画布绘制完一帧"""
+        if not self._awaiting_paint:
+            return
+        self._awaiting_paint = False
+        self._frames += 1
+        self._total_ms += paint_ms
+        self._max_ms = max(self._max_ms, paint_ms)
+
+    def reset_stats(self):
+        self._requests = 0
+        self._frames = 0
+        self._skipped = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    def stats(self):
+        """统计：收到的请求数、绘制帧数、跳过的帧数、每帧平均/最长绘制耗时（毫秒）"""
+        return {
+            "requests": self._requests,
+            "frames": self._frames,
+            "skipped": self._skipped,
+            "avg_ms": self._total_ms / self._frames if self._frames else 0.0,
+            "max_ms": self._max_ms,
+        }
+
+    def _tick(self):
+        if not self._has_pending:
+            self._timer.stop()
+            return
+        if self._awaiting_paint:
+            stalled = (time.perf_counter() - self._submitted_at) * 1000 > self.interval_ms * self.STALL_FRAMES
+            if not stalled:
+                self._skipped += 1
+                return
+        state = self._pending
+        self._pending = None
+        self._has_pending = False
+        self._awaiting_paint = True
+        self._submitted_at = time.perf_counter()
+        self.render(state)
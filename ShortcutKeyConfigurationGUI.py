@@ -1,10 +1,10 @@
 import sys
-import json
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget,
                              QLabel, QPushButton, QHBoxLayout, QMessageBox, QGroupBox)
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QKeySequence
 from SvgRenderer import get_shortcuts_svg_icon, set_svg_icon_from_string
+from ConfigStore import shortcuts_store
 
 
 class ShortcutRecorder(QMainWindow):
@@ -16,8 +16,8 @@ class ShortcutRecorder(QMainWindow):
         # 初始化按键映射
         self.init_key_map()
 
-        # 加载配置
-        self.config_file = "resource/shortcuts.json"
+        # 加载配置（与标注工具共用同一个配置实例）
+        self.store = shortcuts_store()
         self.config = self.load_config()
 
         # 初始化UI
@@ -54,15 +54,11 @@ class ShortcutRecorder(QMainWindow):
         self.modifiers = {Qt.Key_Control, Qt.Key_Alt, Qt.Key_Shift, Qt.Key_Meta}
 
     def load_config(self):
-        try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"buttonA": "Ctrl+A", "buttonB": "Ctrl+B"}
+        return self.store.as_dict()
 
     def save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        """修改写入共享配置（打开的窗口收到变更通知，写盘由配置实例延迟合并）"""
+        self.store.update(self.config)
 
     def create_shortcut_row(self, button_name, display_name):
         """创建单个快捷键设置行"""
@@ -141,6 +137,10 @@ class ShortcutRecorder(QMainWindow):
         self.button_e_group = self.create_shortcut_row("save_btn", "保存快捷键")
         self.button_f_group = self.create_shortcut_row("del_btn", "删除快捷键")
         self.button_g_group = self.create_shortcut_row("setting_btn", "设置快捷键")
+        self.button_h_group = self.create_shortcut_row("undo_btn", "撤销快捷键")
+        self.button_i_group = self.create_shortcut_row("redo_btn", "重做快捷键")
+        self.button_j_group = self.create_shortcut_row("next_unlabeled_btn", "下一张未标注快捷键")
+        self.button_k_group = self.create_shortcut_row("class_picker", "查找类别快捷键")
 
         layout.addWidget(self.button_a_group)
         layout.addWidget(self.button_b_group)
@@ -149,6 +149,10 @@ class ShortcutRecorder(QMainWindow):
         layout.addWidget(self.button_e_group)
         layout.addWidget(self.button_f_group)
         layout.addWidget(self.button_g_group)
+        layout.addWidget(self.button_h_group)
+        layout.addWidget(self.button_i_group)
+        layout.addWidget(self.button_j_group)
+        layout.addWidget(self.button_k_group)
 
         # 保存按钮
         save_btn = QPushButton("保存所有快捷键")
@@ -47,21 +47,18 @@ class ColorTextWindow(QWidget):
         set_svg_icon_from_string(self,get_show_svg_icon())
 
     def update_content(self, bg_color, classes_text, index):
-        """更新背景色和文字（自动适配文字颜色）"""
+        """更新背景色和文字（自动适配文字颜色），内容没变时什么也不做"""
+        if (bg_color, classes_text, index) == (self.bg_color, self.text, self.index):
+            return
+        if bg_color != self.bg_color:
+            # 直接修改窗口现有的调色板，不再每次创建新的
+            palette = self.palette()
+            palette.setColor(QPalette.Window, QColor(*bg_color))
+            palette.setColor(QPalette.WindowText, get_text_color(bg_color))
+            self.setPalette(palette)
         self.bg_color = bg_color
         self.text = classes_text
         self.index = index
 
-        # 计算合适的文字颜色（黑/白）
-        text_color = get_text_color(bg_color)
-
         # 更新标签文字
         self.label.setText("#" + str(self.index) + " " + self.text)
-
-        # 更新背景色和文字颜色
-        palette = self.palette()
-        palette.setColor(QPalette.Window, QColor(*bg_color))
-        palette.setColor(QPalette.WindowText, text_color)
-        self.setPalette(palette)
-
-
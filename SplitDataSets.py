@@ -2,20 +2,18 @@ import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QFileDialog, QMessageBox,
-                             QGroupBox, QDoubleSpinBox, QTextEdit, QScrollArea)
+                             QGroupBox, QDoubleSpinBox, QTextEdit, QScrollArea, QComboBox)
 from PyQt5.QtCore import Qt, QObject, pyqtSignal
 
-import os
-import random
-import shutil
-import json
-import yaml
-from pathlib import Path
-from tqdm import tqdm
 import io
 import contextlib
 
 from SvgRenderer import get_split_svg_icon, set_svg_icon_from_string
+from BatchCore import create_dataset_split, SPLIT_MODES
+
+# 文件生成方式下拉框的显示文字（顺序与SPLIT_MODES一致）
+LINK_MODE_NAMES = ("复制", "硬链接（同一磁盘，不占空间）", "符号链接", "reflink（写时复制）",
+                   "仅生成清单（train.txt/val.txt，不复制图片）")
 
 
 class EmittingStream(QObject):
@@ -105,14 +103,36 @@ class DatasetSplitApp(QMainWindow):
         val_ratio_layout = QHBoxLayout()
         val_ratio_layout.addWidget(self.val_ratio_label)
         val_ratio_layout.addWidget(self.val_ratio_spin)
+
+        # 测试集比例（0表示不划分测试集）
+        self.test_ratio_label = QLabel("测试集比例:")
+        self.test_ratio_spin = QDoubleSpinBox()
+        self.test_ratio_spin.setRange(0, 0.9)
+        self.test_ratio_spin.setSingleStep(0.05)
+        self.test_ratio_spin.setValue(0)
+        self.test_ratio_spin.setSpecialValueText("不划分")
+        val_ratio_layout.addWidget(self.test_ratio_label)
+        val_ratio_layout.addWidget(self.test_ratio_spin)
         val_ratio_layout.addStretch()
 
+        # 文件生成方式
+        self.link_mode_label = QLabel("文件生成方式:")
+        self.link_mode_combo = QComboBox()
+        self.link_mode_combo.addItems(LINK_MODE_NAMES)
+        self.link_mode_combo.setToolTip("链接不占用新的磁盘空间，无法链接的文件会自动改为复制；\n"
+                                        "清单模式只写图片路径列表，标签需放在与images同级的labels目录")
+        link_mode_layout = QHBoxLayout()
+        link_mode_layout.addWidget(self.link_mode_label)
+        link_mode_layout.addWidget(self.link_mode_combo)
+        link_mode_layout.addStretch()
+
         # 添加到输入组
         input_layout.addLayout(images_dir_layout)
         input_layout.addLayout(labels_dir_layout)
         input_layout.addLayout(output_dir_layout)
         input_layout.addLayout(class_mapping_layout)
         input_layout.addLayout(val_ratio_layout)
+        input_layout.addLayout(link_mode_layout)
         input_group.setLayout(input_layout)
 
         # 创建按钮组
@@ -185,6 +205,8 @@ class DatasetSplitApp(QMainWindow):
         self.output_dir_edit.clear()
         self.class_mapping_edit.clear()
         self.val_ratio_spin.setValue(0.2)
+        self.test_ratio_spin.setValue(0)
+        self.link_mode_combo.setCurrentIndex(0)
 
     def clear_output(self):
         """清空输出区域"""
@@ -233,7 +255,9 @@ class DatasetSplitApp(QMainWindow):
                     labels_dir=self.labels_dir_edit.text(),
                     output_dir=self.output_dir_edit.text(),
                     val_ratio=self.val_ratio_spin.value(),
-                    class_mapping_file=self.class_mapping_edit.text()
+                    class_mapping_file=self.class_mapping_edit.text(),
+                    link_mode=SPLIT_MODES[self.link_mode_combo.currentIndex()],
+                    test_ratio=self.test_ratio_spin.value()
                 )
 
                 # 将缓冲区的输出发送到UI
@@ -248,135 +272,6 @@ class DatasetSplitApp(QMainWindow):
             sys.stdout = old_stdout
 
 
-def create_dataset_split(
-        images_dir="images",
-        labels_dir="labels",
-        output_dir="datasets",
-        val_ratio=0.2,
-        seed=42,
-        class_mapping_file="class_mapping.json"
-):
-    """
-    自动创建训练集/验证集分割
-
-    参数:
-        images_dir: 原始图片目录
-        labels_dir: 原始标签目录
-        output_dir: 输出目录
-        val_ratio: 验证集比例(0-1)
-        seed: 随机种子
-        class_mapping_file: 包含类别映射的JSON文件路径
-    """
-    # 读取类别映射文件
-    with open(class_mapping_file) as f:
-        class_mapping = json.load(f)
-
-    class_to_id = class_mapping["class_to_id"]
-    id_to_class = {v: k for k, v in class_to_id.items()}
-
-    # 按ID排序获取标准类别顺序
-    CLASS_ORDER = [id_to_class[i] for i in sorted(id_to_class.keys())]
-
-    # 创建输出目录结构
-    (Path(output_dir) / "images/train").mkdir(parents=True, exist_ok=True)
-    (Path(output_dir) / "images/val").mkdir(parents=True, exist_ok=True)
-    (Path(output_dir) / "labels/train").mkdir(parents=True, exist_ok=True)
-    (Path(output_dir) / "labels/val").mkdir(parents=True, exist_ok=True)
-
-    # 获取所有图片并按类别分组
-    print("🔍 扫描图片文件中...")
-    class_files = {}
-    for img_file in tqdm(os.listdir(images_dir), desc="处理图片"):
-        if not img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
-            continue
-
-        # 从文件名提取类别 (支持 Anger_001.png 和 001_Anger.png 格式)
-        parts = os.path.splitext(img_file)[0].split('_')
-        if parts[0].isdigit():
-            class_name = parts[1]
-        else:
-            class_name = parts[0]
-
-        if class_name not in class_to_id:
-            raise ValueError(f"发现未定义的类别: {class_name} (来自文件: {img_file})")
-
-        if class_name not in class_files:
-            class_files[class_name] = []
-        class_files[class_name].append(img_file)
-
-    # 验证所有找到的类别都在映射文件中
-    for class_name in class_files.keys():
-        if class_name not in class_to_id:
-            raise ValueError(f"发现未定义的类别: {class_name}")
-
-    # 按标准顺序重新组织类别
-    ordered_classes = [c for c in CLASS_ORDER if c in class_files]
-    class_stats = {c: 0 for c in ordered_classes}
-
-    print("\n📊 开始分割数据集...")
-    random.seed(seed)
-    for class_name in tqdm(ordered_classes, desc="处理类别"):
-        files = class_files[class_name]
-        random.shuffle(files)
-
-        # 计算验证集数量 (至少保留1张)
-        val_count = max(1, int(len(files) * val_ratio))
-        val_files = files[:val_count]
-        train_files = files[val_count:]
-
-        class_stats[class_name] = {
-            'train': len(train_files),
-            'val': len(val_files),
-            'total': len(files)
-        }
-
-        # 使用进度条复制文件
-        for phase, files in [('train', train_files), ('val', val_files)]:
-            for img_file in tqdm(files, desc=f"复制 {class_name} {phase} 文件", leave=False):
-                # 处理图片文件
-                img_path = os.path.join(images_dir, img_file)
-                shutil.copy(img_path, f"{output_dir}/images/{phase}/{img_file}")
-
-                # 处理对应的标签文件
-                label_file = os.path.splitext(img_file)[0] + '.txt'
-                label_path = os.path.join(labels_dir, label_file)
-                if os.path.exists(label_path):
-                    shutil.copy(label_path, f"{output_dir}/labels/{phase}/{label_file}")
-
-    # 创建标准格式的YAML配置文件
-    yaml_content = {
-        'path': str(Path(output_dir).resolve()),
-        'train': 'images/train',
-        'val': 'images/val',
-        'nc': len(ordered_classes),
-        'names': CLASS_ORDER
-    }
-
-    yaml_path = Path(output_dir) / "dataset.yaml"
-    with open(yaml_path, 'w') as f:
-        yaml.dump(yaml_content, f, sort_keys=False, default_flow_style=None)
-
-    # 打印统计信息
-    print("\n✅ 数据集分割完成")
-    print(f"📁 输出目录: {output_dir}")
-    print(f"🎯 类别数量: {len(ordered_classes)}")
-    print("\n📊 各类别数量统计:")
-    max_name_len = max(len(c) for c in ordered_classes)
-    for class_name in ordered_classes:
-        stats = class_stats[class_name]
-        print(f"  {class_name.ljust(max_name_len)} : "
-              f"训练集={str(stats['train']).rjust(4)} "
-              f"验证集={str(stats['val']).rjust(4)} "
-              f"总计={str(stats['total']).rjust(4)}")
-
-    print(f"\n📄 YAML配置文件已生成: {yaml_path}")
-    print("🎯 标准格式预览:")
-    print("=" * 40)
-    with open(yaml_path) as f:
-        print(f.read())
-    print("=" * 40)
-
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = DatasetSplitApp()
@@ -1,25 +1,59 @@
 import sys
 from PyQt5.QtWidgets import QApplication, QMainWindow
-from PyQt5.QtGui import QIcon, QPixmap, QPainter
+from PyQt5.QtGui import QIcon, QIconEngine, QPixmap, QPainter
 from PyQt5.QtSvg import QSvgRenderer
-from PyQt5.QtCore import QByteArray, Qt
+from PyQt5.QtCore import QByteArray, QRectF, Qt
 
 
-def set_svg_icon_from_string(window, svg_string):
-    """将 SVG 字符串设置为窗口图标"""
-    svg_data = QByteArray(svg_string.encode('utf-8'))
-    renderer = QSvgRenderer(svg_data)
+class SvgIconEngine(QIconEngine):
+    """
+    SVG图标引擎：SVG只解析一次，按实际请求的尺寸（已包含设备像素比）栅格化并缓存
+
+    复制出的引擎共享同一个渲染器和缓存
+    """
+
+    def __init__(self, renderer, pixmaps=None):
+        super().__init__()
+        self._renderer = renderer
+        self._pixmaps = {} if pixmaps is None else pixmaps  # (宽, 高) -> QPixmap
+
+    def paint(self, painter, rect, mode, state):
+        self._renderer.render(painter, QRectF(rect))
 
-    # 创建适当大小的 pixmap
-    pixmap = QPixmap(64, 64)
-    pixmap.fill(Qt.transparent)
+    def pixmap(self, size, mode, state):
+        key = (size.width(), size.height())
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(size)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            self._renderer.render(painter)
+            painter.end()
+            self._pixmaps[key] = pixmap
+        return QPixmap(pixmap)
 
-    # 渲染 SVG 到 pixmap
-    painter = QPainter(pixmap)
-    renderer.render(painter)
-    painter.end()
+    def actualSize(self, size, mode, state):
+        return size
 
-    window.setWindowIcon(QIcon(pixmap))
+    def clone(self):
+        return SvgIconEngine(self._renderer, self._pixmaps)
+
+
+_icons = {}  # SVG字符串 -> QIcon（进程内共享）
+
+
+def get_svg_icon(svg_string):
+    """返回SVG字符串对应的QIcon，同一图标只创建一次，各尺寸在第一次使用时才栅格化"""
+    icon = _icons.get(svg_string)
+    if icon is None:
+        renderer = QSvgRenderer(QByteArray(svg_string.encode('utf-8')))
+        icon = _icons[svg_string] = QIcon(SvgIconEngine(renderer))
+    return icon
+
+
+def set_svg_icon_from_string(window, svg_string):
+    """将 SVG 字符串设置为窗口图标"""
+    window.setWindowIcon(get_svg_icon(svg_string))
 
 
 def get_config_svg_icon():
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+from collections import deque
+
+import cv2
+
+from ImageCache import imread_unicode, imread_reduced
+from ImageHeader import read_image_size
+from LabelWriter import atomic_write_bytes
+
+THUMBNAIL_CACHE_DIR = os.path.join("resource", "cache", "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    磁盘缩略图缓存
+
+    缩略图以 (绝对路径, 修改时间, 文件大小) 的哈希为键保存为JPEG，图片改动后自动失效。
+    缓存缺失时由后台线程用缩小解码生成；请求按后进先出处理，
+    快速滚动时优先生成最新可见的缩略图，积压超过max_pending的旧请求会被丢弃。
+    生成完成后在工作线程中回调 on_ready(image_path, jpeg_bytes)。
+    """
+
+    def __init__(self, size=128, workers=4, max_pending=256, cache_dir=THUMBNAIL_CACHE_DIR, on_ready=None):
+        self.size = size
+        self.max_pending = max_pending
+        self.cache_dir = cache_dir
+        self.on_ready = on_ready
+        self._queue = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f"thumbnail-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def cache_path(self, image_path):
+        """缩略图在磁盘缓存中的路径，图片不存在时返回None"""
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{self.size}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.jpg")
+
+    def request(self, image_path):
+        """请求一张缩略图（已在队列中的不会重复排队），返回因积压过多被丢弃的旧请求的路径列表"""
+        dropped = []
+        with self._cond:
+            if self._closed or image_path in self._queued:
+                return dropped
+            self._queue.append(image_path)
+            self._queued.add(image_path)
+            while len(self._queue) > self.max_pending:
+                path = self._queue.popleft()
+                self._queued.discard(path)
+                dropped.append(path)
+            self._cond.notify()
+        return dropped
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+
+    def cached(self, image_path):
+        """只读磁盘缓存中的缩略图，不存在时返回None（不生成）"""
+        return self._read(self.cache_path(image_path))
+
+    def load_or_create(self, image_path):
+        """读取或生成缩略图，返回JPEG字节，失败返回None"""
+        cache_path = self.cache_path(image_path)
+        if cache_path is None:
+            return None
+        data = self._read(cache_path)
+        if data is not None:
+            return data
+
+        image = self._decode_small(image_path)
+        if image is None:
+            return None
+        h, w = image.shape[:2]
+        scale = self.size / max(w, h)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        success, buf = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+        if not success:
+            return None
+        data = buf.tobytes()
+        try:
+            atomic_write_bytes(cache_path, data, fsync=False)
+        except OSError:
+            pass
+        return data
+
+    @staticmethod
+    def _read(cache_path):
+        if cache_path is None:
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _decode_small(self, image_path):
+        """按缩略图尺寸选择最大的缩小解码倍数"""
+        size = read_image_size(image_path)
+        if size is not None:
+            for factor in (8, 4, 2):
+                if max(size) / factor >= self.size:
+                    return imread_reduced(image_path, factor)
+        return imread_unicode(image_path)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                image_path = self._queue.pop()
+            try:
+                data = self.load_or_create(image_path)
+            except Exception as e:
+                print(f"生成缩略图失败: {image_path}, 错误: {str(e)}")
+                data = None
+            finally:
+                with self._cond:
+                    self._queued.discard(image_path)
+            if data is not None and self.on_ready:
+                self.on_ready(image_path, data)
@@ -0,0 +1,83 @@
+import math
+import threading
+
+import cv2
+
+
+class TilePyramid:
+    """
+    图片的多级金字塔（mipmap）
+
+    第0级为传入的帧（可以是缩小解码的预览帧），之后每级边长减半，直到短边小于min_size；
+    除第0级外的各级在后台线程中逐级生成，生成完一级回调一次on_level_ready。
+    image_size为原图尺寸 (宽, 高)，各级像素与原图像素的比例据此计算。
+    """
+
+    def __init__(self, image, image_size=None, tile_size=512, min_size=256, on_level_ready=None):
+        self.tile_size = tile_size
+        self.min_size = min_size
+        self.on_level_ready = on_level_ready
+        if image_size is None:
+            image_size = (image.shape[1], image.shape[0])
+        self.image_w, self.image_h = image_size
+        self._levels = [image]
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """开始在后台生成缩小的各级"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._build, name="tile-pyramid", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+
+    def _build(self):
+        level = self._levels[0]
+        while not self._stopped:
+            h, w = level.shape[:2]
+            if min(h, w) // 2 < self.min_size:
+                break
+            level = cv2.resize(level, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA)
+            with self._lock:
+                self._levels.append(level)
+            if self.on_level_ready and not self._stopped:
+                self.on_level_ready()
+
+    def level_count(self):
+        with self._lock:
+            return len(self._levels)
+
+    def best_level(self, scale):
+        """
+        返回绘制比例为scale（屏幕像素/原图像素）时使用的级别
+
+        取像素数不少于屏幕所需的最粗一级；该级尚未生成时退回到已生成的最粗一级。
+        返回 (级别序号, 该级图像, 该级像素对应的原图像素数 fx, fy)
+        """
+        with self._lock:
+            levels = list(self._levels)
+        index = 0
+        for i, level in enumerate(levels):
+            if self.image_w / level.shape[1] <= 1.0 / scale:
+                index = i
+        level = levels[index]
+        h, w = level.shape[:2]
+        return index, level, self.image_w / w, self.image_h / h
+
+    def tile(self, level, tx, ty):
+        """取出某级的一块瓦片（np.ndarray视图，不拷贝）"""
+        t = self.tile_size
+        return level[ty * t:(ty + 1) * t, tx * t:(tx + 1) * t]
+
+    def tile_range(self, level, x0, y0, x1, y1):
+        """某级图像坐标范围内的瓦片序号范围 (tx0, ty0, tx1, ty1)，右/下边界不包含"""
+        h, w = level.shape[:2]
+        t = self.tile_size
+        tx0 = max(0, int(x0 // t))
+        ty0 = max(0, int(y0 // t))
+        tx1 = min((w + t - 1) // t, int(math.ceil(x1 / t)))
+        ty1 = min((h + t - 1) // t, int(math.ceil(y1 / t)))
+        return tx0, ty0, tx1, ty1
@@ -0,0 +1,110 @@
+import argparse
+import sys
+
+import BatchCore
+
+
+def parse_color(text):
+    """解析 R,G,B 颜色，返回OpenCV使用的 (B, G, R)"""
+    try:
+        r, g, b = (int(c) for c in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的RGB颜色: {text}")
+    if not all(0 <= c <= 255 for c in (r, g, b)):
+        raise argparse.ArgumentTypeError(f"RGB颜色分量应在0~255之间: {text}")
+    return b, g, r
+
+
+def print_failures(_progress, status):
+    """只输出失败的图片"""
+    if status.startswith("❌"):
+        print(status, file=sys.stderr)
+
+
+def cmd_split(args):
+    BatchCore.create_dataset_split(images_dir=args.images, labels_dir=args.labels, output_dir=args.output,
+                                   val_ratio=args.val_ratio, seed=args.seed,
+                                   class_mapping_file=args.class_mapping,
+                                   link_mode=args.link_mode, workers=args.workers, test_ratio=args.test_ratio)
+    return 0
+
+
+def cmd_resize(args):
+    processed, failed = BatchCore.resize_images(args.input, args.output, args.size, args.color, args.format,
+                                                progress=print_failures)
+    print(f"处理完成: 成功 {processed} 张，失败 {failed} 张")
+    return 1 if failed else 0
+
+
+def cmd_check(args):
+    invalid_files = BatchCore.check_images(args.folder, (args.width, args.height))
+    for name, reason in invalid_files:
+        print(f"{name}\t{reason}")
+    if invalid_files:
+        print(f"共{len(invalid_files)}个文件不符合 {args.width}x{args.height}", file=sys.stderr)
+        return 1
+    print(f"所有图片都是 {args.width}x{args.height} 大小")
+    return 0
+
+
+def cmd_rename(args):
+    count, mapping_file = BatchCore.rename_files(args.source, args.target, args.mode)
+    if not count:
+        print("没有找到可重命名的文件")
+        return 1
+    print(f"成功重命名并复制了 {count} 个文件，类别映射已保存到 {mapping_file}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="labeltool", description="YOLO数据集批处理工具（无界面）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split = commands.add_parser("split", help="按类别分割训练集/验证集")
+    split.add_argument("--images", default="images", help="图像目录")
+    split.add_argument("--labels", default="labels", help="标签目录")
+    split.add_argument("--output", default="datasets", help="输出目录")
+    split.add_argument("--class-mapping", default="class_mapping.txt", help="类别映射文件")
+    split.add_argument("--val-ratio", type=float, default=0.2, help="验证集比例")
+    split.add_argument("--test-ratio", type=float, default=0.0, help="测试集比例（0表示不划分测试集）")
+    split.add_argument("--seed", type=int, default=42, help="随机种子")
+    split.add_argument("--link-mode", choices=BatchCore.SPLIT_MODES, default="copy",
+                       help="生成文件的方式：复制、硬链接、符号链接或reflink（不支持时自动改为复制）；"
+                            "manifest只写 train.txt/val.txt/test.txt 清单，不复制图片")
+    split.add_argument("--workers", type=int, help="文件I/O线程数")
+    split.set_defaults(func=cmd_split)
+
+    resize = commands.add_parser("resize", help="等比例缩放并填充为正方形")
+    resize.add_argument("input", help="输入文件夹")
+    resize.add_argument("output", help="输出文件夹")
+    resize.add_argument("--size", type=int, default=640, help="目标尺寸（像素）")
+    resize.add_argument("--color", type=parse_color, default=(255, 255, 255), help="填充颜色 R,G,B")
+    resize.add_argument("--format", default="jpg", help="输出格式，如 jpg、png、bmp、webp")
+    resize.set_defaults(func=cmd_resize)
+
+    check = commands.add_parser("check", help="检查图片尺寸，有不符合的图片时返回1")
+    check.add_argument("folder", help="图片文件夹")
+    check.add_argument("--width", type=int, default=640)
+    check.add_argument("--height", type=int, default=640)
+    check.set_defaults(func=cmd_check)
+
+    rename = commands.add_parser("rename", help="按所在文件夹名重命名文件并生成类别映射")
+    rename.add_argument("source", help="源文件夹")
+    rename.add_argument("target", nargs="?", help="目标文件夹（默认为源文件夹同级的 <文件夹名>_ok）")
+    rename.add_argument("--mode", choices=BatchCore.RENAME_MODES, default="prefix",
+                        help="prefix: 文件夹_序号，suffix: 序号_文件夹")
+    rename.set_defaults(func=cmd_rename)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())